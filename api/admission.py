@@ -0,0 +1,158 @@
+"""Controle de admissão pela profundidade da fila (load shedding)."""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .queue import PrintQueue
+
+
+class DrainEstimator:
+    """Mede quanto tempo cada impressora leva por item da fila processado.
+
+    O envio ao spooler termina muito antes de a impressora terminar de
+    imprimir (o job fica no buffer dela), então cada job custa o maior entre
+    o tempo de geração e envio e o tempo físico de impressão: avanços de
+    etiqueta do job (cópias do ^PQ; um par 2-up é um avanço) divididos pela
+    vazão física configurada da impressora. O custo é dividido pelos itens
+    da fila atendidos, então itens agrupados (^PQ) ou empacotados (2-up)
+    aparecem mais baratos na medida certa. Usa o tempo efetivamente gasto
+    imprimindo (não o tempo de relógio), para que períodos com a fila vazia
+    não façam a vazão parecer menor.
+    """
+
+    def __init__(self, window_seconds: int = 300, default_labels_per_second: float = 2,
+                 printer_labels_per_second: Optional[Dict[str, float]] = None,
+                 default_printer: Optional[str] = None):
+        """Inicializa o estimador.
+
+        Args:
+            window_seconds: Janela das medições consideradas
+            default_labels_per_second: Vazão física das impressoras sem valor
+                próprio (também a estimativa antes de haver medições)
+            printer_labels_per_second: Vazão física (avanços de etiqueta/s)
+                por nome de impressora
+            default_printer: Impressora dos itens sem printer_name
+        """
+        self.window_seconds = window_seconds
+        self.default_seconds_per_label = 1.0 / max(default_labels_per_second, 0.001)
+        self.printer_seconds_per_label = {
+            name: 1.0 / max(rate, 0.001)
+            for name, rate in (printer_labels_per_second or {}).items() if rate
+        }
+        self.default_printer = default_printer
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def physical_seconds_per_label(self, printer_name: Optional[str]) -> float:
+        """Tempo físico por avanço de etiqueta na impressora (configurado)."""
+        return self.printer_seconds_per_label.get(
+            printer_name or self.default_printer, self.default_seconds_per_label
+        )
+
+    def record(self, printer_name: Optional[str], seconds: float, labels: int = 1,
+               feeds: Optional[int] = None):
+        """Registra um job concluído.
+
+        Args:
+            printer_name: Impressora do item na fila (None = padrão)
+            seconds: Tempo gasto para gerar e enviar o job ao spooler
+            labels: Itens da fila atendidos pelo job
+            feeds: Avanços de etiqueta do job (padrão = ``labels``)
+        """
+        feeds = labels if feeds is None else feeds
+        cost = max(seconds, feeds * self.physical_seconds_per_label(printer_name))
+        now = time.monotonic()
+        with self._lock:
+            samples = self._samples.setdefault(printer_name or '', deque())
+            samples.append((now, cost, labels))
+            self._trim(samples, now)
+
+    def _trim(self, samples: deque, now: float):
+        while samples and samples[0][0] < now - self.window_seconds:
+            samples.popleft()
+
+    def seconds_per_label(self, printer_name: Optional[str]) -> float:
+        """Tempo médio por item na impressora (ou o físico configurado, sem dados)."""
+        now = time.monotonic()
+        with self._lock:
+            samples = self._samples.get(printer_name or '')
+            if samples:
+                self._trim(samples, now)
+            if not samples:
+                return self.physical_seconds_per_label(printer_name)
+            seconds = sum(s[1] for s in samples)
+            labels = sum(s[2] for s in samples)
+        return seconds / labels if labels else self.physical_seconds_per_label(printer_name)
+
+    def drain_seconds(self, pending: Dict[str, int]) -> float:
+        """Tempo estimado para esvaziar a fila pendente.
+
+        O processador atende um item por vez, então os tempos das
+        impressoras se somam.
+
+        Args:
+            pending: Itens pendentes por impressora ('' = padrão)
+        """
+        return sum(
+            count * self.seconds_per_label(printer_name)
+            for printer_name, count in pending.items()
+        )
+
+
+class LoadShedder:
+    """Recusa trabalho novo quando a fila já não esvazia dentro do limite.
+
+    Cada prioridade tem seu limite de tempo de esvaziamento (0 = nunca
+    recusa), permitindo continuar aceitando etiquetas urgentes enquanto os
+    lotes são recusados. A profundidade da fila é consultada no máximo uma
+    vez a cada ``refresh_seconds``.
+    """
+
+    def __init__(self, print_queue: PrintQueue, estimator: DrainEstimator,
+                 thresholds: Optional[Dict] = None, refresh_seconds: float = 1.0):
+        """Inicializa o controle de admissão.
+
+        Args:
+            print_queue: Fila consultada para a profundidade pendente
+            estimator: Estimador da vazão das impressoras
+            thresholds: Tempo máximo de esvaziamento (s) por prioridade,
+                com "default" para as prioridades não listadas
+            refresh_seconds: Validade da profundidade consultada
+        """
+        self.print_queue = print_queue
+        self.estimator = estimator
+        self.thresholds = {str(k): v for k, v in (thresholds or {}).items()}
+        self.refresh_seconds = refresh_seconds
+        self._drain = 0.0
+        self._updated = 0.0
+        self._lock = threading.Lock()
+
+    def enabled(self) -> bool:
+        """Indica se há algum limite configurado."""
+        return any(self.thresholds.values())
+
+    def drain_seconds(self) -> float:
+        """Tempo estimado para esvaziar a fila pendente (em cache curto)."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._updated >= self.refresh_seconds:
+                pending = {
+                    printer_name: counts.get('pending', 0)
+                    for printer_name, counts in self.print_queue.get_printer_stats().items()
+                }
+                self._drain = self.estimator.drain_seconds(pending)
+                self._updated = now
+            return self._drain
+
+    def check(self, priority: int) -> float:
+        """Verifica se uma requisição da prioridade pode ser aceita.
+
+        Returns:
+            0 se aceita; senão, segundos estimados até a fila voltar ao limite
+        """
+        limit = self.thresholds.get(str(priority), self.thresholds.get('default'))
+        if not limit:
+            return 0.0
+        drain = self.drain_seconds()
+        return drain - limit if drain > limit else 0.0
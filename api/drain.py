@@ -0,0 +1,124 @@
+"""Esvaziamento da fila sob demanda (POST /queue/process)."""
+import logging
+import time
+from typing import Dict, Optional
+
+from .queue import PrintQueue, new_queue_id
+
+logger = logging.getLogger(__name__)
+
+
+class DrainJob:
+    """Esvaziamento disparado: os itens ativos da fila naquele momento."""
+
+    def __init__(self, first_seq: int, last_seq: int, total: int, started_at: str):
+        """Inicializa o esvaziamento.
+
+        Args:
+            first_seq: Primeiro seq pendente/em processamento no disparo
+            last_seq: Último seq pendente/em processamento no disparo
+            total: Itens ativos no disparo
+            started_at: Horário do disparo, no relógio do banco
+        """
+        self.id = new_queue_id()
+        self.first_seq = first_seq
+        self.last_seq = last_seq
+        self.total = total
+        self.started_at = started_at
+        self.status = "running" if total else "completed"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None if total else self.created_at
+        # Última contagem lida do banco, por status
+        self.counts: Dict[str, int] = {}
+
+    def to_state(self) -> Dict:
+        """Estado gravado no banco (``PrintQueue.save_background_job``)."""
+        return {
+            "first_seq": self.first_seq,
+            "last_seq": self.last_seq,
+            "total": self.total,
+            "started_at": self.started_at,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "counts": self.counts,
+        }
+
+    @classmethod
+    def from_state(cls, job_id: str, state: Dict) -> 'DrainJob':
+        """Reconstrói um esvaziamento gravado (em qualquer worker)."""
+        job = cls(state["first_seq"], state["last_seq"], state["total"], state["started_at"])
+        job.id = job_id
+        job.status = state["status"]
+        job.created_at = state["created_at"]
+        job.finished_at = state["finished_at"]
+        job.counts = state["counts"]
+        return job
+
+    def to_dict(self) -> Dict:
+        """Retorna o progresso do esvaziamento."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.counts.get('completed', 0),
+            "failed": self.counts.get('failed', 0),
+            "remaining": self.counts.get('pending', 0) + self.counts.get('processing', 0),
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 3),
+        }
+
+
+class DrainManager:
+    """Acompanha os esvaziamentos disparados por POST /queue/process.
+
+    Quem imprime é sempre o processador da fila (não há um segundo laço
+    competindo pelos mesmos itens). O progresso é lido do próprio banco:
+    itens da faixa do disparo que ainda aguardam, e os que foram concluídos
+    ou falharam depois dele. Itens adicionados depois do disparo não contam.
+    Os esvaziamentos ficam gravados no banco, então qualquer worker responde
+    ``GET /queue/process/{id}``.
+    """
+
+    # Tipo das tarefas na tabela background_jobs
+    KIND = "drain"
+
+    def __init__(self, print_queue: PrintQueue, max_jobs: int = 100):
+        """Inicializa o gerenciador.
+
+        Args:
+            print_queue: Fila acompanhada
+            max_jobs: Esvaziamentos mantidos no banco para consulta
+        """
+        self.print_queue = print_queue
+        self.max_jobs = max_jobs
+
+    def start(self) -> DrainJob:
+        """Registra um esvaziamento com os itens ativos neste momento."""
+        active = self.print_queue.get_active_range()
+        job = DrainJob(active['first_seq'], active['last_seq'], active['count'], active['now'])
+        self.print_queue.save_background_job(self.KIND, job.id, job.to_state())
+        # Descarta os esvaziamentos mais antigos
+        self.print_queue.prune_background_jobs(self.KIND, self.max_jobs)
+        logger.info(f"Esvaziamento {job.id} disparado ({job.total} itens)")
+        return job
+
+    def get(self, job_id: str) -> Optional[DrainJob]:
+        """Obtém um esvaziamento pelo ID."""
+        state = self.print_queue.get_background_job(self.KIND, job_id)
+        return DrainJob.from_state(job_id, state) if state else None
+
+    def progress(self, job: DrainJob) -> Dict:
+        """Atualiza o progresso a partir do banco (enquanto não terminou).
+
+        Returns:
+            Status, total, processados, falhas e restantes
+        """
+        if job.status == "running":
+            job.counts = self.print_queue.get_range_progress(
+                job.first_seq, job.last_seq, job.started_at
+            )
+            if not job.counts.get('pending') and not job.counts.get('processing'):
+                job.status = "completed"
+                job.finished_at = time.time()
+                self.print_queue.save_background_job(self.KIND, job.id, job.to_state())
+        return job.to_dict()
@@ -0,0 +1,247 @@
+"""Notificação das mudanças de status das requisições da fila."""
+import asyncio
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Transição de status: (ID da requisição, novo status, mensagem de erro)
+Transition = Tuple[str, str, Optional[str]]
+
+
+class JobEvents:
+    """Distribui as transições de status para quem está aguardando.
+
+    As transições são publicadas pela fila (a partir da thread do processador
+    ou das rotas da API) e entregues a filas ``asyncio`` de cada assinante,
+    sempre pelo event loop do assinante. Sem assinantes, publicar custa apenas
+    a verificação de uma lista vazia.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        """Inicializa o distribuidor de eventos.
+
+        Args:
+            max_pending: Eventos acumulados por assinante antes de descartar
+                os mais antigos (assinante lento)
+        """
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registra um assinante no event loop atual.
+
+        Returns:
+            Fila que recebe os eventos publicados a partir de agora
+        """
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        with self._lock:
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove um assinante."""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[1] is not queue]
+
+    def publish(self, queue_id: str, status: str,
+                error_message: Optional[str] = None):
+        """Publica uma transição de status.
+
+        Args:
+            queue_id: ID da requisição
+            status: Novo status
+            error_message: Mensagem de erro (se houver)
+        """
+        if not self.has_subscribers():
+            return
+        self._dispatch({
+            "id": queue_id,
+            "status": status,
+            "error_message": error_message,
+            "at": datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        })
+
+    def record(self, cursor: sqlite3.Cursor, transitions: List[Transition]):
+        """Chamado pela fila dentro da transação que muda os status.
+
+        Neste processo não há nada a gravar: a entrega é feita em
+        ``committed``, depois do commit.
+        """
+
+    def committed(self, transitions: List[Transition]):
+        """Chamado pela fila depois do commit da mudança de status."""
+        if not self.has_subscribers():
+            return
+        for queue_id, status, error_message in transitions:
+            self.publish(queue_id, status, error_message)
+
+    def has_subscribers(self) -> bool:
+        """Indica se há alguém aguardando eventos neste processo."""
+        with self._lock:
+            return bool(self._subscribers)
+
+    def _dispatch(self, event: Dict):
+        """Entrega um evento a todos os assinantes deste processo."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Event loop já encerrado
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: Dict):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+class SharedJobEvents(JobEvents):
+    """JobEvents compartilhado entre processos (vários workers do uvicorn).
+
+    As transições são gravadas na tabela ``job_events`` do banco da fila e
+    cada processo as lê a cada ``poll_interval`` segundos (consulta pela
+    chave primária), entregando-as aos seus assinantes. Assim quem acompanha
+    uma requisição recebe os eventos do processo que a imprimiu.
+
+    A fila grava os eventos na mesma transação que muda os status (``record``),
+    sem commit próprio; por isso ``db_path`` deve ser o banco da fila. Eventos
+    mais antigos que ``retention_seconds`` (ou além dos ``retention`` mais
+    recentes) são apagados periodicamente: só servem a quem já assinava.
+    """
+
+    def __init__(self, db_path: str, poll_interval: float = 0.25,
+                 retention: int = 10000, retention_seconds: float = 300,
+                 max_pending: int = 1000):
+        """Inicializa o distribuidor compartilhado.
+
+        Args:
+            db_path: Banco SQLite da fila, compartilhado pelos workers
+            poll_interval: Intervalo de leitura de eventos novos (segundos)
+            retention: Quantos eventos mais recentes manter na tabela
+            retention_seconds: Idade máxima dos eventos mantidos
+            max_pending: Eventos acumulados por assinante
+        """
+        super().__init__(max_pending)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.retention_seconds = retention_seconds
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error_message TEXT,
+                at TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        self._last_seq = self._max_seq(conn)
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path))
+
+    @staticmethod
+    def _max_seq(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT MAX(seq) FROM job_events").fetchone()[0] or 0
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+
+    def publish(self, queue_id: str, status: str,
+                error_message: Optional[str] = None):
+        """Grava a transição para todos os processos (inclusive este).
+
+        Para mudanças feitas fora de uma transação da fila; a fila usa
+        ``record``, que não abre uma transação própria.
+        """
+        conn = self._connect()
+        try:
+            self.record(conn.cursor(), [(queue_id, status, error_message)])
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao gravar evento de {queue_id}: {e}")
+        finally:
+            conn.close()
+
+    def record(self, cursor: sqlite3.Cursor, transitions: List[Transition]):
+        """Grava as transições na transação da fila (confirmadas com ela)."""
+        at = self._now()
+        cursor.executemany(
+            "INSERT INTO job_events (id, status, error_message, at) VALUES (?, ?, ?, ?)",
+            [(queue_id, status, error_message, at)
+             for queue_id, status, error_message in transitions]
+        )
+
+    def committed(self, transitions: List[Transition]):
+        """Nada a fazer: os processos entregam os eventos lendo o banco."""
+
+    def start(self):
+        """Começa a ler os eventos gravados pelos outros processos."""
+        if self.thread:
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Para a leitura de eventos."""
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def _poll_loop(self):
+        polls = 0
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._poll(prune=polls % 240 == 0)
+            except sqlite3.Error as e:
+                logger.warning(f"Erro ao ler eventos: {e}")
+            polls += 1
+
+    def _poll(self, prune: bool = False):
+        conn = self._connect()
+        try:
+            if not self.has_subscribers():
+                # Ninguém aguardando: só acompanha a posição
+                self._last_seq = self._max_seq(conn)
+            else:
+                rows = conn.execute("""
+                    SELECT seq, id, status, error_message, at FROM job_events
+                    WHERE seq > ? ORDER BY seq LIMIT 1000
+                """, (self._last_seq,)).fetchall()
+                for seq, queue_id, status, error_message, at in rows:
+                    self._dispatch({
+                        "id": queue_id,
+                        "status": status,
+                        "error_message": error_message,
+                        "at": at,
+                    })
+                    self._last_seq = seq
+            if prune:
+                cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention_seconds)
+                conn.execute(
+                    "DELETE FROM job_events WHERE seq <= ? OR at < ?",
+                    (self._max_seq(conn) - self.retention,
+                     cutoff.isoformat(timespec='milliseconds'))
+                )
+                conn.commit()
+        finally:
+            conn.close()
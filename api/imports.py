@@ -0,0 +1,364 @@
+"""Importação em massa de etiquetas a partir de arquivos NDJSON ou CSV."""
+import csv
+import gzip
+import io
+import json
+import logging
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .queue import PrintQueue, DEFAULT_PRIORITY, new_queue_id
+from .rate_limit import RateLimiter
+from .render_pool import RenderPool
+from .zpl_generator import ZPLGenerator
+
+logger = logging.getLogger(__name__)
+
+# Quantos erros por linha guardar em cada importação (o total é sempre contado)
+MAX_REPORTED_ERRORS = 50
+
+# Gerador usado na conversão dos registros (também nos processos do RenderPool)
+_generator: Optional[ZPLGenerator] = None
+
+# Campos gravados no banco para que qualquer worker responda o progresso
+_STATE_FIELDS = (
+    "status", "file_format", "bytes_total", "bytes_read", "rows", "queued",
+    "failed", "errors", "throttled_seconds", "created_at", "finished_at",
+)
+
+
+class ImportJob:
+    """Estado de uma importação em andamento ou concluída."""
+
+    def __init__(self, file_path: Path, file_format: str,
+                 mapping: Optional[Dict[str, str]] = None,
+                 label_type: str = "produto",
+                 printer_name: Optional[str] = None,
+                 priority: int = DEFAULT_PRIORITY,
+                 client_id: Optional[str] = None):
+        """Inicializa a importação.
+
+        Args:
+            file_path: Arquivo recebido (pode estar compactado com gzip)
+            file_format: "ndjson" ou "csv"
+            mapping: Renomeia colunas/chaves de origem para campos da etiqueta
+            label_type: Tipo de etiqueta das linhas sem label_type próprio
+            printer_name: Impressora das linhas sem printer_name próprio
+            priority: Prioridade na fila das linhas importadas
+            client_id: Cliente que enviou o arquivo
+        """
+        self.id = new_queue_id()
+        self.file_path = file_path
+        self.file_format = file_format
+        self.mapping = mapping or {}
+        self.label_type = label_type
+        self.printer_name = printer_name
+        self.priority = priority
+        self.client_id = client_id
+
+        self.status = "running"
+        self.bytes_total = file_path.stat().st_size
+        self.bytes_read = 0
+        self.rows = 0
+        self.queued = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self.throttled_seconds = 0.0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_state(self) -> Dict:
+        """Estado gravado no banco (``PrintQueue.save_background_job``)."""
+        return {field: getattr(self, field) for field in _STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, job_id: str, state: Dict) -> 'ImportJob':
+        """Reconstrói o progresso gravado de uma importação (em qualquer worker).
+
+        Só serve para consulta: o arquivo e os parâmetros de conversão ficam
+        com o worker que recebeu o upload.
+        """
+        job = cls.__new__(cls)
+        job.id = job_id
+        for field in _STATE_FIELDS:
+            setattr(job, field, state[field])
+        return job
+
+    def to_dict(self) -> Dict:
+        """Retorna o progresso da importação."""
+        progress = self.bytes_read / self.bytes_total if self.bytes_total else 1.0
+        return {
+            "id": self.id,
+            "status": self.status,
+            "format": self.file_format,
+            "progress": round(min(progress, 1.0), 4),
+            "rows": self.rows,
+            "queued": self.queued,
+            "failed": self.failed,
+            "errors": self.errors,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 3),
+        }
+
+    def add_error(self, row: int, message: str):
+        """Registra uma linha rejeitada."""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def settings(self) -> Dict:
+        """Parâmetros usados na conversão dos registros (enviados aos processos)."""
+        return {
+            "mapping": self.mapping,
+            "label_type": self.label_type,
+            "printer_name": self.printer_name,
+            "priority": self.priority,
+            "client_id": self.client_id,
+        }
+
+
+class ImportManager:
+    """Processa importações em segundo plano, em blocos de tamanho fixo.
+
+    O arquivo é lido de forma incremental (linha a linha, descompactando
+    gzip sob demanda) e cada bloco é validado, gerado em ZPL e enfileirado
+    em uma única transação. A memória usada depende do tamanho do bloco, não
+    do tamanho do arquivo. Com um ``RenderPool`` com processos, a validação
+    dos blocos de arquivos grandes é feita em paralelo, mantendo a ordem.
+
+    Com um ``RateLimiter``, cada bloco é cobrado do limite de etiquetas/s do
+    cliente e só entra na fila quando o saldo permite.
+
+    O progresso fica gravado no banco, atualizado na mesma transação de cada
+    bloco enfileirado, então qualquer worker responde ``GET /print/import/{id}``.
+    """
+
+    # Tipo das tarefas na tabela background_jobs
+    KIND = "import"
+
+    def __init__(self, print_queue: PrintQueue, chunk_size: int = 500,
+                 max_jobs: int = 100, render_pool: Optional[RenderPool] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """Inicializa o gerenciador de importações.
+
+        Args:
+            print_queue: Fila onde as etiquetas são adicionadas
+            chunk_size: Linhas por transação
+            max_jobs: Importações mantidas no banco para consulta
+            render_pool: Pool de geração de ZPL (padrão: no próprio processo)
+            rate_limiter: Limite de etiquetas/s por cliente (opcional)
+        """
+        self.print_queue = print_queue
+        self.chunk_size = chunk_size
+        self.max_jobs = max_jobs
+        self.render_pool = render_pool or RenderPool()
+        self.rate_limiter = rate_limiter
+        # Importações em andamento neste processo (progresso ao vivo)
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, job: ImportJob) -> ImportJob:
+        """Registra a importação e começa a processá-la em uma thread."""
+        self.print_queue.save_background_job(self.KIND, job.id, job.to_state())
+        # Descarta as importações mais antigas
+        self.print_queue.prune_background_jobs(self.KIND, self.max_jobs)
+        with self._lock:
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """Obtém uma importação pelo ID (deste ou de outro worker)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return job
+        state = self.print_queue.get_background_job(self.KIND, job_id)
+        return ImportJob.from_state(job_id, state) if state else None
+
+    def _run(self, job: ImportJob):
+        """Lê o arquivo, valida e enfileira as linhas em blocos."""
+        try:
+            with open(job.file_path, 'rb') as raw:
+                prepare = partial(_prepare_records, job.settings())
+                for items, errors in self.render_pool.map_ordered(
+                        prepare, self._read_chunks(job, raw)):
+                    for row_number, message in errors:
+                        job.add_error(row_number, message)
+                    if items:
+                        self._enqueue(job, items)
+                    elif errors:
+                        self.print_queue.save_background_job(self.KIND, job.id, job.to_state())
+                job.bytes_read = job.bytes_total
+            job.status = "completed"
+            logger.info(
+                f"Importação {job.id} concluída: {job.queued} enfileiradas, {job.failed} rejeitadas"
+            )
+        except Exception as e:
+            job.status = "failed"
+            job.errors.append({"row": job.rows, "error": f"Importação interrompida: {e}"})
+            logger.error(f"Erro na importação {job.id}: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.file_path.unlink(missing_ok=True)
+            try:
+                self.print_queue.save_background_job(self.KIND, job.id, job.to_state())
+            except Exception as e:
+                logger.error(f"Erro ao gravar o estado da importação {job.id}: {e}")
+            with self._lock:
+                del self._jobs[job.id]
+
+    def _enqueue(self, job: ImportJob, chunk: List[Dict]):
+        """Adiciona um bloco à fila e grava o progresso em uma única transação.
+
+        Com limite de etiquetas/s para o cliente, espera o saldo do bloco antes.
+        """
+        if self.rate_limiter:
+            wait = self.rate_limiter.reserve_labels(job.client_id, len(chunk))
+            if wait > 0:
+                job.throttled_seconds += wait
+                time.sleep(wait)
+        state = job.to_state()
+        state["queued"] += len(chunk)
+        self.print_queue.add_many(chunk, job=(self.KIND, job.id, state))
+        job.queued += len(chunk)
+
+    def _read_chunks(self, job: ImportJob, raw) -> Iterator[List[Tuple[int, object]]]:
+        """Agrupa os registros do arquivo em blocos de ``chunk_size`` linhas."""
+        chunk = []
+        for row_number, record in self._read_records(job, raw):
+            job.rows += 1
+            job.bytes_read = raw.tell()
+            chunk.append((row_number, record))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _read_records(self, job: ImportJob, raw) -> Iterator:
+        """Gera (número da linha, registro) a partir do arquivo."""
+        magic = raw.read(2)
+        raw.seek(0)
+        stream = gzip.GzipFile(fileobj=raw) if magic == b'\x1f\x8b' else raw
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+        if job.file_format == "csv":
+            header = text.readline()
+            delimiter = ';' if header.count(';') > header.count(',') else ','
+            columns = next(csv.reader([header], delimiter=delimiter))
+            reader = csv.DictReader(text, fieldnames=columns, delimiter=delimiter)
+            for row_number, row in enumerate(reader, start=2):
+                yield row_number, {k: v for k, v in row.items() if k is not None}
+        else:
+            # A linha é decodificada depois, para que JSON inválido rejeite
+            # só aquela linha e não a importação inteira
+            for row_number, line in enumerate(text, start=1):
+                if line.strip():
+                    yield row_number, line
+
+
+def _prepare_records(settings: Dict, records: List[Tuple[int, object]]
+                     ) -> Tuple[List[Dict], List[Tuple[int, str]]]:
+    """Converte um bloco de registros em itens da fila.
+
+    Função de nível de módulo para poder ser executada pelo ``RenderPool``.
+
+    Args:
+        settings: Parâmetros da importação (``ImportJob.settings``)
+        records: (número da linha, registro) do bloco
+
+    Returns:
+        (itens válidos, [(número da linha, erro)])
+    """
+    global _generator
+    if _generator is None:
+        _generator = ZPLGenerator()
+
+    converted, errors = [], []
+    for row_number, record in records:
+        try:
+            converted.append((row_number, _to_queue_item(settings, record)))
+        except Exception as e:
+            errors.append((row_number, str(e)))
+
+    # Etiquetas de produto de uma coluna (o caso comum) são geradas juntas
+    # pelo render em lote; as demais, uma a uma
+    products = [item['payload']['data'] for _, item in converted
+                if _is_product_label(item['payload'])]
+    labels = iter([
+        zpl for chunk in _generator.render_product_labels(products, max(len(products), 1))
+        for zpl in chunk
+    ])
+
+    items = []
+    for row_number, item in converted:
+        try:
+            if _is_product_label(item['payload']):
+                zpl = next(labels)
+            else:
+                zpl = _generator.render_payload(item['payload'])
+            if not _generator.validate_zpl(zpl):
+                raise ValueError("Comando ZPL inválido gerado")
+        except Exception as e:
+            errors.append((row_number, str(e)))
+            continue
+        # O processador imprime o ZPL gerado aqui, sem gerar de novo
+        item['zpl'] = zpl
+        items.append(item)
+    errors.sort()
+    return items, errors
+
+
+def _is_product_label(payload: Dict) -> bool:
+    """Indica se o payload é uma etiqueta de produto de uma coluna."""
+    return payload['label_type'] == 'produto' and not payload['duas_colunas']
+
+
+def _to_queue_item(settings: Dict, record) -> Dict:
+    """Converte um registro em item da fila (o ZPL é gerado em ``_prepare_records``).
+
+    Registros NDJSON com a chave "data" seguem o formato de /print;
+    os demais (e linhas CSV) são os próprios campos da etiqueta.
+    """
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as e:
+            raise ValueError(f"JSON inválido: {e}")
+    if not isinstance(record, dict):
+        raise ValueError("Registro deve ser um objeto JSON")
+
+    mapping = settings["mapping"]
+    if "data" in record:
+        data = record["data"]
+        payload = {
+            "label_type": record.get("label_type", settings["label_type"]),
+            "data": {mapping.get(k, k): v for k, v in data.items()},
+            "zpl_template": record.get("zpl_template"),
+            "duas_colunas": bool(record.get("duas_colunas", False)),
+            "data_col2": record.get("data_col2")
+        }
+        printer_name = record.get("printer_name") or settings["printer_name"]
+    else:
+        payload = {
+            "label_type": settings["label_type"],
+            "data": {
+                mapping.get(k, k): v
+                for k, v in record.items() if v not in (None, "")
+            },
+            "zpl_template": None,
+            "duas_colunas": False,
+            "data_col2": None
+        }
+        printer_name = settings["printer_name"]
+
+    return {
+        "payload": payload,
+        "printer_name": printer_name,
+        "priority": settings["priority"],
+        "client_id": settings["client_id"]
+    }
@@ -0,0 +1,134 @@
+"""Eleição do processo que despacha a fila quando há vários workers."""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """Eleição por "lease" em uma linha do SQLite.
+
+    Cada worker tenta periodicamente gravar seu ID na linha ``name`` da
+    tabela ``leases``; só consegue se a linha for sua ou se o lease anterior
+    já tiver expirado. O dono renova o lease a cada ``lease_seconds / 3``.
+    Se o processo líder morrer, outro assume em até ``lease_seconds``; num
+    encerramento normal o lease é liberado e a troca é imediata.
+    """
+
+    def __init__(self, db_path: str, name: str = "dispatcher",
+                 lease_seconds: float = 15,
+                 on_elected: Optional[Callable[[], None]] = None,
+                 on_demoted: Optional[Callable[[], None]] = None):
+        """Inicializa a eleição.
+
+        Args:
+            db_path: Banco SQLite compartilhado pelos workers
+            name: Papel disputado
+            lease_seconds: Validade do lease sem renovação
+            on_elected: Chamado quando este processo vira líder
+            on_demoted: Chamado quando este processo deixa de ser líder
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self._init_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=self.lease_seconds / 3)
+
+    def _init_table(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def start(self):
+        """Começa a disputar a liderança em segundo plano."""
+        if self.thread:
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Para de disputar e libera o lease, se for o líder."""
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+        if self.is_leader:
+            self._set_leader(False)
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "DELETE FROM leases WHERE name = ? AND owner = ?",
+                    (self.name, self.owner)
+                )
+                conn.commit()
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Erro ao liberar lease de {self.name}: {e}")
+
+    def try_acquire(self) -> bool:
+        """Adquire ou renova o lease.
+
+        Returns:
+            True se este processo é o líder
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute("""
+                INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE
+                SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """, (self.name, self.owner, now + self.lease_seconds, now))
+            conn.commit()
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def _set_leader(self, leader: bool):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        callback = self.on_elected if leader else self.on_demoted
+        logger.info(
+            f"Processo {self.owner} {'assumiu' if leader else 'deixou'} o papel de {self.name}"
+        )
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Erro ao trocar papel de {self.name}: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._set_leader(self.try_acquire())
+            except sqlite3.Error as e:
+                # Sem conseguir renovar, não há garantia de exclusividade
+                logger.warning(f"Erro na eleição de {self.name}: {e}")
+                self._set_leader(False)
+            self._stop.wait(self.lease_seconds / 3)
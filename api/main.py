@@ -1,15 +1,42 @@
 """API principal para impressão de etiquetas."""
+import asyncio
+import hmac
+import json
 import logging
-from fastapi import FastAPI, HTTPException, Header, Depends
-from fastapi.responses import JSONResponse
-from typing import Optional
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from fastapi import FastAPI, HTTPException, Header, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional
 import uvicorn
 
-from .models import PrintRequest, PrintResponse, StatusResponse, QueueItemResponse
-from .queue import PrintQueue, QueueStatus
+from .models import (
+    PrintRequest, PrintResponse, StatusResponse, QueueItemResponse,
+    BatchPrintRequest, BatchPrintResponse, BatchItemResult
+)
+from .queue import PrintQueue, QueueStatus, DEFAULT_PRIORITY, valid_idempotency_key
 from .printer import PrinterManager
 from .zpl_generator import ZPLGenerator
 from .queue_processor import QueueProcessor
+from .scheduler import DEFAULT_CLIENT
+from .imports import ImportJob, ImportManager
+from .drain import DrainManager
+from .render_pool import RenderPool
+from .events import JobEvents, SharedJobEvents
+from .leader import LeaderElection
+from .status_cache import StatusCache
+from .rate_limit import RateLimiter, retry_after_header
+from .admission import LoadShedder
+from .profiler import (
+    SamplingProfiler, ProfilerBusyError, MAX_PROFILE_SECONDS, to_collapsed, to_speedscope
+)
+from .metrics import (
+    REGISTRY, GaugeCallback, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, ADMISSION_REJECTED,
+    request_stages
+)
 from config.config_loader import get_config
 
 # Configuração de logging
@@ -25,21 +52,184 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializa os componentes quando a API inicia e os encerra no fim."""
+    global dispatcher_loop
+    logger.info("Iniciando API de Impressão de Etiquetas")
+    dispatcher_loop = asyncio.get_running_loop()
+    
+    # Disputa o papel de despachante da fila (processador + cache do spooler)
+    dispatcher_election.start()
+    if isinstance(job_events, SharedJobEvents):
+        job_events.start()
+    
+    logger.info("API iniciada com sucesso")
+    yield
+    
+    logger.info("Encerrando API de Impressão de Etiquetas")
+    # Termina o item em andamento (até queue.shutdown_grace_seconds) antes
+    # de liberar o lease para outro worker
+    await queue_processor.stop()
+    await asyncio.to_thread(dispatcher_election.stop)
+    if isinstance(job_events, SharedJobEvents):
+        job_events.stop()
+    render_pool.close()
+    logger.info("API encerrada")
+
+
 # Inicializa aplicação FastAPI
 app = FastAPI(
     title="API de Impressão de Etiquetas",
     description="API REST para impressão de etiquetas Zebra via ZPL",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Banco da fila, compartilhado por todos os workers
+QUEUE_DB_PATH = "data/print_queue.db"
+
+# Com vários workers os eventos de status passam pelo banco
+WORKERS = config.get_workers()
+
 # Instâncias globais
-print_queue = PrintQueue()
+job_events = SharedJobEvents(QUEUE_DB_PATH) if WORKERS > 1 else JobEvents()
+print_queue = PrintQueue(QUEUE_DB_PATH, events=job_events)
 printer_manager = PrinterManager(
     default_printer=config.get_default_printer(),
     timeout=config.get_printer_timeout()
 )
 zpl_generator = ZPLGenerator()
+profiler = SamplingProfiler()
 queue_processor = QueueProcessor(print_queue, printer_manager)
+render_pool = RenderPool(config.get_render_workers(), config.get_render_min_labels())
+rate_limiter = RateLimiter(config.get_rate_limits())
+import_manager = ImportManager(
+    print_queue, chunk_size=config.get_import_chunk_size(),
+    render_pool=render_pool, rate_limiter=rate_limiter
+)
+drain_manager = DrainManager(print_queue)
+load_shedder = LoadShedder(
+    print_queue, queue_processor.drain_estimator, config.get_shed_drain_seconds()
+)
+
+# Uploads de importação aguardando processamento
+IMPORTS_DIR = Path("data/imports")
+
+# Status finais de uma requisição (encerram o long-poll de /jobs/{id})
+TERMINAL_STATUSES = (QueueStatus.COMPLETED.value, QueueStatus.FAILED.value)
+# Espera máxima do long-poll e intervalo do keep-alive do stream SSE (segundos)
+MAX_JOB_WAIT_SECONDS = 60
+SSE_KEEPALIVE_SECONDS = 15
+
+
+# Profundidade da fila, calculada a cada coleta de /metrics
+REGISTRY.register(GaugeCallback(
+    "etiquetas_queue_items",
+    "Itens na fila por status",
+    ["status"],
+    lambda: {(status,): count for status, count in print_queue.get_stats().items()}
+))
+REGISTRY.register(GaugeCallback(
+    "etiquetas_queue_printer_items",
+    "Itens ativos na fila por impressora e status ('' = padrão)",
+    ["printer", "status"],
+    lambda: {
+        (printer, status): count
+        for printer, counts in print_queue.get_printer_stats().items()
+        for status, count in counts.items()
+    }
+))
+REGISTRY.register(GaugeCallback(
+    "etiquetas_queue_lane_items",
+    "Itens pendentes por faixa de prioridade",
+    ["priority"],
+    lambda: {(str(priority),): count for priority, count in print_queue.get_lane_stats().items()}
+))
+
+REGISTRY.register(GaugeCallback(
+    "etiquetas_queue_batch_size_current",
+    "Tamanho do último lote do processador (0 = não é o despachante)",
+    [],
+    lambda: {(): queue_processor.batch_size if queue_processor.running else 0}
+))
+REGISTRY.register(GaugeCallback(
+    "etiquetas_queue_drain_seconds",
+    "Tempo estimado para esvaziar a fila pendente (controle de admissão)",
+    [],
+    lambda: {(): round(load_shedder.drain_seconds(), 3)}
+))
+
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Conta e mede as requisições HTTP por rota (template, não o caminho)."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    HTTP_REQUESTS.inc(method=request.method, route=path, status=response.status_code)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=path)
+    return response
+
+
+# Rotas com Server-Timing e log de requisições lentas
+TIMED_PATHS = ("/print", "/print/batch")
+
+slow_logger = logging.getLogger("api.slow")
+
+
+async def record_request_timing(request: Request, call_next):
+    """Coleta os tempos por etapa das rotas de impressão.
+    
+    Adiciona o header ``Server-Timing`` (se ``api.server_timing``) e grava
+    no log de lentas as requisições acima de ``logging.slow_request_ms``.
+    Só é registrado como middleware quando um dos dois está habilitado.
+    """
+    if request.url.path not in TIMED_PATHS:
+        return await call_next(request)
+    
+    stages = {}
+    token = request_stages.set(stages)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_stages.reset(token)
+    total = time.perf_counter() - start
+    
+    if config.is_server_timing_enabled():
+        metrics = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages.items()]
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        response.headers["Server-Timing"] = ", ".join(metrics)
+    
+    slow_ms = config.get_slow_request_ms()
+    if slow_ms and total * 1000 >= slow_ms:
+        slow_logger.warning(json.dumps({
+            "path": request.url.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in stages.items()},
+            "payload_bytes": int(request.headers.get("content-length") or 0),
+            "client_id": request.headers.get("x-client-id"),
+        }, ensure_ascii=False))
+    
+    return response
+
+
+if config.is_server_timing_enabled() or config.get_slow_request_ms():
+    if config.get_slow_request_ms():
+        slow_handler = logging.FileHandler(config.get_slow_log_file(), encoding='utf-8')
+        slow_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        slow_logger.addHandler(slow_handler)
+        slow_logger.propagate = False
+    app.middleware("http")(record_request_timing)
+
+
+def _same_key(received: str, expected: str) -> bool:
+    """Compara chaves em tempo constante (não revela o prefixo correto)."""
+    return hmac.compare_digest(received.encode('utf-8'), expected.encode('utf-8'))
 
 
 def verify_api_key(x_api_key: Optional[str] = Header(None)) -> bool:
@@ -63,7 +253,7 @@ def verify_api_key(x_api_key: Optional[str] = Header(None)) -> bool:
             detail="API key requerida. Forneça no header X-API-Key"
         )
     
-    if x_api_key != config.get_api_key():
+    if not _same_key(x_api_key, config.get_api_key()):
         raise HTTPException(
             status_code=403,
             detail="API key inválida"
@@ -72,43 +262,234 @@ def verify_api_key(x_api_key: Optional[str] = Header(None)) -> bool:
     return True
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Inicializa componentes quando a API inicia."""
-    logger.info("Iniciando API de Impressão de Etiquetas")
+def verify_admin_key(x_admin_key: Optional[str] = Header(None)) -> bool:
+    """Verifica a chave dos endpoints administrativos (/admin/*).
     
-    # Inicia processador de fila
-    queue_processor.start()
+    Os endpoints ficam desabilitados (404) enquanto ``api.admin_key`` não
+    for configurada, mesmo com a autenticação comum desligada.
     
-    logger.info("API iniciada com sucesso")
+    Raises:
+        HTTPException se os endpoints estiverem desabilitados ou a chave for inválida
+    """
+    admin_key = config.get_admin_key()
+    if not admin_key:
+        raise HTTPException(status_code=404, detail="Not Found")
+    
+    if not x_admin_key or not _same_key(x_admin_key, admin_key):
+        raise HTTPException(
+            status_code=403,
+            detail="Chave administrativa inválida. Forneça no header X-Admin-Key"
+        )
+    
+    return True
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Limpa recursos quando a API encerra."""
-    logger.info("Encerrando API de Impressão de Etiquetas")
-    queue_processor.stop()
-    logger.info("API encerrada")
+def _client_label(client_id: Optional[str]) -> str:
+    """Rótulo do cliente nas métricas.
+    
+    O header X-Client-Id é livre: só os clientes configurados (em
+    ``api.rate_limits`` ou ``queue.client_weights``) têm rótulo próprio, para
+    que o número de séries do /metrics não cresça com IDs inventados.
+    """
+    if not client_id:
+        return DEFAULT_CLIENT
+    if client_id in rate_limiter.limits or client_id in queue_processor.scheduler.weights:
+        return client_id
+    return "other"
+
+
+def admit(client_id: Optional[str], priority: int, labels: int = 1):
+    """Controle de admissão antes de aceitar trabalho novo.
+    
+    Primeiro a sobrecarga global (fila que não esvazia dentro do limite da
+    prioridade), depois o limite de taxa do cliente.
+    
+    Args:
+        client_id: Cliente (header X-Client-Id)
+        priority: Prioridade mais urgente da requisição
+        labels: Etiquetas na requisição
+        
+    Raises:
+        HTTPException 503 (sobrecarga) ou 429 (limite de taxa) com Retry-After
+    """
+    client = client_id or DEFAULT_CLIENT
+    
+    wait = load_shedder.check(priority)
+    if wait > 0:
+        ADMISSION_REJECTED.inc(reason="overload", client=_client_label(client_id))
+        logger.warning(f"Fila sobrecarregada, recusando prioridade {priority} de {client}")
+        raise HTTPException(
+            status_code=503,
+            detail="Fila sobrecarregada, tente novamente mais tarde",
+            headers={"Retry-After": retry_after_header(wait)}
+        )
+    
+    wait = rate_limiter.acquire(client_id, labels)
+    if wait > 0:
+        ADMISSION_REJECTED.inc(reason="rate_limit", client=_client_label(client_id))
+        logger.warning(f"Limite de taxa excedido por {client} ({labels} etiquetas)")
+        raise HTTPException(
+            status_code=429,
+            detail="Limite de requisições excedido, tente novamente mais tarde",
+            headers={"Retry-After": retry_after_header(wait)}
+        )
+
+
+# Event loop onde o processador da fila roda (definido ao iniciar a API)
+dispatcher_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _start_dispatcher():
+    """Este processo foi eleito: processa a fila e consulta o spooler.
+    
+    Chamado pela thread da eleição; o processador é iniciado no event loop.
+    """
+    dispatcher_loop.call_soon_threadsafe(queue_processor.start)
+    status_cache.start()
+
+
+def _stop_dispatcher():
+    """Este processo deixou de ser o despachante."""
+    asyncio.run_coroutine_threadsafe(queue_processor.stop(), dispatcher_loop)
+    status_cache.stop()
+
+
+# Só um processo (entre todos os workers) despacha a fila
+dispatcher_election = LeaderElection(
+    QUEUE_DB_PATH, "dispatcher",
+    lease_seconds=config.get_dispatcher_lease_seconds(),
+    on_elected=_start_dispatcher,
+    on_demoted=_stop_dispatcher
+)
+
+
+def _check_idempotency_key(idempotency_key: Optional[str]):
+    """Recusa Idempotency-Key com caracteres de controle.
+    
+    Raises:
+        HTTPException 400 se a chave for inválida
+    """
+    if idempotency_key is not None and not valid_idempotency_key(idempotency_key):
+        raise HTTPException(
+            status_code=400,
+            detail="Idempotency-Key inválida (vazia ou com caracteres de controle)"
+        )
+
+
+def _replay_response(item: dict, response: Response) -> PrintResponse:
+    """Resposta para uma Idempotency-Key repetida: devolve o resultado original."""
+    response.headers["Idempotency-Replayed"] = "true"
+    if item['status'] == QueueStatus.COMPLETED.value:
+        message = "Requisição já processada (Idempotency-Key repetida)"
+    else:
+        message = f"Requisição já recebida, status: {item['status']} (Idempotency-Key repetida)"
+    return PrintResponse(
+        success=item['status'] != QueueStatus.FAILED.value,
+        queue_id=item['id'],
+        message=message
+    )
+
+
+def _replay_batch_response(items: List[dict], response: Response) -> BatchPrintResponse:
+    """Resposta para um lote com Idempotency-Key repetida: devolve os itens registrados."""
+    response.headers["Idempotency-Replayed"] = "true"
+    printed = sum(1 for item in items if item['status'] == QueueStatus.COMPLETED.value)
+    return BatchPrintResponse(
+        success=True,
+        printed=printed,
+        queued=len(items) - printed,
+        items=[
+            BatchItemResult(
+                index=i,
+                status="printed" if item['status'] == QueueStatus.COMPLETED.value else "queued",
+                queue_id=item['id']
+            )
+            for i, item in enumerate(items)
+        ],
+        message="Lote já recebido (Idempotency-Key repetida)"
+    )
+
+
+def _accept_only(request: PrintRequest, payload: dict, response: Response,
+                 client_id: Optional[str], idempotency_key: Optional[str],
+                 idempotency_ttl: int) -> PrintResponse:
+    """Modo "accept-only": valida, gera o ZPL e enfileira, sem imprimir.
+    
+    Não consulta o spooler: a impressora é resolvida pelo processador na hora
+    de imprimir. A latência da API fica limitada à geração do ZPL e a um
+    commit no SQLite; o ZPL gerado vai junto para a fila e o processador o
+    imprime sem gerar de novo.
+    
+    Raises:
+        HTTPException 422 se o ZPL gerado for inválido
+    """
+    zpl = zpl_generator.render_payload(payload)
+    if not zpl_generator.validate_zpl(zpl):
+        raise HTTPException(status_code=422, detail="Comando ZPL inválido gerado")
+    
+    if idempotency_key:
+        item, created = print_queue.add_idempotent(
+            idempotency_key, idempotency_ttl,
+            payload, request.printer_name, request.priority, client_id, zpl=zpl
+        )
+        if not created:
+            return _replay_response(item, response)
+        queue_id = item['id']
+    else:
+        queue_id = print_queue.add(
+            payload, request.printer_name, request.priority, client_id, zpl=zpl
+        )
+    
+    queue_processor.wake()
+    response.status_code = 202
+    return PrintResponse(
+        success=True,
+        queue_id=queue_id,
+        message="Requisição aceita e adicionada à fila"
+    )
 
 
 @app.post("/print", response_model=PrintResponse)
-async def print_label(
+def print_label(
     request: PrintRequest,
+    response: Response,
+    x_client_id: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
     _: bool = Depends(verify_api_key)
 ):
     """Endpoint para imprimir uma etiqueta.
     
+    Com ``api.accept_only`` habilitado, a requisição é apenas validada e
+    enfileirada (resposta 202) e toda impressão fica com o processador.
+    
+    Com o header ``Idempotency-Key``, retentativas do cliente com a mesma
+    chave (dentro de ``api.idempotency_ttl_seconds``) devolvem o resultado
+    original sem gerar nem imprimir a etiqueta de novo.
+    
+    Rota síncrona (spooler e SQLite bloqueiam): o FastAPI a executa no pool
+    de threads, fora do event loop do processador da fila e dos streams.
+    
     Args:
         request: Dados da requisição de impressão
+        x_client_id: Identificação do cliente (escalonamento justo da fila)
+        idempotency_key: Chave de idempotência (opcional)
         
     Returns:
         Resposta com status da operação
     """
+    # Retentativa de uma chave já usada devolve o resultado original, mesmo
+    # com a fila sobrecarregada ou o cliente acima do limite de taxa
+    _check_idempotency_key(idempotency_key)
+    idempotency_ttl = config.get_idempotency_ttl_seconds()
+    if idempotency_key:
+        original = print_queue.get_by_idempotency_key(idempotency_key, idempotency_ttl)
+        if original:
+            logger.info(f"Idempotency-Key repetida, devolvendo {original['id']}")
+            return _replay_response(original, response)
+    
+    admit(x_client_id, request.priority)
+    
     try:
-        # Verifica se impressora está disponível
-        printer_name = printer_manager.get_printer_name(request.printer_name)
-        printer_available = printer_manager.is_printer_available(printer_name)
-        
         # Prepara payload
         payload = {
             "label_type": request.label_type,
@@ -118,23 +499,32 @@ async def print_label(
             "data_col2": request.data_col2
         }
         
+        if config.is_accept_only():
+            return _accept_only(request, payload, response, x_client_id,
+                                idempotency_key, idempotency_ttl)
+        
+        # Verifica se impressora está disponível
+        printer_name = printer_manager.get_printer_name(request.printer_name)
+        printer_available = printer_manager.is_printer_available(printer_name)
+        
+        # Com Idempotency-Key a requisição é registrada antes de imprimir
+        # (como "processing" se for imprimir agora), reservando a chave
+        queue_id = None
+        if idempotency_key:
+            item, created = print_queue.add_idempotent(
+                idempotency_key, idempotency_ttl,
+                payload, printer_name, request.priority, x_client_id,
+                status=QueueStatus.PROCESSING if printer_available else QueueStatus.PENDING
+            )
+            if not created:
+                return _replay_response(item, response)
+            queue_id = item['id']
+        
         # Tenta imprimir imediatamente se impressora disponível
         if printer_available:
             try:
                 # Gera ZPL
-                if request.label_type == "produto":
-                    if request.duas_colunas:
-                        zpl = zpl_generator.generate_dual_column_label(
-                            request.data,
-                            request.data_col2 if request.data_col2 else request.data
-                        )
-                    else:
-                        zpl = zpl_generator.generate_product_label(request.data)
-                else:
-                    zpl = zpl_generator.generate_custom_label(
-                        request.data, 
-                        request.zpl_template
-                    )
+                zpl = zpl_generator.render_payload(payload)
                 
                 # Valida ZPL
                 if not zpl_generator.validate_zpl(zpl):
@@ -145,8 +535,11 @@ async def print_label(
                 
                 if success:
                     logger.info(f"Impressão realizada com sucesso: {request.label_type}")
+                    if queue_id:
+                        print_queue.mark_completed(queue_id)
                     return PrintResponse(
                         success=True,
+                        queue_id=queue_id,
                         message="Impressão realizada com sucesso"
                     )
                 else:
@@ -157,7 +550,13 @@ async def print_label(
                 logger.warning(f"Erro na impressão imediata: {e}, adicionando à fila")
         
         # Adiciona à fila (se impressora não disponível ou se falhou)
-        queue_id = print_queue.add(payload, printer_name)
+        if queue_id:
+            if printer_available:
+                print_queue.update_status(queue_id, QueueStatus.PENDING)
+        else:
+            queue_id = print_queue.add(
+                payload, printer_name, request.priority, x_client_id
+            )
         logger.info(f"Requisição adicionada à fila: {queue_id}")
         
         return PrintResponse(
@@ -166,6 +565,8 @@ async def print_label(
             message="Requisição adicionada à fila para processamento"
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao processar requisição de impressão: {e}")
         raise HTTPException(
@@ -174,24 +575,327 @@ async def print_label(
         )
 
 
+@app.post("/print/batch", response_model=BatchPrintResponse)
+def print_batch(
+    batch: BatchPrintRequest,
+    response: Response,
+    x_client_id: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    _: bool = Depends(verify_api_key)
+):
+    """Endpoint para imprimir várias etiquetas em uma chamada.
+    
+    As impressoras são enumeradas uma única vez, as etiquetas de cada
+    impressora são enviadas juntas em um único job do spooler e tudo o que
+    não for impresso na hora entra na fila em uma única transação. Com
+    ``api.accept_only`` habilitado, tudo vai para a fila (resposta 202).
+    
+    Com o header ``Idempotency-Key``, o lote inteiro é registrado na fila
+    antes de imprimir e retentativas com a mesma chave devolvem os itens
+    registrados sem imprimir de novo.
+    
+    Rota síncrona, executada no pool de threads (como ``/print``).
+    
+    Args:
+        batch: Lista de requisições de impressão
+        x_client_id: Identificação do cliente (escalonamento justo da fila)
+        idempotency_key: Chave de idempotência (opcional)
+        
+    Returns:
+        Resultado por item (na ordem recebida)
+    """
+    max_batch_size = config.get_max_batch_size()
+    if len(batch.items) > max_batch_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lote com {len(batch.items)} itens excede o máximo de {max_batch_size}"
+        )
+    
+    _check_idempotency_key(idempotency_key)
+    idempotency_ttl = config.get_idempotency_ttl_seconds()
+    if idempotency_key:
+        original = print_queue.get_batch_by_idempotency_key(idempotency_key, idempotency_ttl)
+        if original:
+            logger.info(f"Idempotency-Key repetida, devolvendo lote de {len(original)} itens")
+            return _replay_batch_response(original, response)
+    
+    admit(x_client_id, min(item.priority for item in batch.items), len(batch.items))
+    
+    try:
+        accept_only = config.is_accept_only()
+        printers = [] if accept_only else printer_manager.list_printers()
+        resolved = {}
+        payloads = []
+        for request in batch.items:
+            if request.printer_name not in resolved:
+                # No modo accept-only a impressora é resolvida pelo processador
+                resolved[request.printer_name] = request.printer_name if accept_only else (
+                    printer_manager.get_printer_name(request.printer_name, printers)
+                )
+            payloads.append({
+                "label_type": request.label_type,
+                "data": request.data,
+                "zpl_template": request.zpl_template,
+                "duas_colunas": request.duas_colunas,
+                "data_col2": request.data_col2
+            })
+        
+        # Gera o ZPL de tudo que pode ser impresso agora (agrupado por
+        # impressora) e, no modo accept-only, de tudo que vai para a fila
+        jobs = {}
+        rendered = {}
+        for index, (request, payload) in enumerate(zip(batch.items, payloads)):
+            printer_name = resolved[request.printer_name]
+            if not (accept_only or printer_name):
+                continue
+            try:
+                zpl = zpl_generator.render_payload(payload)
+                if not zpl_generator.validate_zpl(zpl):
+                    raise ValueError("Comando ZPL inválido gerado")
+            except Exception as e:
+                logger.warning(f"Erro ao gerar item {index} do lote: {e}, adicionando à fila")
+                continue
+            rendered[index] = zpl
+            if not accept_only:
+                jobs.setdefault(printer_name, []).append((index, zpl))
+        
+        def queue_item(i: int) -> dict:
+            # O ZPL já gerado vai junto: o processador não gera de novo
+            return {
+                "payload": payloads[i],
+                "printer_name": resolved[batch.items[i].printer_name],
+                "priority": batch.items[i].priority,
+                "client_id": x_client_id,
+                "zpl": rendered.get(i)
+            }
+        
+        # Com Idempotency-Key o lote é registrado antes de imprimir (como
+        # "processing" o que vai ser impresso agora), reservando a chave
+        registered = {}
+        if idempotency_key:
+            sending = {index for labels in jobs.values() for index, _ in labels}
+            items, created = print_queue.add_batch_idempotent(
+                idempotency_key, idempotency_ttl,
+                [
+                    {**queue_item(i), "status": (
+                        QueueStatus.PROCESSING if i in sending else QueueStatus.PENDING
+                    )}
+                    for i in range(len(batch.items))
+                ]
+            )
+            if not created:
+                return _replay_batch_response(items, response)
+            registered = {i: item['id'] for i, item in enumerate(items)}
+        
+        # Um job por impressora com todas as etiquetas concatenadas
+        printed = set()
+        for printer_name, labels in jobs.items():
+            indexes = [index for index, _ in labels]
+            zpl = "\n".join(zpl for _, zpl in labels)
+            success = printer_manager.print_zpl(zpl, printer_name)
+            if success:
+                printed.update(indexes)
+            else:
+                logger.warning(
+                    f"Falha ao imprimir {len(labels)} etiquetas em {printer_name}, adicionando à fila"
+                )
+            if registered:
+                print_queue.update_status_many(
+                    [registered[i] for i in indexes],
+                    QueueStatus.COMPLETED if success else QueueStatus.PENDING
+                )
+        
+        to_queue = [i for i in range(len(batch.items)) if i not in printed]
+        if registered:
+            queued = {i: registered[i] for i in to_queue}
+        else:
+            queue_ids = print_queue.add_many([queue_item(i) for i in to_queue]) if to_queue else []
+            queued = dict(zip(to_queue, queue_ids))
+        if queued:
+            queue_processor.wake()
+        if accept_only:
+            response.status_code = 202
+        
+        logger.info(f"Lote processado: {len(printed)} impressas, {len(queued)} na fila")
+        
+        return BatchPrintResponse(
+            success=True,
+            printed=len(printed),
+            queued=len(queued),
+            items=[
+                BatchItemResult(
+                    index=i,
+                    status="queued" if i in queued else "printed",
+                    queue_id=registered.get(i, queued.get(i))
+                )
+                for i in range(len(batch.items))
+            ],
+            message=f"{len(printed)} etiquetas impressas, {len(queued)} adicionadas à fila"
+        )
+    
+    except Exception as e:
+        logger.error(f"Erro ao processar lote de impressão: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao processar lote: {str(e)}"
+        )
+
+
+def _create_import_file(file_format: str):
+    """Cria o arquivo temporário que recebe o upload de uma importação."""
+    IMPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=IMPORTS_DIR, suffix=f".{file_format}", delete=False)
+
+
+@app.post("/print/import", status_code=202)
+async def import_labels(
+    request: Request,
+    format: Optional[str] = None,
+    mapping: Optional[str] = None,
+    label_type: str = "produto",
+    printer: Optional[str] = None,
+    priority: int = Query(DEFAULT_PRIORITY, ge=0, le=9),
+    x_client_id: Optional[str] = Header(None),
+    _: bool = Depends(verify_api_key)
+):
+    """Importa um arquivo NDJSON ou CSV (opcionalmente gzip) para a fila.
+    
+    O corpo é gravado em disco à medida que chega e processado em segundo
+    plano, em blocos: a resposta volta assim que o upload termina, com o ID
+    da importação para acompanhar o progresso em ``GET /print/import/{id}``.
+    
+    A chamada conta como uma requisição no limite de taxa do cliente; as
+    linhas são cobradas do limite de etiquetas/s à medida que entram na fila.
+    
+    Args:
+        request: Requisição com o arquivo no corpo
+        format: "ndjson" ou "csv" (padrão: pelo Content-Type)
+        mapping: JSON {"coluna_origem": "campo_etiqueta"} para renomear colunas
+        label_type: Tipo de etiqueta das linhas
+        printer: Impressora das linhas sem printer_name próprio
+        priority: Prioridade na fila das etiquetas importadas
+        x_client_id: Identificação do cliente (escalonamento justo da fila)
+        
+    Returns:
+        Estado inicial da importação
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    format = format.lower()
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format}. Use: ndjson, csv")
+    await asyncio.to_thread(admit, x_client_id, priority, labels=0)
+    
+    try:
+        column_mapping = json.loads(mapping) if mapping else {}
+        if not isinstance(column_mapping, dict):
+            raise ValueError("mapping deve ser um objeto JSON")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"mapping inválido: {e}")
+    
+    try:
+        # O disco é acessado em threads: o event loop segue atendendo
+        # as outras requisições durante o upload
+        f = await asyncio.to_thread(_create_import_file, format)
+        try:
+            async for chunk in request.stream():
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+        
+        job = await asyncio.to_thread(lambda: import_manager.start(ImportJob(
+            Path(f.name), format,
+            mapping=column_mapping,
+            label_type=label_type,
+            printer_name=printer,
+            priority=priority,
+            client_id=x_client_id
+        )))
+        logger.info(f"Importação {job.id} iniciada ({job.bytes_total} bytes, {format})")
+        return job.to_dict()
+    except Exception as e:
+        logger.error(f"Erro ao receber importação: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao receber importação: {str(e)}"
+        )
+
+
+@app.get("/print/import/{job_id}")
+async def get_import(job_id: str, _: bool = Depends(verify_api_key)):
+    """Progresso de uma importação.
+    
+    Returns:
+        Status, progresso (0-1), linhas lidas, enfileiradas e rejeitadas
+    """
+    job = await asyncio.to_thread(import_manager.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Importação não encontrada: {job_id}")
+    return job.to_dict()
+
+
+def _build_status() -> dict:
+    """Monta a resposta de /status (uma única enumeração de impressoras)."""
+    printers = printer_manager.list_printers()
+    printer_name = printer_manager.get_printer_name(None, printers)
+    return StatusResponse(
+        status="online",
+        printer_available=bool(printer_name) and printer_name in printers,
+        printer_name=printer_name,
+        queue_stats=print_queue.get_stats(),
+        queue_lanes=print_queue.get_lane_stats()
+    ).model_dump()
+
+
+def _build_printers() -> dict:
+    """Monta a resposta de /printers."""
+    printers = printer_manager.list_printers()
+    return {
+        "printers": printers,
+        "default": printer_manager.get_default_printer(),
+        "count": len(printers)
+    }
+
+
+status_cache = StatusCache(
+    {"status": _build_status, "printers": _build_printers},
+    ttl=config.get_status_cache_seconds(),
+    shared_dir=Path("data/status_cache") if WORKERS > 1 else None
+)
+
+
+def _cached_response(name: str, request: Request) -> Response:
+    """Responde com o valor em cache, ou 304 se o ETag do cliente ainda vale."""
+    body, etag = status_cache.get(name)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+@app.get("/health")
+async def health():
+    """Liveness probe: não consulta impressoras nem o banco."""
+    return {
+        "status": "ok",
+        "dispatcher": dispatcher_election.is_leader,
+        "queue_processor": queue_processor.running
+    }
+
+
 @app.get("/status", response_model=StatusResponse)
-async def get_status(_: bool = Depends(verify_api_key)):
+def get_status(request: Request, _: bool = Depends(verify_api_key)):
     """Endpoint para verificar status do serviço.
     
+    Servido do cache (``api.status_cache_seconds``), com ``ETag``: envie
+    ``If-None-Match`` para receber 304 quando nada mudou.
+    
     Returns:
         Status do serviço e impressora
     """
     try:
-        printer_name = printer_manager.get_printer_name()
-        printer_available = printer_manager.is_printer_available()
-        queue_stats = print_queue.get_stats()
-        
-        return StatusResponse(
-            status="online",
-            printer_available=printer_available,
-            printer_name=printer_name,
-            queue_stats=queue_stats
-        )
+        return _cached_response("status", request)
     except Exception as e:
         logger.error(f"Erro ao obter status: {e}")
         raise HTTPException(
@@ -200,45 +904,82 @@ async def get_status(_: bool = Depends(verify_api_key)):
         )
 
 
+def _parse_queue_status(status: Optional[str]) -> Optional[QueueStatus]:
+    """Converte o filtro de status da query string.
+    
+    Raises:
+        HTTPException 400 se o status for inválido
+    """
+    if not status:
+        return None
+    try:
+        return QueueStatus(status.lower())
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Status inválido: {status}. Use: pending, processing, completed, failed"
+        )
+
+
+def _queue_item_response(item: dict) -> QueueItemResponse:
+    """Converte um item da fila no modelo de resposta."""
+    return QueueItemResponse(
+        id=item['id'],
+        created_at=item['created_at'],
+        updated_at=item.get('updated_at'),
+        status=item['status'],
+        attempts=item['attempts'],
+        error_message=item.get('error_message'),
+        printer_name=item.get('printer_name'),
+        priority=item.get('priority'),
+        payload=item.get('payload')
+    )
+
+
 @app.get("/queue", response_model=list[QueueItemResponse])
-async def get_queue(
+def get_queue(
+    response: Response,
     status: Optional[str] = None,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    include_payload: bool = False,
+    after: Optional[str] = None,
+    printer: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
     _: bool = Depends(verify_api_key)
 ):
     """Endpoint para visualizar a fila de impressão.
     
+    Paginação por cursor: quando a página vem cheia, o header
+    ``X-Next-Cursor`` traz o valor a passar em ``after`` na próxima chamada.
+    
     Args:
         status: Filtrar por status (pending, processing, completed, failed)
-        limit: Número máximo de itens a retornar
+        limit: Número máximo de itens a retornar (máx. 1000)
+        include_payload: Incluir o payload de cada item (mais lento)
+        after: Cursor (ID do último item da página anterior)
+        printer: Filtrar por impressora
+        created_from: Criados a partir de (ISO 8601, sem fuso = UTC)
+        created_to: Criados antes de (ISO 8601, sem fuso = UTC)
         
     Returns:
         Lista de itens na fila
     """
     try:
-        queue_status = None
-        if status:
-            try:
-                queue_status = QueueStatus(status.lower())
-            except ValueError:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Status inválido: {status}. Use: pending, processing, completed, failed"
-                )
+        queue_status = _parse_queue_status(status)
         
-        items = print_queue.get_all(queue_status, limit)
+        items = print_queue.get_all(
+            queue_status, limit, include_payload,
+            after=after,
+            printer_name=printer,
+            created_from=created_from,
+            created_to=created_to
+        )
         
-        return [
-            QueueItemResponse(
-                id=item['id'],
-                created_at=item['created_at'],
-                status=item['status'],
-                attempts=item['attempts'],
-                error_message=item.get('error_message'),
-                printer_name=item.get('printer_name')
-            )
-            for item in items
-        ]
+        if len(items) == limit:
+            response.headers["X-Next-Cursor"] = items[-1]['id']
+        
+        return [_queue_item_response(item) for item in items]
     except HTTPException:
         raise
     except Exception as e:
@@ -249,16 +990,151 @@ async def get_queue(
         )
 
 
-@app.post("/queue/process")
+@app.get("/queue/export")
+async def export_queue(
+    status: Optional[str] = None,
+    include_payload: bool = False,
+    after: Optional[str] = None,
+    printer: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    _: bool = Depends(verify_api_key)
+):
+    """Exporta a fila inteira como NDJSON (um item JSON por linha).
+    
+    A resposta é transmitida em streaming a partir de páginas curtas da
+    fila, então o uso de memória não depende do tamanho do histórico.
+    Aceita os mesmos filtros de ``GET /queue``.
+    
+    Returns:
+        StreamingResponse ``application/x-ndjson``
+    """
+    queue_status = _parse_queue_status(status)
+    items = print_queue.iter_all(
+        status=queue_status,
+        include_payload=include_payload,
+        after=after,
+        printer_name=printer,
+        created_from=created_from,
+        created_to=created_to
+    )
+    lines = (json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.get("/jobs/events")
+async def stream_job_events(
+    request: Request,
+    id: Optional[List[str]] = Query(None),
+    _: bool = Depends(verify_api_key)
+):
+    """Stream (Server-Sent Events) das mudanças de status das requisições.
+    
+    Cada evento tem o nome do novo status e, em ``data``, um JSON com
+    ``id``, ``status``, ``error_message`` e ``at``. Um comentário de
+    keep-alive é enviado a cada ``SSE_KEEPALIVE_SECONDS`` sem eventos.
+    
+    Args:
+        id: Acompanhar apenas estes IDs (pode ser repetido; padrão: todos)
+    """
+    ids = set(id) if id else None
+    events = job_events.subscribe()
+    
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if ids and event['id'] not in ids:
+                    continue
+                yield (
+                    f"event: {event['status']}\n"
+                    f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+                )
+        finally:
+            job_events.unsubscribe(events)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=QueueItemResponse)
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=MAX_JOB_WAIT_SECONDS),
+    include_payload: bool = False,
+    _: bool = Depends(verify_api_key)
+):
+    """Endpoint para consultar uma requisição (job) pelo ID.
+    
+    Com ``wait``, a resposta é adiada (long-poll) até a requisição chegar a
+    um status final (completed ou failed) ou o tempo acabar; em seguida é
+    devolvido o estado atual.
+    
+    Args:
+        job_id: ID retornado por /print, /print/batch ou /print/import
+        wait: Segundos a aguardar por um status final (máx. 60)
+        include_payload: Incluir o payload na resposta
+        
+    Returns:
+        Estado atual da requisição
+    """
+    # Assina antes de ler o banco para não perder uma transição no meio
+    events = job_events.subscribe() if wait else None
+    try:
+        item = await asyncio.to_thread(print_queue.get_by_id, job_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Requisição não encontrada")
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while events and item['status'] not in TERMINAL_STATUSES:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(events.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if event['id'] == job_id:
+                item = await asyncio.to_thread(print_queue.get_by_id, job_id)
+    finally:
+        if events:
+            job_events.unsubscribe(events)
+    
+    if not include_payload:
+        item.pop('payload', None)
+    return _queue_item_response(item)
+
+
+@app.post("/queue/process", status_code=202)
 async def process_queue(_: bool = Depends(verify_api_key)):
-    """Força processamento imediato da fila.
+    """Dispara o esvaziamento da fila, sem aguardar as impressões.
+    
+    O processador da fila passa a processar os lotes em seguida, sem esperar
+    ``queue.check_interval``, até a fila esvaziar (com vários workers, o
+    pedido chega ao despachante pelo banco). Acompanhe o progresso em
+    ``GET /queue/process/{job_id}``.
     
     Returns:
-        Número de requisições processadas
+        Esvaziamento disparado: id, status, total, processados, falhas e
+        restantes (``dispatcher`` indica se este processo é o despachante)
     """
     try:
-        count = queue_processor.process_now()
-        return {"success": True, "processed": count, "message": f"{count} requisições processadas"}
+        job = await asyncio.to_thread(drain_manager.start)
+        await asyncio.to_thread(queue_processor.drain)
+        result = await asyncio.to_thread(drain_manager.progress, job)
+        result["dispatcher"] = queue_processor.running
+        return result
     except Exception as e:
         logger.error(f"Erro ao processar fila: {e}")
         raise HTTPException(
@@ -267,22 +1143,64 @@ async def process_queue(_: bool = Depends(verify_api_key)):
         )
 
 
+@app.get("/queue/process/{job_id}")
+async def get_process_job(job_id: str, _: bool = Depends(verify_api_key)):
+    """Progresso de um esvaziamento disparado por POST /queue/process.
+    
+    Returns:
+        Status, total, processados, falhas e restantes
+    """
+    job = await asyncio.to_thread(drain_manager.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Esvaziamento não encontrado: {job_id}")
+    return await asyncio.to_thread(drain_manager.progress, job)
+
+
+@app.get("/queue/clients")
+def get_queue_clients(_: bool = Depends(verify_api_key)):
+    """Estatísticas da fila por cliente (header X-Client-Id).
+    
+    Returns:
+        Pendentes, concluídos, falhas, latência e vazão de cada cliente
+    """
+    try:
+        # Clientes não configurados aparecem somados em "default", como no
+        # escalonamento da fila
+        pending = {}
+        for client_id, count in print_queue.get_client_stats().items():
+            client_key = queue_processor.scheduler.client_key(client_id)
+            pending[client_key] = pending.get(client_key, 0) + count
+        processed = queue_processor.client_stats.snapshot()
+        weights = queue_processor.scheduler.weights
+        
+        clients = {
+            client_id: {
+                "weight": weights.get(client_id, 1),
+                "pending": pending.get(client_id, 0),
+                **processed.get(client_id, {}),
+            }
+            for client_id in set(pending) | set(processed)
+        }
+        return {"clients": clients}
+    except Exception as e:
+        logger.error(f"Erro ao obter estatísticas por cliente: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao obter estatísticas por cliente: {str(e)}"
+        )
+
+
 @app.get("/printers")
-async def list_printers(_: bool = Depends(verify_api_key)):
+def list_printers(request: Request, _: bool = Depends(verify_api_key)):
     """Lista todas as impressoras disponíveis.
     
+    Servido do cache (``api.status_cache_seconds``), com ``ETag``.
+    
     Returns:
         Lista de impressoras
     """
     try:
-        printers = printer_manager.list_printers()
-        default = printer_manager.get_default_printer()
-        
-        return {
-            "printers": printers,
-            "default": default,
-            "count": len(printers)
-        }
+        return _cached_response("printers", request)
     except Exception as e:
         logger.error(f"Erro ao listar impressoras: {e}")
         raise HTTPException(
@@ -291,6 +1209,86 @@ async def list_printers(_: bool = Depends(verify_api_key)):
         )
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(_: bool = Depends(verify_api_key)):
+    """Endpoint de métricas no formato de texto do Prometheus.
+    
+    Inclui histogramas por etapa (render, resolve_printer, spool,
+    sqlite_commit), espera na fila, requisições HTTP por rota, jobs por
+    impressora e profundidade da fila por status, impressora e prioridade.
+    """
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/admin/profile")
+async def profile_cpu(
+    seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    include_idle: bool = False,
+    _: bool = Depends(verify_admin_key)
+):
+    """Perfil de CPU por amostragem do serviço em execução.
+    
+    As pilhas de todas as threads (API, processador da fila, importações)
+    são amostradas durante ``seconds`` segundos sem instrumentar o código.
+    Threads paradas em espera (locks, select, pool ocioso) ficam de fora.
+    
+    Args:
+        seconds: Duração da coleta (máx. 60)
+        interval_ms: Intervalo entre amostras
+        format: "collapsed" (texto, para flamegraph) ou "speedscope" (JSON)
+        include_idle: Incluir as esperas (perfil de tempo de parede)
+        
+    Returns:
+        Perfil no formato pedido
+    """
+    interval = interval_ms / 1000
+    try:
+        stacks, samples = await asyncio.to_thread(profiler.sample, seconds, interval, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    logger.info(f"Perfil de CPU coletado: {samples} amostras em {seconds}s")
+    if format == "speedscope":
+        name = f"orais-etiquetas {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        return JSONResponse(
+            to_speedscope(stacks, interval, name),
+            headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'}
+        )
+    return PlainTextResponse(to_collapsed(stacks))
+
+
+@app.get("/admin/memory")
+async def profile_memory(
+    seconds: float = Query(0, ge=0, le=MAX_PROFILE_SECONDS),
+    limit: int = Query(20, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    _: bool = Depends(verify_admin_key)
+):
+    """Maiores alocações de memória (tracemalloc).
+    
+    Com ``seconds`` > 0 também mostra o que cresceu durante a janela. Se o
+    tracemalloc não estiver ativo ele é ligado apenas durante a coleta, então
+    nesse caso use ``seconds`` > 0.
+    
+    Args:
+        seconds: Janela de coleta
+        limit: Número de linhas a retornar
+        group_by: Agrupar por linha, arquivo ou traceback
+        
+    Returns:
+        Memória rastreada e maiores alocações
+    """
+    try:
+        return await asyncio.to_thread(profiler.memory_top, seconds, limit, group_by)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @app.get("/")
 async def root():
     """Endpoint raiz com informações da API."""
@@ -300,20 +1298,36 @@ async def root():
         "status": "online",
         "endpoints": {
             "print": "POST /print - Imprimir etiqueta",
+            "print_batch": "POST /print/batch - Imprimir lote de etiquetas",
+            "print_import": "POST /print/import - Importar NDJSON/CSV para a fila",
+            "health": "GET /health - Liveness probe",
             "status": "GET /status - Status do serviço",
+            "job": "GET /jobs/{id} - Status de uma requisição (long-poll com ?wait=)",
+            "job_events": "GET /jobs/events - Mudanças de status (Server-Sent Events)",
             "queue": "GET /queue - Visualizar fila",
-            "printers": "GET /printers - Listar impressoras"
+            "queue_export": "GET /queue/export - Exportar fila (NDJSON)",
+            "queue_clients": "GET /queue/clients - Estatísticas por cliente",
+            "queue_process": "POST /queue/process - Esvaziar a fila (progresso em GET /queue/process/{id})",
+            "printers": "GET /printers - Listar impressoras",
+            "metrics": "GET /metrics - Métricas (formato Prometheus)"
         }
     }
 
 
 def run_server():
-    """Função para rodar o servidor."""
+    """Função para rodar o servidor.
+    
+    Com ``api.workers`` > 1 o uvicorn sobe vários processos (cada um importa
+    este módulo); apenas o despachante eleito processa a fila.
+    """
     config_obj = get_config()
+    workers = config_obj.get_workers()
     uvicorn.run(
-        app,
+        "api.main:app" if workers > 1 else app,
         host=config_obj.get_host(),
         port=config_obj.get_port(),
+        workers=workers,
+        timeout_graceful_shutdown=config_obj.get_shutdown_grace_seconds(),
         log_level=config_obj.get_log_level().lower()
     )
 
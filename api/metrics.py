@@ -0,0 +1,264 @@
+"""Métricas no formato de exposição de texto do Prometheus.
+
+Implementação mínima (contadores e histogramas com rótulos) para não exigir
+dependências extras no serviço Windows. Cada observação custa uma leitura
+de relógio, uma busca binária nos buckets e um lock, o que permite deixar a
+instrumentação ligada em produção.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Buckets (segundos) das etapas: de operações em memória a jobs no spooler
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0
+)
+
+# Buckets (segundos) da espera na fila, que pode chegar a minutos
+QUEUE_WAIT_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# Buckets (itens) do tamanho dos lotes do processador da fila
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base dos tipos de métrica (nome, ajuda e rótulos)."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Retorna a métrica no formato de texto do Prometheus."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Contador monotônico com rótulos."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """Incrementa o contador."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """Retorna uma cópia dos valores atuais por combinação de rótulos."""
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos e rótulos."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de rótulos: [contagens por bucket..., soma, total]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Registra uma observação."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mede a duração do bloco ``with`` (também quando há exceção)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = {key: list(data) for key, data in self._values.items()}
+        names = self.labelnames + ("le",)
+        for key, data in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {int(data[-1])}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(data[-2])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {int(data[-1])}"
+
+
+class GaugeCallback(_Metric):
+    """Gauge calculado no momento da coleta (ex.: profundidade da fila)."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self.callback().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Registry:
+    """Conjunto de métricas expostas em /metrics."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Adiciona uma métrica (substitui outra com o mesmo nome)."""
+        with self._lock:
+            self._metrics = [m for m in self._metrics if m.name != metric.name]
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Retorna todas as métricas no formato de texto do Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Duração de cada etapa do caminho de impressão
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "etiquetas_stage_duration_seconds",
+    "Duração de cada etapa (render, resolve_printer, spool, sqlite_commit)",
+    ["stage"]
+))
+
+# Tempo entre a entrada na fila e o início do processamento
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "etiquetas_queue_wait_seconds",
+    "Tempo de espera na fila até o processamento",
+    ["priority"],
+    buckets=QUEUE_WAIT_BUCKETS
+))
+
+# Requisições HTTP por rota e status
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "etiquetas_http_requests_total",
+    "Requisições HTTP recebidas",
+    ["method", "route", "status"]
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "etiquetas_http_request_duration_seconds",
+    "Duração das requisições HTTP",
+    ["method", "route"]
+))
+
+# Jobs enviados ao spooler por impressora
+PRINT_JOBS = REGISTRY.register(Counter(
+    "etiquetas_print_jobs_total",
+    "Jobs enviados ao spooler por impressora e resultado",
+    ["printer", "result"]
+))
+
+# Resultado do processamento de itens da fila
+QUEUE_PROCESSED = REGISTRY.register(Counter(
+    "etiquetas_queue_processed_total",
+    "Itens da fila processados por resultado (completed, retry, failed)",
+    ["result"]
+))
+
+# Lotes retirados da fila pelo processador (tamanho adaptativo)
+QUEUE_BATCH_SIZE = REGISTRY.register(Histogram(
+    "etiquetas_queue_batch_size",
+    "Tamanho dos lotes escolhidos pelo processador da fila",
+    buckets=BATCH_SIZE_BUCKETS
+))
+
+# Itens impressos junto com outros idênticos (um job com ^PQ)
+QUEUE_MERGED = REGISTRY.register(Counter(
+    "etiquetas_queue_merged_items_total",
+    "Itens da fila agrupados com itens idênticos em um único job"
+))
+
+# Requisições recusadas pelo controle de admissão
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "etiquetas_admission_rejected_total",
+    "Requisições recusadas por limite de taxa (429) ou sobrecarga (503)",
+    ["reason", "client"]
+))
+
+# Tempos por etapa da requisição HTTP em andamento (None = não coletar)
+request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_stages", default=None
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Mede uma etapa no histograma e, se ativo, nos tempos da requisição.
+
+    Os tempos por requisição (Server-Timing e log de requisições lentas) só
+    são acumulados quando ``request_stages`` foi definido pelo middleware.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        stages = request_stages.get()
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
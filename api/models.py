@@ -1,6 +1,6 @@
 """Modelos Pydantic para validação de dados."""
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class PrintRequest(BaseModel):
@@ -11,6 +11,7 @@ class PrintRequest(BaseModel):
     zpl_template: Optional[str] = Field(None, description="Template ZPL customizado (opcional)")
     duas_colunas: bool = Field(default=False, description="Imprimir nas 2 colunas")
     data_col2: Optional[Dict[str, Any]] = Field(None, description="Dados da coluna direita (se vazio, usa data em ambas)")
+    priority: int = Field(default=5, ge=0, le=9, description="Prioridade na fila (0 = mais urgente, 9 = lote)")
 
 
 class PrintResponse(BaseModel):
@@ -20,20 +21,45 @@ class PrintResponse(BaseModel):
     message: str
 
 
+class BatchPrintRequest(BaseModel):
+    """Modelo para requisição de impressão em lote."""
+    items: List[PrintRequest] = Field(..., min_length=1, description="Etiquetas a imprimir")
+
+
+class BatchItemResult(BaseModel):
+    """Resultado de um item do lote."""
+    index: int
+    status: str = Field(..., description="printed (impresso agora) ou queued (na fila)")
+    queue_id: Optional[str] = None
+
+
+class BatchPrintResponse(BaseModel):
+    """Modelo para resposta de impressão em lote."""
+    success: bool
+    printed: int
+    queued: int
+    items: List[BatchItemResult]
+    message: str
+
+
 class StatusResponse(BaseModel):
     """Modelo para resposta de status."""
     status: str
     printer_available: bool
     printer_name: Optional[str] = None
     queue_stats: Dict[str, int]
+    queue_lanes: Dict[int, int] = Field(default_factory=dict, description="Itens pendentes por prioridade")
 
 
 class QueueItemResponse(BaseModel):
     """Modelo para item da fila."""
     id: str
     created_at: str
+    updated_at: Optional[str] = None
     status: str
     attempts: int
     error_message: Optional[str] = None
     printer_name: Optional[str] = None
+    priority: Optional[int] = None
+    payload: Optional[Dict[str, Any]] = None
 
@@ -1,9 +1,11 @@
 """Integração com impressora Zebra."""
+import asyncio
 import win32print
 import win32api
 import time
 from typing import Optional, List
 import logging
+from .metrics import stage_timer, PRINT_JOBS
 
 logger = logging.getLogger(__name__)
 
@@ -74,16 +76,24 @@ class PrinterManager:
             logger.error(f"Erro ao obter impressora padrão: {e}")
             return None
     
-    def get_printer_name(self, printer_name: Optional[str] = None) -> Optional[str]:
+    def get_printer_name(self, printer_name: Optional[str] = None,
+                         printers: Optional[List[str]] = None) -> Optional[str]:
         """Obtém o nome da impressora a usar.
         
         Args:
             printer_name: Nome específico da impressora (opcional)
+            printers: Lista já obtida de list_printers (evita enumerar de novo)
             
         Returns:
             Nome da impressora a usar ou None se não encontrada
         """
-        printers = self.list_printers()
+        with stage_timer('resolve_printer'):
+            return self._resolve_printer_name(printer_name, printers)
+    
+    def _resolve_printer_name(self, printer_name: Optional[str],
+                              printers: Optional[List[str]]) -> Optional[str]:
+        if printers is None:
+            printers = self.list_printers()
         
         if printer_name:
             # Verifica se a impressora existe
@@ -127,8 +137,31 @@ class PrinterManager:
         
         if not printer:
             logger.error("Nenhuma impressora disponível")
+            PRINT_JOBS.inc(printer='', result='failure')
             return False
         
+        with stage_timer('spool'):
+            success = self._spool(zpl_command, printer)
+        PRINT_JOBS.inc(printer=printer, result='success' if success else 'failure')
+        return success
+    
+    async def print_zpl_async(self, zpl_command: str, printer_name: Optional[str] = None) -> bool:
+        """Versão de ``print_zpl`` para uso no event loop.
+        
+        A API do spooler do Windows é bloqueante; o envio roda em uma thread
+        para não travar as demais requisições enquanto a impressora responde.
+        
+        Args:
+            zpl_command: Comando ZPL completo
+            printer_name: Nome da impressora (opcional)
+            
+        Returns:
+            True se impressão foi bem-sucedida, False caso contrário
+        """
+        return await asyncio.to_thread(self.print_zpl, zpl_command, printer_name)
+    
+    def _spool(self, zpl_command: str, printer: str) -> bool:
+        """Envia o ZPL como job RAW ao spooler da impressora."""
         try:
             # Abre a impressora
             hprinter = win32print.OpenPrinter(printer)
@@ -180,6 +213,17 @@ class PrinterManager:
         except Exception:
             return False
     
+    async def is_printer_available_async(self, printer_name: Optional[str] = None) -> bool:
+        """Versão de ``is_printer_available`` para uso no event loop.
+        
+        Args:
+            printer_name: Nome da impressora (opcional)
+            
+        Returns:
+            True se disponível, False caso contrário
+        """
+        return await asyncio.to_thread(self.is_printer_available, printer_name)
+    
     def test_print(self, printer_name: Optional[str] = None) -> bool:
         """Envia uma impressão de teste.
         
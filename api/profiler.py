@@ -0,0 +1,214 @@
+"""Perfil de CPU por amostragem e snapshots de memória do serviço em execução."""
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Limites para manter a coleta segura em produção
+MAX_PROFILE_SECONDS = 60
+MIN_INTERVAL_SECONDS = 0.001
+
+# Frames (arquivo, função) em que a thread está parada esperando: lock,
+# select/epoll, fila de trabalho vazia. Amostras com a folha em um deles são
+# espera, não CPU
+IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+    ("connection.py", "wait"),
+})
+
+
+class ProfilerBusyError(RuntimeError):
+    """Já existe uma coleta em andamento."""
+
+
+class SamplingProfiler:
+    """Amostra periodicamente a pilha de todas as threads.
+
+    Não usa ``sys.setprofile``: uma thread separada lê
+    ``sys._current_frames()`` a cada intervalo, então o código amostrado não
+    fica mais lento. O custo é proporcional ao número de amostras, e apenas
+    uma coleta (CPU ou memória) roda por vez.
+
+    Por padrão as threads paradas em espera (``IDLE_FRAMES``) são ignoradas,
+    para que o perfil mostre onde a CPU é gasta; com ``include_idle`` o
+    perfil é de tempo de parede. Esperas dentro de funções em C chamadas
+    diretamente (``time.sleep``) não têm frame próprio e continuam contando.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, interval: float = 0.005,
+               include_idle: bool = False) -> Tuple[Counter, int]:
+        """Coleta as pilhas de todas as threads durante ``seconds`` segundos.
+
+        Args:
+            seconds: Duração da coleta (máx. MAX_PROFILE_SECONDS)
+            interval: Intervalo entre amostras em segundos
+            include_idle: Manter as threads paradas em espera (tempo de parede)
+
+        Returns:
+            (contagem por pilha, número de amostras). Cada pilha é uma tupla
+            de frames da raiz até a folha, começando pelo nome da thread.
+
+        Raises:
+            ProfilerBusyError: Se outra coleta estiver em andamento
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Já existe uma coleta em andamento")
+        try:
+            seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+            interval = max(interval, MIN_INTERVAL_SECONDS)
+            me = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me:
+                        continue
+                    if not include_idle and _is_idle(frame):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, str(thread_id)))
+                    stacks[tuple(reversed(stack))] += 1
+                samples += 1
+                time.sleep(interval)
+            return stacks, samples
+        finally:
+            self._lock.release()
+
+    def memory_top(self, seconds: float = 0, limit: int = 20,
+                   group_by: str = "lineno") -> Dict:
+        """Maiores alocações vivas segundo o ``tracemalloc``.
+
+        Se o ``tracemalloc`` não estiver ativo, é ligado só durante a coleta
+        (``seconds`` > 0 é necessário para que haja o que medir) e desligado
+        ao final, limitando o custo extra a essa janela.
+
+        Args:
+            seconds: Janela de coleta; também compara o início com o fim
+            limit: Número de linhas a retornar
+            group_by: "lineno", "filename" ou "traceback"
+
+        Returns:
+            Dicionário com o total rastreado e as maiores alocações
+
+        Raises:
+            ProfilerBusyError: Se outra coleta estiver em andamento
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Já existe uma coleta em andamento")
+        started_here = False
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25 if group_by == "traceback" else 1)
+                started_here = True
+            before = tracemalloc.take_snapshot() if seconds > 0 else None
+            time.sleep(min(max(seconds, 0.0), MAX_PROFILE_SECONDS))
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+            self._lock.release()
+
+        ignored = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+        snapshot = snapshot.filter_traces(ignored)
+        if before is not None:
+            stats = snapshot.compare_to(before.filter_traces(ignored), group_by)
+        else:
+            stats = snapshot.statistics(group_by)
+
+        top: List[Dict] = []
+        for stat in stats[:limit]:
+            entry = {
+                "location": [str(frame) for frame in stat.traceback],
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            if before is not None:
+                entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+                entry["count_diff"] = stat.count_diff
+            top.append(entry)
+
+        return {
+            "tracing_started_for_request": started_here,
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "top": top,
+        }
+
+
+def _is_idle(frame) -> bool:
+    """Indica se a thread está parada em uma espera (folha em ``IDLE_FRAMES``)."""
+    code = frame.f_code
+    return (Path(code.co_filename).name, code.co_name) in IDLE_FRAMES
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Formato "collapsed stacks" (flamegraph.pl, speedscope, inferno)."""
+    return "".join(
+        f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common()
+    )
+
+
+def to_speedscope(stacks: Counter, interval: float, name: str) -> Dict:
+    """Arquivo no formato do speedscope (https://www.speedscope.app).
+
+    Um perfil "sampled" por thread, com peso em segundos por amostra.
+    """
+    frames: List[Dict] = []
+    frame_index: Dict[str, int] = {}
+    per_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+
+    for stack, count in stacks.items():
+        thread, calls = stack[0], stack[1:]
+        indexes = []
+        for call in calls:
+            if call not in frame_index:
+                frame_index[call] = len(frames)
+                function, _, location = call.partition(" (")
+                file, _, line = location.rstrip(")").rpartition(":")
+                frames.append({"name": function, "file": file, "line": int(line or 0)})
+            indexes.append(frame_index[call])
+        samples, weights = per_thread.setdefault(thread, ([], []))
+        samples.append(indexes)
+        weights.append(count * interval)
+
+    profiles = []
+    for thread, (samples, weights) in sorted(per_thread.items()):
+        profiles.append({
+            "type": "sampled",
+            "name": thread,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        })
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "orais-etiquetas",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
@@ -1,11 +1,37 @@
 """Sistema de fila para armazenar requisições de impressão."""
 import sqlite3
 import json
-import uuid
-from datetime import datetime
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 from enum import Enum
+from .events import JobEvents
+from .metrics import stage_timer
+
+
+# Colunas da listagem (sem payload, decodificado apenas quando solicitado)
+_LIST_COLUMNS = (
+    "id, created_at, updated_at, status, attempts, error_message, printer_name, "
+    "priority, client_id"
+)
+
+# Prioridade padrão (0 = mais urgente, 9 = lote)
+DEFAULT_PRIORITY = 5
+
+# Separa a chave de um lote do índice de cada item. Chaves de clientes não
+# podem ter caracteres de controle (valid_idempotency_key), então a chave de
+# um item de lote nunca coincide com uma chave enviada a /print
+_BATCH_KEY_SEPARATOR = "\x1f"
+
+
+def valid_idempotency_key(idempotency_key: str) -> bool:
+    """Indica se a Idempotency-Key enviada pelo cliente é aceitável (sem caracteres de controle)."""
+    return bool(idempotency_key) and all(
+        ' ' <= char and char != '\x7f' for char in idempotency_key
+    )
 
 
 class QueueStatus(Enum):
@@ -16,105 +42,586 @@ class QueueStatus(Enum):
     FAILED = "failed"
 
 
+# Alfabeto Crockford base32 (ULID): ordenação lexicográfica = ordenação temporal
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last_ms = 0
+_ulid_last_rand = 0
+
+
+def new_queue_id() -> str:
+    """Gera um ID ordenado pelo tempo no formato ULID.
+    
+    48 bits de timestamp (ms) + 80 bits aleatórios, codificados em 26
+    caracteres base32. Dentro do mesmo milissegundo a parte aleatória é
+    incrementada, garantindo IDs monotônicos no processo.
+    
+    Returns:
+        ID de 26 caracteres
+    """
+    global _ulid_last_ms, _ulid_last_rand
+    with _ulid_lock:
+        now_ms = int(time.time() * 1000)
+        if now_ms <= _ulid_last_ms:
+            now_ms = _ulid_last_ms
+            rand = (_ulid_last_rand + 1) & ((1 << 80) - 1)
+        else:
+            rand = int.from_bytes(os.urandom(10), 'big')
+        _ulid_last_ms, _ulid_last_rand = now_ms, rand
+    
+    value = (now_ms << 80) | rand
+    chars = []
+    for _ in range(26):
+        chars.append(_ULID_ALPHABET[value & 0x1F])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
 class PrintQueue:
     """Gerenciador de fila de impressão usando SQLite."""
     
-    def __init__(self, db_path: str = "data/print_queue.db"):
+    # seq é alias do rowid: inserções sempre no fim da B-tree e ordem FIFO
+    # exata, sem depender da resolução de segundos de CURRENT_TIMESTAMP.
+    # Sem AUTOINCREMENT (que grava sqlite_sequence a cada inserção): as
+    # linhas da fila nunca são apagadas, então max(rowid) + 1 já é crescente.
+    # id é um ULID (ordenado pelo tempo), mantido como identificador público.
+    _CREATE_TABLE_SQL = """
+        CREATE TABLE {table} (
+            seq INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+            updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+            status TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            error_message TEXT,
+            printer_name TEXT,
+            priority INTEGER NOT NULL DEFAULT 5,
+            client_id TEXT,
+            idempotency_key TEXT,
+            zpl TEXT,
+            claimed_by TEXT
+        )
+    """
+    
+    # Colunas adicionadas depois da criação do esquema: bancos existentes
+    # recebem ALTER TABLE ADD COLUMN na inicialização
+    _ADDED_COLUMNS = {
+        'priority': "INTEGER NOT NULL DEFAULT 5",
+        'client_id': "TEXT",
+        'idempotency_key': "TEXT",
+        'zpl': "TEXT",
+        'claimed_by': "TEXT",
+    }
+    
+    # Índices de versões anteriores, substituídos pelos de _INDEXES_SQL
+    _DROPPED_INDEXES = ('idx_status', 'idx_pending', 'idx_pending_printer')
+    
+    # - idx_status_seq: listagem por status em ordem e contagem por status
+    #   (cobre o GROUP BY de get_stats sem ler a tabela)
+    # - idx_printer_seq: histórico por impressora em ordem (GET /queue)
+    # - idx_pending_priority / idx_pending_printer_priority: parciais, só
+    #   linhas pendentes - a consulta do processador lê um índice do tamanho
+    #   do backlog, não do histórico, na ordem prioridade + FIFO geral ou por
+    #   impressora (também dão a profundidade por faixa de prioridade)
+    # - idx_pending_client: parcial, fila pendente de cada cliente na ordem
+    #   prioridade + FIFO (escalonamento justo entre clientes)
+    # - idx_idempotency / idx_idempotency_created: parciais, só linhas com
+    #   Idempotency-Key - busca da chave (única) e expiração pelo TTL
+    # - idx_active_printer: parcial, profundidade da fila por impressora
+    #   (pending/processing)
+    # Consultas que devem usar os índices parciais precisam repetir o status
+    # como literal no WHERE (o SQLite não casa parâmetros com a condição).
+    _INDEXES_SQL = (
+        """
+        CREATE INDEX IF NOT EXISTS idx_status_seq
+        ON print_queue(status, seq)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_printer_seq
+        ON print_queue(printer_name, seq)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pending_priority
+        ON print_queue(priority, seq) WHERE status = 'pending'
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pending_printer_priority
+        ON print_queue(printer_name, priority, seq) WHERE status = 'pending'
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pending_client
+        ON print_queue(client_id, priority, seq) WHERE status = 'pending'
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_idempotency
+        ON print_queue(idempotency_key) WHERE idempotency_key IS NOT NULL
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_idempotency_created
+        ON print_queue(created_at) WHERE idempotency_key IS NOT NULL
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_active_printer
+        ON print_queue(printer_name, status)
+        WHERE status IN ('pending', 'processing')
+        """,
+    )
+    
+    def __init__(self, db_path: str = "data/print_queue.db",
+                 events: Optional[JobEvents] = None):
         """Inicializa o gerenciador de fila.
         
         Args:
             db_path: Caminho para o banco de dados SQLite
+            events: Recebe as mudanças de status (opcional)
         """
         self.db_path = Path(db_path)
+        self.events = events
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._init_database()
     
     def _init_database(self):
         """Inicializa o banco de dados e cria a tabela se não existir."""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connect()
         cursor = conn.cursor()
         
+        # WAL: leituras não bloqueiam a escrita (vários workers no mesmo banco)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS print_queue (
-                id TEXT PRIMARY KEY,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT NOT NULL,
-                payload TEXT NOT NULL,
-                attempts INTEGER DEFAULT 0,
-                error_message TEXT,
-                printer_name TEXT
-            )
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name = 'print_queue'
         """)
+        table_exists = cursor.fetchone() is not None
         
-        # Índices para melhor performance
+        if table_exists:
+            cursor.execute("PRAGMA table_info(print_queue)")
+            columns = {row[1] for row in cursor.fetchall()}
+            if 'seq' not in columns:
+                self._migrate_uuid_schema(conn)
+                cursor.execute("PRAGMA table_info(print_queue)")
+                columns = {row[1] for row in cursor.fetchall()}
+            for column, definition in self._ADDED_COLUMNS.items():
+                if column not in columns:
+                    cursor.execute(
+                        f"ALTER TABLE print_queue ADD COLUMN {column} {definition}"
+                    )
+        else:
+            cursor.execute(self._CREATE_TABLE_SQL.format(table='print_queue'))
+        
+        # Índices desenhados para as consultas reais da fila
+        for index_name in self._DROPPED_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        for index_sql in self._INDEXES_SQL:
+            cursor.execute(index_sql)
+        
+        # Avisos ao processo despachante (vários workers): contador por tipo
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_status 
-            ON print_queue(status)
+            CREATE TABLE IF NOT EXISTS dispatcher_signals (
+                name TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
         """)
         
+        # Estado das tarefas em segundo plano (importações, esvaziamentos),
+        # consultado por qualquer worker
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_created_at 
-            ON print_queue(created_at)
+            CREATE TABLE IF NOT EXISTS background_jobs (
+                kind TEXT NOT NULL,
+                id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                PRIMARY KEY (kind, id)
+            ) WITHOUT ROWID
         """)
         
         conn.commit()
         conn.close()
     
-    def add(self, payload: Dict, printer_name: Optional[str] = None) -> str:
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão com o banco da fila."""
+        return sqlite3.connect(str(self.db_path))
+    
+    @staticmethod
+    def _commit(conn: sqlite3.Connection):
+        """Confirma a transação, medindo o tempo de commit."""
+        with stage_timer('sqlite_commit'):
+            conn.commit()
+    
+    def _migrate_uuid_schema(self, conn: sqlite3.Connection):
+        """Migra bancos antigos (id UUID4 como PRIMARY KEY) para o esquema com seq.
+        
+        Os IDs existentes são preservados; seq é atribuído na ordem de
+        created_at, mantendo a ordem FIFO das requisições já enfileiradas.
+        
+        Args:
+            conn: Conexão aberta com o banco
+        """
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            cursor.execute(self._CREATE_TABLE_SQL.format(table='print_queue_new'))
+            cursor.execute("""
+                INSERT INTO print_queue_new (
+                    id, created_at, updated_at, status, payload,
+                    attempts, error_message, printer_name
+                )
+                SELECT id, created_at, updated_at, status, payload,
+                       attempts, error_message, printer_name
+                FROM print_queue
+                ORDER BY created_at ASC, rowid ASC
+            """)
+            cursor.execute("DROP TABLE print_queue")
+            cursor.execute("ALTER TABLE print_queue_new RENAME TO print_queue")
+            cursor.execute("DROP INDEX IF EXISTS idx_created_at")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def add(self, payload: Dict, printer_name: Optional[str] = None,
+            priority: int = DEFAULT_PRIORITY,
+            client_id: Optional[str] = None,
+            zpl: Optional[str] = None) -> str:
         """Adiciona uma requisição à fila.
         
         Args:
             payload: Dados da requisição de impressão
             printer_name: Nome da impressora (opcional)
+            priority: Prioridade (0 = mais urgente, 9 = lote)
+            client_id: Cliente que enviou a requisição (opcional)
+            zpl: ZPL já gerado e validado (o processador não gera de novo)
             
         Returns:
             ID único da requisição
         """
-        queue_id = str(uuid.uuid4())
-        conn = sqlite3.connect(str(self.db_path))
+        queue_id = new_queue_id()
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        self._insert(cursor, queue_id, QueueStatus.PENDING, payload,
+                     printer_name, priority, client_id, zpl=zpl)
+        
+        self._commit(conn)
+        conn.close()
+        
+        return queue_id
+    
+    def add_many(self, items: List[Dict],
+                 job: Optional[Tuple[str, str, Dict]] = None) -> List[str]:
+        """Adiciona várias requisições à fila em uma única transação.
+        
+        Args:
+            items: Lista de dicionários com payload e, opcionalmente,
+                printer_name, priority, client_id e zpl
+            job: (tipo, ID, estado) da tarefa que gerou os itens, gravado
+                na mesma transação (``save_background_job``)
+            
+        Returns:
+            IDs das requisições, na mesma ordem de ``items``
+        """
+        queue_ids = [new_queue_id() for _ in items]
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        for queue_id, item in zip(queue_ids, items):
+            self._insert(
+                cursor, queue_id, QueueStatus.PENDING, item['payload'],
+                item.get('printer_name'),
+                item.get('priority', DEFAULT_PRIORITY),
+                item.get('client_id'),
+                zpl=item.get('zpl')
+            )
+        if job:
+            self._save_background_job(cursor, *job)
+        
+        self._commit(conn)
+        conn.close()
+        
+        return queue_ids
+    
+    def add_idempotent(self, idempotency_key: str, ttl_seconds: int,
+                       payload: Dict, printer_name: Optional[str] = None,
+                       priority: int = DEFAULT_PRIORITY,
+                       client_id: Optional[str] = None,
+                       status: QueueStatus = QueueStatus.PENDING,
+                       zpl: Optional[str] = None) -> Tuple[Dict, bool]:
+        """Adiciona uma requisição identificada por uma Idempotency-Key.
+        
+        Se a chave já foi usada dentro do TTL, nada é inserido e a requisição
+        original é retornada. O índice único na chave torna a verificação
+        segura mesmo com retentativas simultâneas do mesmo cliente.
+        
+        Args:
+            idempotency_key: Chave enviada pelo cliente
+            ttl_seconds: Validade da chave em segundos
+            payload: Dados da requisição de impressão
+            printer_name: Nome da impressora (opcional)
+            priority: Prioridade (0 = mais urgente, 9 = lote)
+            client_id: Cliente que enviou a requisição (opcional)
+            status: Status inicial (PROCESSING quando a API vai imprimir na hora)
+            zpl: ZPL já gerado e validado (o processador não gera de novo)
+            
+        Returns:
+            Tupla (requisição, criada) - criada é False se a chave já existia
+        """
+        queue_id = new_queue_id()
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
+        # Chave expirada pode ser reutilizada: libera antes de inserir
         cursor.execute("""
-            INSERT INTO print_queue (id, status, payload, printer_name)
-            VALUES (?, ?, ?, ?)
-        """, (
-            queue_id,
-            QueueStatus.PENDING.value,
-            json.dumps(payload, ensure_ascii=False),
-            printer_name
+            UPDATE print_queue SET idempotency_key = NULL
+            WHERE idempotency_key = ? AND created_at < ?
+        """, (idempotency_key, self._cutoff(ttl_seconds)))
+        created = self._insert(cursor, queue_id, status, payload, printer_name,
+                               priority, client_id, idempotency_key, zpl)
+        self._commit(conn)
+        
+        cursor.execute("""
+            SELECT * FROM print_queue WHERE idempotency_key = ?
+        """, (idempotency_key,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return self._row_to_dict(row), created
+    
+    def get_by_idempotency_key(self, idempotency_key: str,
+                               ttl_seconds: int) -> Optional[Dict]:
+        """Obtém a requisição associada a uma Idempotency-Key ainda válida.
+        
+        Args:
+            idempotency_key: Chave enviada pelo cliente
+            ttl_seconds: Validade da chave em segundos
+            
+        Returns:
+            Dados da requisição ou None se a chave não existe ou expirou
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM print_queue
+            WHERE idempotency_key = ? AND created_at >= ?
+        """, (idempotency_key, self._cutoff(ttl_seconds)))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return self._row_to_dict(row) if row else None
+    
+    def add_batch_idempotent(self, idempotency_key: str, ttl_seconds: int,
+                             items: List[Dict]) -> Tuple[List[Dict], bool]:
+        """Adiciona um lote identificado por uma Idempotency-Key.
+        
+        Cada item recebe a chave ``"{chave}\\x1f{índice}"`` e o lote inteiro é
+        gravado em uma única transação: ou todos os itens existem, ou nenhum.
+        Se a chave já foi usada dentro do TTL, nada é inserido e os itens
+        originais são retornados.
+        
+        Args:
+            idempotency_key: Chave enviada pelo cliente
+            ttl_seconds: Validade da chave em segundos
+            items: Lista de dicionários com payload e, opcionalmente,
+                printer_name, priority, client_id e status (padrão PENDING)
+        
+        Returns:
+            Tupla (requisições na ordem do lote, criadas) - criadas é False
+            se a chave já existia
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        # Chave expirada pode ser reutilizada: libera antes de inserir
+        cursor.execute("""
+            UPDATE print_queue SET idempotency_key = NULL
+            WHERE idempotency_key >= ? AND idempotency_key < ? AND created_at < ?
+        """, (*self._batch_key_range(idempotency_key), self._cutoff(ttl_seconds)))
+        created = True
+        for index, item in enumerate(items):
+            created = self._insert(
+                cursor, new_queue_id(), item.get('status', QueueStatus.PENDING),
+                item['payload'], item.get('printer_name'),
+                item.get('priority', DEFAULT_PRIORITY), item.get('client_id'),
+                f"{idempotency_key}{_BATCH_KEY_SEPARATOR}{index}", item.get('zpl')
+            )
+            if not created:
+                break
+        if created:
+            self._commit(conn)
+        else:
+            conn.rollback()
+        conn.close()
+        
+        return self.get_batch_by_idempotency_key(idempotency_key, ttl_seconds), created
+    
+    def get_batch_by_idempotency_key(self, idempotency_key: str,
+                                     ttl_seconds: int) -> List[Dict]:
+        """Obtém os itens de um lote gravado com ``add_batch_idempotent``.
+        
+        Args:
+            idempotency_key: Chave enviada pelo cliente
+            ttl_seconds: Validade da chave em segundos
+        
+        Returns:
+            Requisições na ordem do lote (vazia se a chave não existe ou expirou)
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM print_queue
+            WHERE idempotency_key >= ? AND idempotency_key < ? AND created_at >= ?
+        """, (*self._batch_key_range(idempotency_key), self._cutoff(ttl_seconds)))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        # Ordem do lote pelo índice da chave (sem ORDER BY: lê só o índice da chave)
+        rows.sort(key=lambda row: int(
+            row['idempotency_key'].rsplit(_BATCH_KEY_SEPARATOR, 1)[1]
         ))
+        return [self._row_to_dict(row) for row in rows]
+    
+    @staticmethod
+    def _batch_key_range(idempotency_key: str) -> Tuple[str, str]:
+        """Faixa das chaves dos itens de um lote (o espaço vem logo após o separador)."""
+        return f"{idempotency_key}{_BATCH_KEY_SEPARATOR}", f"{idempotency_key} "
+    
+    def purge_idempotency_keys(self, ttl_seconds: int) -> int:
+        """Remove as Idempotency-Keys expiradas (as requisições são mantidas).
         
-        conn.commit()
+        Args:
+            ttl_seconds: Validade da chave em segundos
+            
+        Returns:
+            Número de chaves removidas
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE print_queue SET idempotency_key = NULL
+            WHERE idempotency_key IS NOT NULL AND created_at < ?
+        """, (self._cutoff(ttl_seconds),))
+        purged = cursor.rowcount
+        
+        self._commit(conn)
         conn.close()
         
-        return queue_id
+        return purged
+    
+    def _insert(self, cursor: sqlite3.Cursor, queue_id: str,
+                status: QueueStatus, payload: Dict,
+                printer_name: Optional[str], priority: int,
+                client_id: Optional[str],
+                idempotency_key: Optional[str] = None,
+                zpl: Optional[str] = None) -> bool:
+        """Insere uma linha na fila.
+        
+        ``zpl`` é o ZPL já gerado (e validado) do payload, impresso pelo
+        processador sem gerar de novo; é apagado quando o item é concluído.
+        
+        Returns:
+            False se a Idempotency-Key já existia (nada inserido)
+        """
+        cursor.execute("""
+            INSERT INTO print_queue (
+                id, status, payload, printer_name, priority, client_id,
+                idempotency_key, zpl
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL
+            DO NOTHING
+        """, (
+            queue_id,
+            status.value,
+            json.dumps(payload, ensure_ascii=False),
+            printer_name,
+            priority,
+            client_id,
+            idempotency_key,
+            zpl
+        ))
+        return cursor.rowcount == 1
+    
+    @staticmethod
+    def _cutoff(seconds: int) -> str:
+        """Instante (UTC, formato de created_at) de ``seconds`` segundos atrás."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+        return cutoff.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
     
-    def get_pending(self, limit: int = 10) -> List[Dict]:
-        """Obtém requisições pendentes.
+    def get_pending(self, limit: int = 10,
+                    printer_name: Optional[str] = None,
+                    client_id: Optional[str] = None) -> List[Dict]:
+        """Obtém requisições pendentes, por prioridade e depois em ordem FIFO.
         
         Args:
             limit: Número máximo de requisições a retornar
+            printer_name: Filtrar por impressora (None para todas)
+            client_id: Filtrar por cliente (None para todos)
             
         Returns:
             Lista de requisições pendentes
         """
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT * FROM print_queue
-            WHERE status = ?
-            ORDER BY created_at ASC
-            LIMIT ?
-        """, (QueueStatus.PENDING.value, limit))
+        if printer_name:
+            cursor.execute("""
+                SELECT * FROM print_queue
+                WHERE status = 'pending' AND printer_name = ?
+                ORDER BY priority ASC, seq ASC
+                LIMIT ?
+            """, (printer_name, limit))
+        elif client_id is not None:
+            cursor.execute("""
+                SELECT * FROM print_queue
+                WHERE status = 'pending' AND client_id IS ?
+                ORDER BY priority ASC, seq ASC
+                LIMIT ?
+            """, (client_id or None, limit))
+        else:
+            cursor.execute("""
+                SELECT * FROM print_queue
+                WHERE status = 'pending'
+                ORDER BY priority ASC, seq ASC
+                LIMIT ?
+            """, (limit,))
         
         rows = cursor.fetchall()
         conn.close()
         
         return [self._row_to_dict(row) for row in rows]
     
+    def get_pending_by_client(self, limit: int = 10) -> Dict[str, List[Dict]]:
+        """Obtém as próximas requisições pendentes de cada cliente.
+        
+        Args:
+            limit: Número máximo de requisições por cliente
+            
+        Returns:
+            Dicionário {cliente: pendentes na ordem prioridade + FIFO}
+            (cliente '' = requisições sem cliente identificado)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT DISTINCT client_id FROM print_queue
+            WHERE status = 'pending'
+        """)
+        clients = [row[0] or '' for row in cursor.fetchall()]
+        conn.close()
+        
+        return {
+            client_id: self.get_pending(limit, client_id=client_id)
+            for client_id in clients
+        }
+    
     def get_by_id(self, queue_id: str) -> Optional[Dict]:
         """Obtém uma requisição pelo ID.
         
@@ -124,7 +631,7 @@ class PrintQueue:
         Returns:
             Dados da requisição ou None se não encontrada
         """
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -135,28 +642,79 @@ class PrintQueue:
         return self._row_to_dict(row) if row else None
     
     def update_status(self, queue_id: str, status: QueueStatus, 
-                     error_message: Optional[str] = None):
+                     error_message: Optional[str] = None,
+                     claimed_by: Optional[str] = None):
         """Atualiza o status de uma requisição.
         
         Args:
             queue_id: ID da requisição
             status: Novo status
             error_message: Mensagem de erro (se houver)
+            claimed_by: Processador que assumiu o item (ao marcar processando)
         """
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
             UPDATE print_queue
             SET status = ?,
-                updated_at = CURRENT_TIMESTAMP,
+                updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now'),
                 error_message = ?,
-                attempts = attempts + 1
+                attempts = attempts + 1,
+                zpl = CASE ? WHEN 'completed' THEN NULL ELSE zpl END,
+                claimed_by = ?
             WHERE id = ?
-        """, (status.value, error_message, queue_id))
+        """, (status.value, error_message, status.value, claimed_by, queue_id))
         
-        conn.commit()
+        transitions = [(queue_id, status.value, error_message)]
+        if self.events:
+            self.events.record(cursor, transitions)
+        self._commit(conn)
         conn.close()
+        
+        if self.events:
+            self.events.committed(transitions)
+    
+    def update_status_many(self, queue_ids: List[str], status: QueueStatus,
+                           error_message: Optional[str] = None,
+                           claimed_by: Optional[str] = None):
+        """Atualiza o status de várias requisições em uma única transação.
+        
+        Args:
+            queue_ids: IDs das requisições
+            status: Novo status
+            error_message: Mensagem de erro (se houver)
+            claimed_by: Processador que assumiu os itens (ao marcar processando)
+        """
+        if len(queue_ids) == 1:
+            self.update_status(queue_ids[0], status, error_message, claimed_by)
+            return
+        
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.executemany("""
+            UPDATE print_queue
+            SET status = ?,
+                updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now'),
+                error_message = ?,
+                attempts = attempts + 1,
+                zpl = CASE ? WHEN 'completed' THEN NULL ELSE zpl END,
+                claimed_by = ?
+            WHERE id = ?
+        """, [
+            (status.value, error_message, status.value, claimed_by, queue_id)
+            for queue_id in queue_ids
+        ])
+        
+        transitions = [(queue_id, status.value, error_message) for queue_id in queue_ids]
+        if self.events:
+            self.events.record(cursor, transitions)
+        self._commit(conn)
+        conn.close()
+        
+        if self.events:
+            self.events.committed(transitions)
     
     def mark_processing(self, queue_id: str):
         """Marca uma requisição como sendo processada."""
@@ -171,46 +729,136 @@ class PrintQueue:
         self.update_status(queue_id, QueueStatus.FAILED, error_message)
     
     def get_all(self, status: Optional[QueueStatus] = None, 
-                limit: int = 100) -> List[Dict]:
+                limit: int = 100, include_payload: bool = False,
+                after: Optional[str] = None,
+                printer_name: Optional[str] = None,
+                created_from: Optional[datetime] = None,
+                created_to: Optional[datetime] = None) -> List[Dict]:
         """Obtém todas as requisições, opcionalmente filtradas por status.
         
+        Por padrão o payload não é lido nem decodificado: a listagem só
+        precisa dos metadados, e o JSON é a maior parte de cada linha.
+        
+        A paginação é por cursor (keyset): passe em ``after`` o ID do último
+        item da página anterior para obter os itens mais antigos que ele.
+        
         Args:
             status: Filtrar por status (None para todas)
             limit: Número máximo de requisições
+            include_payload: Incluir o payload decodificado em cada item
+            after: ID do último item já lido (cursor da próxima página)
+            printer_name: Filtrar por impressora
+            created_from: Apenas itens criados a partir deste instante (UTC)
+            created_to: Apenas itens criados antes deste instante (UTC)
             
         Returns:
-            Lista de requisições
+            Lista de requisições, da mais recente para a mais antiga
         """
-        conn = sqlite3.connect(str(self.db_path))
+        columns = _LIST_COLUMNS + (", payload" if include_payload else "")
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
+        conditions = []
+        params: list = []
         if status:
-            cursor.execute("""
-                SELECT * FROM print_queue
-                WHERE status = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (status.value, limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM print_queue
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
+            conditions.append("status = ?")
+            params.append(status.value)
+        if printer_name:
+            conditions.append("printer_name = ?")
+            params.append(printer_name)
+        if after:
+            conditions.append("seq < (SELECT seq FROM print_queue WHERE id = ?)")
+            params.append(after)
+        # Intervalo de tempo vira intervalo de seq: usa a chave primária em vez
+        # de um índice extra em created_at
+        if created_from:
+            conditions.append("seq >= ?")
+            params.append(self._first_seq_since(cursor, created_from))
+        if created_to:
+            conditions.append("seq < ?")
+            params.append(self._first_seq_since(cursor, created_to))
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f"""
+            SELECT {columns} FROM print_queue
+            {where}
+            ORDER BY seq DESC
+            LIMIT ?
+        """, (*params, limit))
         
         rows = cursor.fetchall()
         conn.close()
         
         return [self._row_to_dict(row) for row in rows]
     
+    def iter_all(self, batch_size: int = 1000, **filters) -> Iterator[Dict]:
+        """Percorre todas as requisições em páginas, com memória constante.
+        
+        Cada página é uma consulta curta (keyset por ``after``); nenhuma
+        conexão ou transação fica aberta entre as páginas.
+        
+        Args:
+            batch_size: Itens lidos por consulta
+            **filters: Mesmos filtros de get_all (status, printer_name, ...)
+            
+        Yields:
+            Requisições, da mais recente para a mais antiga
+        """
+        after = filters.pop('after', None)
+        while True:
+            page = self.get_all(limit=batch_size, after=after, **filters)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = page[-1]['id']
+    
+    def _first_seq_since(self, cursor: sqlite3.Cursor, moment: datetime) -> int:
+        """Retorna o menor seq com created_at >= moment.
+        
+        seq e created_at crescem juntos, então a fronteira é achada por busca
+        binária na chave primária (O(log n) leituras pontuais).
+        
+        Args:
+            cursor: Cursor aberto no banco
+            moment: Instante (sem fuso = UTC)
+            
+        Returns:
+            seq da fronteira (MAX(seq) + 1 se nenhum item for tão recente)
+        """
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        timestamp = moment.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        
+        # MIN e MAX em consultas separadas: cada uma é uma leitura só na B-tree
+        cursor.execute("SELECT MIN(seq) FROM print_queue")
+        lo = cursor.fetchone()[0]
+        if lo is None:
+            return 0
+        cursor.execute("SELECT MAX(seq) FROM print_queue")
+        hi = cursor.fetchone()[0] + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cursor.execute("""
+                SELECT seq, created_at FROM print_queue
+                WHERE seq >= ?
+                ORDER BY seq ASC
+                LIMIT 1
+            """, (mid,))
+            seq, created_at = cursor.fetchone()
+            if created_at >= timestamp:
+                hi = mid
+            else:
+                lo = seq + 1
+        return lo
+    
     def get_stats(self) -> Dict:
         """Retorna estatísticas da fila.
         
         Returns:
             Dicionário com estatísticas
         """
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -229,16 +877,293 @@ class PrintQueue:
             'failed': stats.get(QueueStatus.FAILED.value, 0),
         }
     
-    def _row_to_dict(self, row: sqlite3.Row) -> Dict:
-        """Converte uma linha do banco em dicionário."""
+    def get_active_range(self) -> Dict:
+        """Retorna a faixa dos itens ainda não concluídos, com o horário do banco.
+        
+        Returns:
+            {'first_seq', 'last_seq', 'count', 'now'} dos itens pendentes ou
+            em processamento (seq 0 se não há nenhum)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT MIN(seq), MAX(seq), COUNT(*), strftime('%Y-%m-%d %H:%M:%f', 'now')
+            FROM print_queue
+            WHERE status IN ('pending', 'processing')
+        """)
+        first_seq, last_seq, count, now = cursor.fetchone()
+        conn.close()
+        
         return {
+            'first_seq': first_seq or 0,
+            'last_seq': last_seq or 0,
+            'count': count,
+            'now': now,
+        }
+    
+    def get_range_progress(self, first_seq: int, last_seq: int, since: str) -> Dict[str, int]:
+        """Conta os itens de uma faixa de seq que ainda aguardam ou terminaram depois de ``since``.
+        
+        Args:
+            first_seq: Primeiro seq da faixa
+            last_seq: Último seq da faixa
+            since: Horário (do banco) a partir do qual contar concluídos e falhas
+            
+        Returns:
+            Dicionário {status: itens}
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT status, COUNT(*) as count
+            FROM print_queue
+            WHERE seq BETWEEN ? AND ?
+              AND (status IN ('pending', 'processing') OR updated_at >= ?)
+            GROUP BY status
+        """, (first_seq, last_seq, since))
+        
+        stats = {row[0]: row[1] for row in cursor.fetchall()}
+        conn.close()
+        
+        return stats
+    
+    def promote_starved(self, aging_seconds: int) -> int:
+        """Sobe uma faixa de prioridade os itens pendentes parados há muito tempo.
+        
+        Evita que trabalho de baixa prioridade espere indefinidamente atrás
+        de um fluxo contínuo de itens urgentes: a cada ``aging_seconds`` sem
+        ser processado, o item ganha uma faixa (até chegar a 0).
+        
+        Args:
+            aging_seconds: Tempo de espera para subir uma faixa (0 desativa)
+            
+        Returns:
+            Número de itens promovidos
+        """
+        if aging_seconds <= 0:
+            return 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE print_queue
+            SET priority = priority - 1,
+                updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+            WHERE status = 'pending' AND priority > 0 AND updated_at < ?
+        """, (self._cutoff(aging_seconds),))
+        promoted = cursor.rowcount
+        
+        self._commit(conn)
+        conn.close()
+        
+        return promoted
+    
+    def reclaim_processing(self, stale_seconds: float, owner: str) -> int:
+        """Devolve à fila os itens presos em processamento.
+        
+        Usado quando um processo assume o despacho: itens marcados como
+        processando por outro despachante (que morreu ou perdeu o lease)
+        há mais de ``stale_seconds`` voltam a pendente. Itens sem dono
+        (impressão direta de /print e /print/batch, que pode estar em
+        andamento em qualquer worker) não são tocados.
+        
+        Args:
+            stale_seconds: Tempo sem atualização para considerar o item preso
+            owner: ID do processador que está assumindo
+            
+        Returns:
+            Número de itens devolvidos
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id FROM print_queue
+            WHERE status = 'processing' AND updated_at < ?
+              AND claimed_by IS NOT NULL AND claimed_by != ?
+        """, (self._cutoff(stale_seconds), owner))
+        queue_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        
+        if queue_ids:
+            self.update_status_many(
+                queue_ids, QueueStatus.PENDING,
+                "Retomada após a troca do processo despachante"
+            )
+        return len(queue_ids)
+    
+    def signal_dispatcher(self, drain: bool = False):
+        """Avisa o processo despachante (em outro worker) que há trabalho.
+        
+        Args:
+            drain: Pede também o esvaziamento da fila (POST /queue/process)
+        """
+        conn = self._connect()
+        conn.executemany("""
+            INSERT INTO dispatcher_signals (name, seq) VALUES (?, 1)
+            ON CONFLICT (name) DO UPDATE SET seq = seq + 1
+        """, [(name,) for name in (('wake', 'drain') if drain else ('wake',))])
+        self._commit(conn)
+        conn.close()
+    
+    def get_dispatcher_signals(self) -> Dict[str, int]:
+        """Retorna o contador de cada tipo de aviso ao despachante."""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT name, seq FROM dispatcher_signals")
+        signals = {row[0]: row[1] for row in cursor.fetchall()}
+        conn.close()
+        
+        return signals
+    
+    def save_background_job(self, kind: str, job_id: str, state: Dict):
+        """Grava o estado de uma tarefa em segundo plano (visível a todos os workers).
+        
+        Args:
+            kind: Tipo da tarefa ("import", "drain")
+            job_id: ID da tarefa (ULID)
+            state: Estado serializável em JSON
+        """
+        conn = self._connect()
+        self._save_background_job(conn.cursor(), kind, job_id, state)
+        self._commit(conn)
+        conn.close()
+    
+    @staticmethod
+    def _save_background_job(cursor: sqlite3.Cursor, kind: str, job_id: str, state: Dict):
+        cursor.execute("""
+            INSERT INTO background_jobs (kind, id, state) VALUES (?, ?, ?)
+            ON CONFLICT (kind, id) DO UPDATE SET state = excluded.state
+        """, (kind, job_id, json.dumps(state, ensure_ascii=False)))
+    
+    def get_background_job(self, kind: str, job_id: str) -> Optional[Dict]:
+        """Obtém o estado gravado de uma tarefa (None se não existe)."""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT state FROM background_jobs WHERE kind = ? AND id = ?
+        """, (kind, job_id))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return json.loads(row[0]) if row else None
+    
+    def prune_background_jobs(self, kind: str, keep: int) -> int:
+        """Apaga as tarefas mais antigas de um tipo, mantendo as ``keep`` mais recentes.
+        
+        Returns:
+            Número de tarefas apagadas
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        # IDs são ULIDs: a ordem do ID é a ordem de criação
+        cursor.execute("""
+            DELETE FROM background_jobs
+            WHERE kind = ? AND id <= (
+                SELECT id FROM background_jobs WHERE kind = ?
+                ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+        """, (kind, kind, keep))
+        pruned = cursor.rowcount
+        
+        self._commit(conn)
+        conn.close()
+        
+        return pruned
+    
+    def get_lane_stats(self) -> Dict[int, int]:
+        """Retorna a profundidade da fila pendente por faixa de prioridade.
+        
+        Returns:
+            Dicionário {prioridade: itens pendentes}
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT priority, COUNT(*) as count
+            FROM print_queue
+            WHERE status = 'pending'
+            GROUP BY priority
+        """)
+        
+        stats = {row[0]: row[1] for row in cursor.fetchall()}
+        conn.close()
+        
+        return stats
+    
+    def get_client_stats(self) -> Dict[str, int]:
+        """Retorna o número de itens pendentes por cliente.
+        
+        Returns:
+            Dicionário {cliente: itens pendentes} (cliente '' = sem cliente)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT client_id, COUNT(*) as count
+            FROM print_queue
+            WHERE status = 'pending'
+            GROUP BY client_id
+        """)
+        
+        stats = {row[0] or '': row[1] for row in cursor.fetchall()}
+        conn.close()
+        
+        return stats
+    
+    def get_printer_stats(self) -> Dict[str, Dict[str, int]]:
+        """Retorna a profundidade da fila ativa por impressora.
+        
+        Returns:
+            Dicionário {impressora: {'pending': n, 'processing': n}}
+            (impressora '' = padrão)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT printer_name, status, COUNT(*) as count
+            FROM print_queue
+            WHERE status IN ('pending', 'processing')
+            GROUP BY printer_name, status
+        """)
+        
+        stats: Dict[str, Dict[str, int]] = {}
+        for printer_name, status, count in cursor.fetchall():
+            printer_stats = stats.setdefault(
+                printer_name or '', {'pending': 0, 'processing': 0}
+            )
+            printer_stats[status] = count
+        conn.close()
+        
+        return stats
+    
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict:
+        """Converte uma linha do banco em dicionário.
+        
+        O payload só é decodificado (e incluído) se a coluna foi selecionada.
+        """
+        item = {
             'id': row['id'],
             'created_at': row['created_at'],
             'updated_at': row['updated_at'],
             'status': row['status'],
-            'payload': json.loads(row['payload']),
             'attempts': row['attempts'],
             'error_message': row['error_message'],
-            'printer_name': row['printer_name']
+            'printer_name': row['printer_name'],
+            'priority': row['priority'],
+            'client_id': row['client_id']
         }
+        if 'payload' in row.keys():
+            item['payload'] = json.loads(row['payload'])
+        if 'zpl' in row.keys() and row['zpl']:
+            item['zpl'] = row['zpl']
+        return item
 
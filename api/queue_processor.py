@@ -1,18 +1,39 @@
 """Processador de fila que processa requisições pendentes automaticamente."""
-import threading
+import asyncio
+import math
+import sqlite3
 import time
 import logging
-from typing import Optional
-from .queue import PrintQueue, QueueStatus
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from .queue import PrintQueue, QueueStatus, new_queue_id
 from .printer import PrinterManager
 from .zpl_generator import ZPLGenerator
+from .scheduler import FairScheduler, ClientStats
+from .metrics import QUEUE_WAIT_SECONDS, QUEUE_PROCESSED, QUEUE_BATCH_SIZE, QUEUE_MERGED
+from .admission import DrainEstimator
 from config.config_loader import get_config
 
 logger = logging.getLogger(__name__)
 
+# Fração do tempo estimado para esvaziar a fila que cada lote cobre
+BATCH_DRAIN_FRACTION = 0.1
+
+# Quanto o lote pode crescer de um ciclo para o seguinte
+BATCH_GROWTH_FACTOR = 2
+
+# Intervalo (s) em que o despachante lê os avisos dos outros workers
+SIGNAL_POLL_SECONDS = 0.5
+
 
 class QueueProcessor:
-    """Processa requisições pendentes na fila automaticamente."""
+    """Processa requisições pendentes na fila automaticamente.
+    
+    Roda como uma tarefa ``asyncio`` no event loop da API. As chamadas
+    bloqueantes (SQLite, spooler do Windows, geração do ZPL) vão para threads
+    com ``asyncio.to_thread``, e a espera entre verificações é um
+    ``asyncio.Event``: ``wake()`` e ``stop()`` têm efeito imediato.
+    """
     
     def __init__(self, print_queue: PrintQueue, printer_manager: PrinterManager):
         """Inicializa o processador de fila.
@@ -26,159 +47,547 @@ class QueueProcessor:
         self.zpl_generator = ZPLGenerator()
         self.config = get_config()
         self.running = False
-        self.thread: Optional[threading.Thread] = None
+        self.task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        # Esvaziamento pedido: lotes seguidos, sem esperar check_interval
+        self._draining = False
+        # Job sendo enviado ao spooler (resultado incerto se cancelado)
+        self._spooling = False
         self.check_interval = self.config.get_queue_check_interval()
+        # Com vários workers, wake()/drain() dos outros chegam pelo banco
+        self.shared_dispatch = self.config.get_workers() > 1
+        self.lease_seconds = self.config.get_dispatcher_lease_seconds()
+        # Dono dos itens que este processador marca como processando
+        self.dispatcher_id = new_queue_id()
+        self._signals: Dict[str, int] = {}
+        self._signaled_at = 0.0
         self.max_retries = self.config.get_max_retries()
+        self.priority_aging = self.config.get_priority_aging_seconds()
+        self.idempotency_ttl = self.config.get_idempotency_ttl_seconds()
+        self.shutdown_grace = self.config.get_shutdown_grace_seconds()
+        self.batch_min_seconds = self.config.get_batch_min_seconds()
+        self.batch_max_seconds = self.config.get_batch_max_seconds()
+        self.batch_max_items = self.config.get_batch_max_items()
+        self.merge_identical = self.config.is_merge_identical_enabled()
+        self.pack_two_up = self.config.is_pack_two_up_enabled()
+        self.pack_wait_seconds = self.config.get_pack_wait_seconds()
+        # Quando o item mais antigo aguardando par deixa de esperar (epoch)
+        self._hold_until: Optional[float] = None
+        # Último lote escolhido e itens pendentes naquele momento
+        self.batch_size = 0
+        self.backlog = 0
+        self.scheduler = FairScheduler(
+            self.config.get_client_weights(), self.config.get_rate_limits()
+        )
+        self.client_stats = ClientStats()
+        self.drain_estimator = DrainEstimator(
+            default_labels_per_second=self.config.get_assumed_labels_per_second(),
+            printer_labels_per_second=self.config.get_printer_labels_per_second(),
+            default_printer=self.config.get_default_printer()
+        )
     
     def start(self):
-        """Inicia o processador em uma thread separada."""
+        """Inicia o processador como tarefa do event loop atual."""
         if self.running:
             logger.warning("Processador de fila já está rodando")
             return
         
+        self._loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
         self.running = True
-        self.thread = threading.Thread(target=self._process_loop, daemon=True)
-        self.thread.start()
+        self.task = self._loop.create_task(self._process_loop())
         logger.info("Processador de fila iniciado")
     
-    def stop(self):
-        """Para o processador."""
+    async def stop(self, grace: Optional[float] = None):
+        """Para o processador.
+        
+        Nenhum item novo é iniciado; o item em andamento tem até ``grace``
+        segundos para terminar antes de a tarefa ser cancelada.
+        
+        Args:
+            grace: Prazo para o item em andamento (padrão
+                ``queue.shutdown_grace_seconds``)
+        """
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
+        task, self.task = self.task, None
+        if task is None:
+            return
+        self._wake_event.set()
+        
+        grace = self.shutdown_grace if grace is None else grace
+        done, _ = await asyncio.wait({task}, timeout=grace)
+        if not done:
+            logger.warning(f"Processador não terminou em {grace}s, cancelando o item em andamento")
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
         logger.info("Processador de fila parado")
     
-    def _process_loop(self):
+    async def _process_loop(self):
         """Loop principal de processamento."""
+        try:
+            await asyncio.to_thread(self._take_over)
+        except Exception as e:
+            logger.error(f"Erro ao assumir o despacho da fila: {e}")
+        
         while self.running:
+            completed = 0
             try:
-                self._process_pending()
+                completed = await self._process_pending()
+                await asyncio.to_thread(
+                    self.print_queue.purge_idempotency_keys, self.idempotency_ttl
+                )
             except Exception as e:
                 logger.error(f"Erro no processamento da fila: {e}")
             
-            # Aguarda antes da próxima verificação
-            time.sleep(self.check_interval)
+            if not self.running:
+                break
+            
+            # Com backlog (ou esvaziamento pedido), segue para o próximo lote
+            # enquanto houver progresso; com a fila vazia ou a impressora
+            # falhando, volta ao ritmo de check_interval
+            if completed and (self._draining or self.backlog > self.batch_size):
+                continue
+            self._draining = False
+            
+            # Aguarda a próxima verificação (ou um wake() por item novo); um
+            # item aguardando par para o 2-up antecipa a verificação
+            timeout = self.check_interval
+            if self._hold_until is not None:
+                timeout = min(timeout, max(0.05, self._hold_until - time.time()))
+            await self._wait(timeout)
+            self._wake_event.clear()
     
-    def _process_pending(self):
-        """Processa requisições pendentes."""
-        # Obtém requisições pendentes
-        pending = self.print_queue.get_pending(limit=10)
+    def _take_over(self):
+        """Prepara o despacho neste processo (recém-eleito).
         
-        if not pending:
+        Itens que o despachante anterior deixou em processamento por mais que
+        o lease voltam a pendente, e os avisos já lidos são os atuais.
+        """
+        reclaimed = self.print_queue.reclaim_processing(self.lease_seconds, self.dispatcher_id)
+        if reclaimed:
+            logger.warning(f"{reclaimed} requisições presas em processamento voltaram à fila")
+        if self.shared_dispatch:
+            self._signals = self.print_queue.get_dispatcher_signals()
+    
+    async def _wait(self, timeout: float):
+        """Aguarda um wake() local ou, com vários workers, um aviso pelo banco."""
+        if not self.shared_dispatch:
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
             return
         
+        deadline = time.monotonic() + timeout
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(
+                    self._wake_event.wait(), min(remaining, SIGNAL_POLL_SECONDS)
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                if await asyncio.to_thread(self._check_signals):
+                    return
+            except Exception as e:
+                logger.warning(f"Erro ao ler avisos ao despachante: {e}")
+    
+    def _check_signals(self) -> bool:
+        """Indica se outro worker avisou sobre trabalho novo desde a última leitura."""
+        signals = self.print_queue.get_dispatcher_signals()
+        if signals == self._signals:
+            return False
+        if signals.get('drain', 0) != self._signals.get('drain', 0):
+            self._draining = True
+        self._signals = signals
+        return True
+    
+    def wake(self):
+        """Acorda o processador para verificar a fila sem esperar o intervalo.
+        
+        Pode ser chamado de qualquer thread. Sem o processador rodando neste
+        processo (outro worker é o despachante), o aviso vai pelo banco: a
+        chamada grava no SQLite e não deve ser feita no event loop.
+        """
+        loop = self._loop
+        if self.running and loop is not None:
+            loop.call_soon_threadsafe(self._wake_event.set)
+        elif self.shared_dispatch:
+            # O despachante lê os avisos a cada SIGNAL_POLL_SECONDS: avisos
+            # mais próximos que isso não o acordariam mais cedo
+            now = time.monotonic()
+            if now - self._signaled_at >= SIGNAL_POLL_SECONDS:
+                self._signaled_at = now
+                self._signal(drain=False)
+    
+    def drain(self):
+        """Processa a fila em lotes seguidos até esvaziá-la (ou parar de imprimir)."""
+        if self.running:
+            self._draining = True
+            self.wake()
+        elif self.shared_dispatch:
+            self._signal(drain=True)
+    
+    def _signal(self, drain: bool):
+        """Avisa o despachante de outro worker pelo banco."""
+        try:
+            self.print_queue.signal_dispatcher(drain)
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao avisar o despachante da fila: {e}")
+    
+    def _choose_batch_size(self) -> int:
+        """Escolhe quantos itens retirar da fila no próximo lote.
+        
+        O lote cobre ``BATCH_DRAIN_FRACTION`` do tempo estimado para esvaziar
+        a fila (pela vazão física de cada impressora), entre
+        ``batch_min_seconds`` e ``batch_max_seconds`` de impressão. Com a
+        fila leve os lotes são curtos e um item urgente espera pouco pela
+        próxima escolha; com backlog os lotes crescem e a fila é consultada
+        menos vezes. O lote cresce no máximo ``BATCH_GROWTH_FACTOR`` vezes
+        por ciclo, para que uma estimativa errada não o leve direto ao máximo.
+        
+        Returns:
+            Tamanho do lote (ao menos 1, no máximo ``batch_max_items``)
+        """
+        pending = {
+            printer_name: counts.get('pending', 0)
+            for printer_name, counts in self.print_queue.get_printer_stats().items()
+        }
+        self.backlog = sum(pending.values())
+        if not self.backlog:
+            return 1
+        
+        drain = self.drain_estimator.drain_seconds(pending)
+        batch_seconds = min(
+            max(drain * BATCH_DRAIN_FRACTION, self.batch_min_seconds),
+            self.batch_max_seconds
+        )
+        size = math.ceil(batch_seconds * self.backlog / drain) if drain > 0 else self.backlog
+        size = min(size, max(self.batch_size, 1) * BATCH_GROWTH_FACTOR)
+        return max(1, min(size, self.backlog, self.batch_max_items))
+    
+    def _claim(self) -> list:
+        """Dimensiona o próximo lote e escolhe as requisições que o compõem."""
+        self.batch_size = self._choose_batch_size()
+        if not self.backlog:
+            return []
+        QUEUE_BATCH_SIZE.observe(self.batch_size)
+        return self._next_batch(self.batch_size)
+    
+    def _next_batch(self, limit: int) -> list:
+        """Escolhe as próximas requisições a processar.
+        
+        Promove itens parados há muito tempo e intercala os clientes
+        conforme os pesos configurados (Weighted Fair Queuing).
+        
+        Args:
+            limit: Número máximo de requisições
+            
+        Returns:
+            Lista de requisições na ordem de processamento
+        """
+        self.print_queue.promote_starved(self.priority_aging)
+        heads = self.print_queue.get_pending_by_client(limit)
+        return self.scheduler.select(heads, limit)
+    
+    async def _process_pending(self) -> int:
+        """Processa requisições pendentes.
+        
+        Returns:
+            Número de requisições impressas com sucesso
+        """
+        # Obtém requisições pendentes (prioridade, depois fatia justa por cliente)
+        pending = await asyncio.to_thread(self._claim)
+        
+        if not pending:
+            return 0
+        
         logger.info(f"Processando {len(pending)} requisições pendentes")
         
-        for item in pending:
+        completed = 0
+        for items, payload, copies in self._plan_jobs(pending):
             if not self.running:
                 break
+            completed += await self._process_job(items, payload, copies)
+        return completed
+    
+    def _group_identical(self, items: list) -> List[list]:
+        """Agrupa itens seguidos e idênticos (mesma impressora e payload).
+        
+        Para cada impressora, um item igual ao anterior daquela impressora
+        entra no mesmo grupo, mesmo que itens de outras impressoras estejam
+        entre eles; a ordem de impressão de cada impressora é preservada.
+        
+        Returns:
+            Grupos na ordem do primeiro item de cada um
+        """
+        if not self.merge_identical:
+            return [[item] for item in items]
+        
+        groups = []
+        open_groups: Dict[str, list] = {}
+        for item in items:
+            printer_name = item.get('printer_name') or ''
+            group = open_groups.get(printer_name)
+            if group is not None and group[0]['payload'] == item['payload']:
+                group.append(item)
+            else:
+                group = [item]
+                groups.append(group)
+                open_groups[printer_name] = group
+        return groups
+    
+    def _plan_jobs(self, items: list) -> List[Tuple[list, dict, int]]:
+        """Monta os jobs do lote: itens atendidos, payload a gerar e cópias.
+        
+        Sem empacotamento, cada grupo de itens idênticos é um job. Com
+        ``queue.pack_two_up``, etiquetas de produto de uma coluna da mesma
+        impressora são juntadas duas a duas em um formato de duas colunas
+        (um grupo idêntico de n itens vira n/2 cópias da etiqueta dupla). Só
+        itens seguidos daquela impressora formam par, preservando a ordem.
+        Um item sem par espera até ``pack_wait_seconds`` desde que entrou na
+        fila (fica pendente para o próximo lote); depois sai sozinho.
+        
+        Returns:
+            Lista de (itens, payload, cópias) na ordem de impressão
+        """
+        groups = self._group_identical(items)
+        self._hold_until = None
+        if not self.pack_two_up:
+            return [(group, group[0]['payload'], len(group)) for group in groups]
+        
+        jobs: List[Optional[Tuple[list, dict, int]]] = []
+        # Impressora -> (posição reservada em jobs, item aguardando par)
+        waiting: Dict[str, Tuple[int, dict]] = {}
+        for group in groups:
+            printer_name = group[0].get('printer_name') or ''
+            payload = group[0]['payload']
+            if not self._packable(payload):
+                # Item que não pode ser empacotado encerra a espera por par
+                if printer_name in waiting:
+                    slot, single = waiting.pop(printer_name)
+                    jobs[slot] = ([single], single['payload'], 1)
+                jobs.append((group, payload, len(group)))
+                continue
             
-            queue_id = item['id']
-            payload = item['payload']
-            printer_name = item.get('printer_name')
-            
-            # Marca como processando
-            self.print_queue.mark_processing(queue_id)
-            
-            try:
-                # Processa a impressão
-                success = self._process_print_request(payload, printer_name)
-                
-                if success:
-                    self.print_queue.mark_completed(queue_id)
-                    logger.info(f"Requisição {queue_id} processada com sucesso")
-                else:
-                    # Verifica se excedeu tentativas
-                    attempts = item.get('attempts', 0) + 1
-                    if attempts >= self.max_retries:
-                        self.print_queue.mark_failed(
-                            queue_id, 
-                            f"Falha após {attempts} tentativas"
-                        )
-                        logger.error(f"Requisição {queue_id} falhou após {attempts} tentativas")
-                    else:
-                        # Volta para pendente para nova tentativa
-                        self.print_queue.update_status(queue_id, QueueStatus.PENDING)
-                        logger.warning(f"Requisição {queue_id} falhou, será tentada novamente")
-            
-            except Exception as e:
-                error_msg = str(e)
-                attempts = item.get('attempts', 0) + 1
-                
-                if attempts >= self.max_retries:
-                    self.print_queue.mark_failed(queue_id, error_msg)
-                    logger.error(f"Erro ao processar {queue_id}: {error_msg}")
-                else:
-                    self.print_queue.update_status(queue_id, QueueStatus.PENDING, error_msg)
-                    logger.warning(f"Erro ao processar {queue_id}, será tentado novamente: {error_msg}")
-    
-    def _process_print_request(self, payload: dict, printer_name: Optional[str] = None) -> bool:
+            if printer_name in waiting:
+                slot, single = waiting.pop(printer_name)
+                partner = group.pop(0)
+                jobs[slot] = ([single, partner], self._pack(single['payload'], payload), 1)
+            pairs = len(group) // 2
+            if pairs:
+                jobs.append((group[:2 * pairs], self._pack(payload, payload), pairs))
+            if len(group) % 2:
+                waiting[printer_name] = (len(jobs), group[-1])
+                jobs.append(None)
+        
+        now = time.time()
+        for slot, single in waiting.values():
+            created = self._created_timestamp(single)
+            deadline = (created or now) + self.pack_wait_seconds
+            if deadline > now:
+                # Ainda pode ganhar um par no próximo lote
+                if self._hold_until is None or deadline < self._hold_until:
+                    self._hold_until = deadline
+            else:
+                jobs[slot] = ([single], single['payload'], 1)
+        return [job for job in jobs if job is not None]
+    
+    @staticmethod
+    def _packable(payload: dict) -> bool:
+        """Indica se o payload é uma etiqueta de produto de uma coluna."""
+        return (
+            payload.get('label_type', 'produto') == 'produto'
+            and not payload.get('duas_colunas')
+        )
+    
+    @staticmethod
+    def _pack(left: dict, right: dict) -> dict:
+        """Payload de duas colunas com os dados de duas etiquetas de uma coluna."""
+        return {
+            "label_type": "produto",
+            "data": left.get('data', {}),
+            "zpl_template": None,
+            "duas_colunas": True,
+            "data_col2": right.get('data', {}),
+        }
+    
+    async def _process_job(self, items: list, payload: dict, copies: int) -> int:
+        """Imprime um job e registra o resultado de cada item atendido por ele.
+        
+        Args:
+            items: Itens da fila atendidos pelo job (um ou mais)
+            payload: Payload a gerar
+            copies: Vezes que o ZPL gerado sai (^PQ)
+        
+        Returns:
+            Número de itens impressos com sucesso
+        """
+        await asyncio.to_thread(self._begin, items)
+        
+        # ZPL gerado na importação vale para o payload do próprio item (não
+        # para um par 2-up montado aqui)
+        zpl = items[0].get('zpl') if payload == items[0]['payload'] else None
+        
+        error_msg = None
+        try:
+            success = await self._process_print_request(
+                payload, items[0].get('printer_name'), copies=copies,
+                labels=len(items), zpl=zpl
+            )
+        except asyncio.CancelledError:
+            self._interrupted(items)
+            raise
+        except Exception as e:
+            success = False
+            error_msg = str(e)
+        finally:
+            self._spooling = False
+        
+        await asyncio.to_thread(self._finish, items, success, error_msg)
+        return len(items) if success else 0
+    
+    def _begin(self, items: list):
+        """Marca os itens como processando."""
+        self.print_queue.update_status_many(
+            [item['id'] for item in items], QueueStatus.PROCESSING,
+            claimed_by=self.dispatcher_id
+        )
+        for item in items:
+            self._observe_wait(item)
+        if len(items) > 1:
+            QUEUE_MERGED.inc(len(items))
+            logger.info(f"{len(items)} requisições agrupadas em um job: {items[0]['id']}...")
+    
+    def _finish(self, items: list, success: bool, error_msg: Optional[str] = None):
+        """Registra o resultado de uma tentativa (concluído, nova tentativa ou falha)."""
+        if success:
+            self.print_queue.update_status_many([item['id'] for item in items], QueueStatus.COMPLETED)
+            for item in items:
+                self._record(item, True)
+                logger.info(f"Requisição {item['id']} processada com sucesso")
+            return
+        
+        # Cada item tem suas próprias tentativas
+        retry, failed = [], []
+        for item in items:
+            attempts = item.get('attempts', 0) + 1
+            if attempts >= self.max_retries:
+                failed.append(item)
+                logger.error(f"Requisição {item['id']} falhou após {attempts} tentativas: {error_msg}")
+            else:
+                retry.append(item)
+                logger.warning(f"Requisição {item['id']} falhou, será tentada novamente: {error_msg}")
+        
+        if failed:
+            self.print_queue.update_status_many(
+                [item['id'] for item in failed], QueueStatus.FAILED,
+                error_msg or f"Falha após {self.max_retries} tentativas"
+            )
+            for item in failed:
+                self._record(item, False)
+        if retry:
+            # Volta para pendente para nova tentativa
+            self.print_queue.update_status_many(
+                [item['id'] for item in retry], QueueStatus.PENDING, error_msg
+            )
+            QUEUE_PROCESSED.inc(len(retry), result='retry')
+    
+    def _interrupted(self, items: list):
+        """Trata itens cancelados pelo prazo de encerramento.
+        
+        Antes do envio ao spooler os itens voltam a pendente; durante o envio
+        não há como saber se as etiquetas saíram, então eles são marcados
+        como falha para conferência (reenviar poderia imprimir em dobro).
+        """
+        queue_ids = [item['id'] for item in items]
+        try:
+            if self._spooling:
+                self.print_queue.update_status_many(
+                    queue_ids, QueueStatus.FAILED,
+                    "API encerrada durante o envio à impressora; confira se a etiqueta foi impressa"
+                )
+                for item in items:
+                    self._record(item, False)
+            else:
+                self.print_queue.update_status_many(
+                    queue_ids, QueueStatus.PENDING, "Interrompida pelo encerramento da API"
+                )
+        except Exception as e:
+            logger.error(f"Erro ao registrar interrupção de {queue_ids}: {e}")
+        logger.warning(f"Requisições {queue_ids} interrompidas pelo encerramento")
+    
+    def _record(self, item: dict, success: bool):
+        """Registra o resultado final de um item nas estatísticas por cliente."""
+        self.client_stats.record(
+            self.scheduler.client_key(item.get('client_id')), item.get('created_at'), success
+        )
+        QUEUE_PROCESSED.inc(result='completed' if success else 'failed')
+    
+    @staticmethod
+    def _created_timestamp(item: dict) -> Optional[float]:
+        """Momento (epoch) em que o item entrou na fila."""
+        try:
+            created = datetime.fromisoformat(item['created_at']).replace(tzinfo=timezone.utc)
+        except (KeyError, TypeError, ValueError):
+            return None
+        return created.timestamp()
+    
+    def _observe_wait(self, item: dict):
+        """Registra nas métricas quanto tempo o item esperou na fila."""
+        created = self._created_timestamp(item)
+        if created is None:
+            return
+        QUEUE_WAIT_SECONDS.observe(
+            max(0.0, time.time() - created),
+            priority=item.get('priority', '')
+        )
+    
+    async def _process_print_request(self, payload: dict, printer_name: Optional[str] = None,
+                                     copies: int = 1, labels: int = 1,
+                                     zpl: Optional[str] = None) -> bool:
         """Processa uma requisição de impressão individual.
         
         Args:
             payload: Dados da requisição
             printer_name: Nome da impressora (opcional)
+            copies: Vezes que o ZPL gerado sai (^PQ)
+            labels: Itens da fila atendidos por este job
+            zpl: ZPL do payload já gerado e validado (opcional)
             
         Returns:
             True se impressão foi bem-sucedida
         """
+        start = time.perf_counter()
+        
         # Verifica se impressora está disponível
-        if not self.printer_manager.is_printer_available(printer_name):
+        if not await self.printer_manager.is_printer_available_async(printer_name):
             logger.warning(f"Impressora não disponível: {printer_name or 'padrão'}")
             return False
         
-        # Extrai tipo de etiqueta e dados
-        label_type = payload.get('label_type', 'produto')
-        data = payload.get('data', {})
-        
-        # Gera comando ZPL
-        if label_type == 'produto':
-            if payload.get('duas_colunas'):
-                data_col2 = payload.get('data_col2') or data
-                zpl = self.zpl_generator.generate_dual_column_label(data, data_col2)
-            else:
-                zpl = self.zpl_generator.generate_product_label(data)
-        else:
-            # Usa template customizado se fornecido
-            template = payload.get('zpl_template')
-            zpl = self.zpl_generator.generate_custom_label(data, template)
-        
-        # Valida ZPL
-        if not self.zpl_generator.validate_zpl(zpl):
-            logger.error("Comando ZPL inválido gerado")
-            return False
+        if zpl is None:
+            # Gera comando ZPL (uma vez para todas as cópias)
+            zpl = await asyncio.to_thread(self.zpl_generator.render_payload, payload)
+            
+            # Valida ZPL
+            if not self.zpl_generator.validate_zpl(zpl):
+                logger.error("Comando ZPL inválido gerado")
+                return False
+        zpl = self.zpl_generator.with_quantity(zpl, copies)
         
         # Envia para impressora
-        return self.printer_manager.print_zpl(zpl, printer_name)
-    
-    def process_now(self) -> int:
-        """Força processamento imediato da fila.
-        
-        Returns:
-            Número de requisições processadas
-        """
-        count = 0
-        pending = self.print_queue.get_pending(limit=50)
-        
-        for item in pending:
-            queue_id = item['id']
-            payload = item['payload']
-            printer_name = item.get('printer_name')
-            
-            self.print_queue.mark_processing(queue_id)
-            
-            try:
-                if self._process_print_request(payload, printer_name):
-                    self.print_queue.mark_completed(queue_id)
-                    count += 1
-                else:
-                    attempts = item.get('attempts', 0) + 1
-                    if attempts >= self.max_retries:
-                        self.print_queue.mark_failed(queue_id, "Falha na impressão")
-                    else:
-                        self.print_queue.update_status(queue_id, QueueStatus.PENDING)
-            except Exception as e:
-                self.print_queue.mark_failed(queue_id, str(e))
+        self._spooling = True
+        if not await self.printer_manager.print_zpl_async(zpl, printer_name):
+            return False
         
-        return count
-
+        # Vazão alimenta o tamanho dos lotes e o controle de admissão; cada
+        # cópia do ^PQ é um avanço de etiqueta (um par 2-up sai em uma cópia)
+        self.drain_estimator.record(
+            printer_name, time.perf_counter() - start, labels, feeds=copies
+        )
+        return True
@@ -0,0 +1,146 @@
+"""Limite de taxa (token bucket) por cliente da API."""
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from .scheduler import DEFAULT_CLIENT
+
+
+class TokenBucket:
+    """Balde de fichas: ``rate`` fichas por segundo, até ``capacity`` acumuladas."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Inicializa o balde cheio.
+
+        Args:
+            rate: Fichas repostas por segundo
+            capacity: Máximo acumulado (rajada); padrão = 1 segundo de taxa
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até haver fichas para ``amount`` (0 = disponível agora).
+
+        Pedidos maiores que a capacidade são aceitos com o balde cheio e o
+        deixam negativo, atrasando os próximos na mesma proporção.
+        """
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        """Consome fichas (chamar após ``wait_time`` retornar 0)."""
+        self.tokens -= amount
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Consome fichas mesmo sem saldo, deixando o balde negativo.
+
+        Returns:
+            Segundos até o saldo voltar a zero (0 = havia fichas suficientes)
+        """
+        self._refill(now)
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate)
+
+
+class RateLimiter:
+    """Limites de requisições/s e etiquetas/s por cliente (X-Client-Id).
+
+    Só os clientes listados na configuração têm baldes próprios; os demais
+    (sem header ou com um ID qualquer) dividem os baldes de ``default``.
+    Assim trocar o X-Client-Id a cada requisição não contorna o limite, e o
+    número de baldes fica limitado à configuração. Uma requisição só consome
+    fichas se couber nos dois limites.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict]] = None):
+        """Inicializa o limitador.
+
+        Args:
+            limits: {cliente: {requests_per_second, labels_per_second,
+                requests_burst, labels_burst}}; taxa 0 ou ausente = sem limite
+        """
+        self.limits = limits or {}
+        self._buckets: Dict[str, Dict[str, Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+
+    def client_key(self, client_id: Optional[str]) -> str:
+        """Cliente cujos limites se aplicam (o próprio, se configurado, ou "default")."""
+        return client_id if client_id in self.limits else DEFAULT_CLIENT
+
+    def _client_buckets(self, client_id: str) -> Dict[str, Optional[TokenBucket]]:
+        buckets = self._buckets.get(client_id)
+        if buckets is None:
+            limits = self.limits.get(client_id) or {}
+            buckets = {}
+            for kind in ('requests', 'labels'):
+                rate = limits.get(f'{kind}_per_second') or 0
+                buckets[kind] = (
+                    TokenBucket(rate, limits.get(f'{kind}_burst')) if rate > 0 else None
+                )
+            self._buckets[client_id] = buckets
+        return buckets
+
+    def acquire(self, client_id: Optional[str], labels: int = 1) -> float:
+        """Tenta admitir uma requisição.
+
+        Args:
+            client_id: Cliente (None = "default")
+            labels: Etiquetas na requisição (0 = cobradas depois, com ``reserve_labels``)
+
+        Returns:
+            0 se admitida; senão, segundos até poder tentar de novo
+        """
+        if not self.limits:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._client_buckets(self.client_key(client_id))
+            amounts = {'requests': 1, 'labels': labels}
+            charged = [
+                (bucket, amounts[kind])
+                for kind, bucket in buckets.items() if bucket and amounts[kind]
+            ]
+            wait = max((bucket.wait_time(amount, now) for bucket, amount in charged), default=0.0)
+            if wait > 0:
+                return wait
+            for bucket, amount in charged:
+                bucket.take(amount)
+            return 0.0
+
+    def reserve_labels(self, client_id: Optional[str], labels: int) -> float:
+        """Cobra etiquetas de trabalho já aceito (blocos de uma importação).
+
+        Nunca recusa: as fichas são consumidas mesmo sem saldo, e quem chamou
+        deve esperar o tempo retornado antes de enfileirar as etiquetas. Assim
+        uma importação entra na fila no ritmo de ``labels_per_second`` do
+        cliente, e as demais requisições dele disputam o mesmo saldo.
+
+        Args:
+            client_id: Cliente (None = "default")
+            labels: Etiquetas a enfileirar
+
+        Returns:
+            Segundos a esperar (0 = dentro do limite ou sem limite)
+        """
+        if not self.limits:
+            return 0.0
+        with self._lock:
+            bucket = self._client_buckets(self.client_key(client_id))['labels']
+            return bucket.reserve(labels, time.monotonic()) if bucket else 0.0
+
+
+def retry_after_header(seconds: float) -> str:
+    """Valor do header Retry-After (segundos inteiros, mínimo 1)."""
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,102 @@
+"""Geração de ZPL em paralelo (vários processos) para lotes grandes."""
+import itertools
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RenderPool:
+    """Distribui a geração de ZPL de lotes grandes entre processos.
+
+    A geração é Python puro e fica presa ao GIL: um lote grande usa um
+    núcleo só. Com ``workers`` > 0 os blocos são enviados a um pool de
+    processos (criado no primeiro uso, com ``spawn`` - seguro com as threads
+    da API) e os resultados voltam na ordem de entrada, com no máximo
+    ``2 * workers`` blocos em andamento para limitar a memória. As
+    importações geram (e validam) o ZPL de cada bloco aqui e o guardam na
+    fila, de onde o processador o imprime sem gerar de novo.
+
+    Lotes com menos de ``min_labels`` itens são gerados no próprio processo:
+    abaixo disso, enviar os dados aos processos custa mais do que ganha.
+    """
+
+    def __init__(self, workers: int = 0, min_labels: int = 5000):
+        """Inicializa o pool (sem iniciar processos).
+
+        Args:
+            workers: Processos de geração (0 = sempre no próprio processo)
+            min_labels: Tamanho mínimo do lote para usar o pool
+        """
+        self.workers = max(0, int(workers))
+        self.min_labels = min_labels
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info(f"Pool de geração de ZPL iniciado com {self.workers} processos")
+            return self._executor
+
+    def close(self):
+        """Encerra os processos do pool (se iniciados)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def map_ordered(self, fn: Callable[[Any], Any], chunks: Iterable,
+                    weight: Callable[[Any], int] = len,
+                    min_items: Optional[int] = None) -> Iterator:
+        """Aplica ``fn`` a cada bloco, devolvendo os resultados na ordem dos blocos.
+
+        Os primeiros blocos são lidos até somarem ``min_items`` itens; se a
+        entrada acabar antes, tudo é processado no próprio processo. A
+        entrada é consumida aos poucos (não precisa caber na memória).
+
+        Args:
+            fn: Função de nível de módulo (enviada aos processos)
+            chunks: Blocos de trabalho
+            weight: Itens em um bloco
+            min_items: Tamanho mínimo para usar o pool (padrão ``min_labels``)
+
+        Returns:
+            Gerador com ``fn(bloco)`` para cada bloco, na ordem de entrada
+        """
+        threshold = self.min_labels if min_items is None else min_items
+        chunks = iter(chunks)
+        buffered, count = [], 0
+        if self.workers:
+            for chunk in chunks:
+                buffered.append(chunk)
+                count += weight(chunk)
+                if count >= threshold:
+                    break
+
+        if not self.workers or count < threshold:
+            for chunk in itertools.chain(buffered, chunks):
+                yield fn(chunk)
+            return
+
+        executor = self._get_executor()
+        pending = deque()
+        try:
+            for chunk in itertools.chain(buffered, chunks):
+                pending.append(executor.submit(fn, chunk))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Consumidor desistiu no meio: não gera os blocos restantes
+            for future in pending:
+                future.cancel()
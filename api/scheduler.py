@@ -0,0 +1,192 @@
+"""Escalonamento justo (ponderado) da fila entre clientes da API."""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_CLIENT = "default"
+
+
+class FairScheduler:
+    """Escolhe os próximos itens da fila com Weighted Fair Queuing.
+
+    Usa stride scheduling: cada cliente tem um "passo" virtual que avança
+    1/peso a cada item atendido, e o próximo item vem sempre do cliente com
+    menor passo. Assim cada cliente recebe uma fatia da vazão proporcional
+    ao seu peso, independente do tamanho do lote que enviou.
+
+    A prioridade continua valendo acima da justiça: a disputa entre
+    clientes acontece apenas entre os itens da faixa mais urgente.
+
+    O header X-Client-Id é livre: só os clientes configurados têm fatia
+    própria, e os demais dividem a de ``DEFAULT_CLIENT``. Assim o estado do
+    escalonador não cresce com IDs inventados.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 clients: Optional[Iterable[str]] = None):
+        """Inicializa o escalonador.
+
+        Args:
+            weights: Peso por cliente (ausente = 1)
+            clients: Outros clientes configurados (ex.: com limite de taxa)
+        """
+        self.weights = weights or {}
+        self.clients = set(self.weights) | set(clients or ())
+        self._pass: Dict[str, float] = {}
+        self._virtual_time = 0.0
+
+    def client_key(self, client_id: Optional[str]) -> str:
+        """Cliente cuja fatia se aplica (o próprio, se configurado, ou "default")."""
+        return client_id if client_id in self.clients else DEFAULT_CLIENT
+
+    def _weight(self, client_id: str) -> float:
+        weight = self.weights.get(client_id or DEFAULT_CLIENT, 1)
+        return max(float(weight), 0.001)
+
+    def select(self, heads: Dict[str, List[Dict]], limit: int) -> List[Dict]:
+        """Intercala os itens pendentes dos clientes conforme os pesos.
+
+        Args:
+            heads: Itens pendentes por cliente, cada lista já na ordem
+                prioridade + FIFO
+            limit: Número máximo de itens a escolher
+
+        Returns:
+            Itens escolhidos, na ordem em que devem ser processados
+        """
+        heads = self._group(heads)
+        positions = {client_id: 0 for client_id in heads}
+        # Só os clientes com trabalho pendente ficam no escalonador; o que
+        # volta a ter trabalho entra no tempo virtual atual, sem "crédito"
+        # acumulado do período em que ficou ocioso
+        self._pass = {
+            client_id: max(self._pass.get(client_id, 0.0), self._virtual_time)
+            for client_id in heads
+        }
+
+        selected = []
+        while len(selected) < limit:
+            candidates = [
+                c for c, items in heads.items() if positions[c] < len(items)
+            ]
+            if not candidates:
+                break
+            best_priority = min(
+                heads[c][positions[c]].get('priority', 0) for c in candidates
+            )
+            candidates = [
+                c for c in candidates
+                if heads[c][positions[c]].get('priority', 0) == best_priority
+            ]
+            client_id = min(candidates, key=lambda c: (self._pass[c], c))
+
+            selected.append(heads[client_id][positions[client_id]])
+            positions[client_id] += 1
+            self._virtual_time = self._pass[client_id]
+            self._pass[client_id] += 1.0 / self._weight(client_id)
+
+        return selected
+
+    def _group(self, heads: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """Junta os itens dos clientes não configurados em ``DEFAULT_CLIENT``."""
+        grouped: Dict[str, List[List[Dict]]] = {}
+        for client_id, items in heads.items():
+            grouped.setdefault(self.client_key(client_id), []).append(items)
+        return {
+            client_id: lists[0] if len(lists) == 1 else sorted(
+                (item for items in lists for item in items), key=_queue_order
+            )
+            for client_id, lists in grouped.items()
+        }
+
+
+def _queue_order(item: Dict):
+    """Ordem prioridade + FIFO de um item pendente."""
+    return item.get('priority', 0), item.get('created_at') or '', item['id']
+
+
+class ClientStats:
+    """Latência e vazão por cliente, mantidas em memória pelo processador.
+
+    Quem registra passa o cliente já agrupado (``FairScheduler.client_key``),
+    para que o número de entradas fique limitado aos clientes configurados.
+    """
+
+    def __init__(self, window_seconds: int = 60):
+        """Inicializa as estatísticas.
+
+        Args:
+            window_seconds: Janela usada para calcular a vazão recente
+        """
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Dict] = {}
+
+    def record(self, client_id: Optional[str], created_at: Optional[str],
+               success: bool):
+        """Registra a conclusão (ou falha definitiva) de um item.
+
+        Args:
+            client_id: Cliente que enviou o item
+            created_at: Instante de criação do item (UTC, formato do SQLite)
+            success: True se impresso, False se falhou
+        """
+        now = time.time()
+        latency = None
+        if created_at:
+            try:
+                created = datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc)
+                latency = max(0.0, now - created.timestamp())
+            except ValueError:
+                pass
+
+        with self._lock:
+            stats = self._clients.setdefault(client_id or DEFAULT_CLIENT, {
+                'completed': 0,
+                'failed': 0,
+                'latency_total': 0.0,
+                'latency_count': 0,
+                'latency_max': 0.0,
+                'recent': deque(),
+            })
+            if success:
+                stats['completed'] += 1
+                stats['recent'].append(now)
+            else:
+                stats['failed'] += 1
+            if latency is not None:
+                stats['latency_total'] += latency
+                stats['latency_count'] += 1
+                stats['latency_max'] = max(stats['latency_max'], latency)
+            self._trim(stats['recent'], now)
+
+    def _trim(self, recent: deque, now: float):
+        while recent and recent[0] < now - self.window_seconds:
+            recent.popleft()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Retorna as estatísticas atuais por cliente.
+
+        Returns:
+            Dicionário {cliente: {completed, failed, avg_latency_seconds,
+            max_latency_seconds, throughput_per_minute}}
+        """
+        now = time.time()
+        result = {}
+        with self._lock:
+            for client_id, stats in self._clients.items():
+                self._trim(stats['recent'], now)
+                count = stats['latency_count']
+                result[client_id] = {
+                    'completed': stats['completed'],
+                    'failed': stats['failed'],
+                    'avg_latency_seconds': round(stats['latency_total'] / count, 3) if count else None,
+                    'max_latency_seconds': round(stats['latency_max'], 3) if count else None,
+                    'throughput_per_minute': round(
+                        len(stats['recent']) * 60 / self.window_seconds, 2
+                    ),
+                }
+        return result
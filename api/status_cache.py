@@ -0,0 +1,127 @@
+"""Cache das respostas de status, atualizado em segundo plano."""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StatusCache:
+    """Mantém respostas caras (spooler + SQLite) prontas para consulta.
+
+    Uma thread recalcula cada resposta a cada ``ttl`` segundos, então os
+    painéis que consultam /status e /printers não geram enumerações extras
+    no spooler. Cada resposta tem um ETag derivado do conteúdo, permitindo
+    responder 304 quando nada mudou.
+
+    Com ``shared_dir``, as respostas também são gravadas em arquivos, para
+    que vários workers compartilhem o estado das impressoras: só o processo
+    que roda a atualização (o despachante eleito) consulta o spooler.
+    """
+
+    def __init__(self, builders: Dict[str, Callable[[], Dict]], ttl: float = 5,
+                 shared_dir: Optional[Path] = None):
+        """Inicializa o cache.
+
+        Args:
+            builders: Função que monta cada resposta, por nome
+            ttl: Intervalo de atualização em segundos (0 desativa o cache)
+            shared_dir: Diretório para compartilhar as respostas entre processos
+        """
+        self.builders = builders
+        self.ttl = ttl
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        if self.shared_dir:
+            self.shared_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: Dict[str, Tuple[Dict, str, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Inicia a atualização em segundo plano."""
+        if self.ttl <= 0 or self.thread:
+            return
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Para a atualização em segundo plano."""
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def get(self, name: str) -> Tuple[Dict, str]:
+        """Obtém uma resposta e seu ETag.
+
+        Calcula na hora se ainda não há valor ou se ele está velho demais
+        (atualização em segundo plano parada ou atrasada).
+
+        Returns:
+            (corpo da resposta, ETag)
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or time.monotonic() - entry[2] > self.ttl:
+            entry = self._read_shared(name) or entry
+        if entry is None or time.monotonic() - entry[2] > self.ttl * 3:
+            entry = self._refresh(name)
+        return entry[0], entry[1]
+
+    def _refresh(self, name: str) -> Tuple[Dict, str, float]:
+        body = self.builders[name]()
+        digest = hashlib.sha1(
+            json.dumps(body, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        entry = (body, f'"{digest[:20]}"', time.monotonic())
+        with self._lock:
+            self._entries[name] = entry
+        self._write_shared(name, entry)
+        return entry
+
+    def _write_shared(self, name: str, entry: Tuple[Dict, str, float]):
+        if not self.shared_dir:
+            return
+        path = self.shared_dir / f"{name}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(
+                json.dumps({"body": entry[0], "etag": entry[1], "updated_at": time.time()},
+                           default=str),
+                encoding='utf-8'
+            )
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Erro ao compartilhar cache de {name}: {e}")
+
+    def _read_shared(self, name: str) -> Optional[Tuple[Dict, str, float]]:
+        """Lê a resposta gravada por outro processo, se ainda estiver válida."""
+        if not self.shared_dir:
+            return None
+        try:
+            data = json.loads((self.shared_dir / f"{name}.json").read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        age = time.time() - data["updated_at"]
+        if age > self.ttl * 3:
+            return None
+        entry = (data["body"], data["etag"], time.monotonic() - max(age, 0.0))
+        with self._lock:
+            self._entries[name] = entry
+        return entry
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            for name in self.builders:
+                try:
+                    self._refresh(name)
+                except Exception as e:
+                    logger.error(f"Erro ao atualizar cache de {name}: {e}")
+            self._stop.wait(self.ttl)
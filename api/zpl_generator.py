@@ -1,8 +1,22 @@
 """Gerador de comandos ZPL para etiquetas.
 Compatível com layout do Sistema de Etiquetas v07.2 (50x25mm, 2 colunas).
 """
-from typing import Dict, Optional
+import itertools
+import re
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 from config.config_loader import get_config
+from .metrics import stage_timer
+
+# Comandos de formato (um ^ isolado; ^^ é texto escapado)
+_FORMAT_START = re.compile(r'(?<!\^)\^XA')
+_QUANTITY = re.compile(r'(?<!\^)\^PQ(\d+)')
+# Serialização (^SN/^SF) muda de valor a cada cópia de um ^PQ
+_SERIALIZATION = re.compile(r'(?<!\^)\^S[NF]')
+
+# Campos de texto da etiqueta de produto (render_product_batch)
+_PRODUCT_TEXT_FIELDS = ('codigo', 'descricao', 'descricao2', 'pedido', 'lote', 'validade')
+# Marca campo ausente na linha (ref ausente usa o código)
+_MISSING = object()
 
 
 class ZPLGenerator:
@@ -28,34 +42,12 @@ class ZPLGenerator:
         text = text.replace('\\', '\\\\')
         return text
     
-    def generate_product_label(self, data: Dict) -> str:
-        """Gera comando ZPL para etiqueta de produto.
-        
-        Args:
-            data: Dicionário com dados do produto:
-                - codigo: Código do produto (usado como REF se ref não fornecido)
-                - descricao: Descrição principal (ex: JG DENTE ENDO 21 AO 27 RADIO)
-                - descricao2: Descrição secundária (ex: PACOS)
-                - ref: Referência do produto
-                - pedido: Número do pedido
-                - codigo_barras ou ean: EAN-13 (13 dígitos, ex: 7890000005098) - OBRIGATÓRIO para código de barras
-                - lote: Número do lote (opcional)
-                - validade: Data de validade (opcional)
+    def _product_layout(self) -> Dict:
+        """Calcula a geometria da etiqueta de produto a partir da configuração.
         
         Returns:
-            String com comando ZPL completo
+            Dicionário com posições (dots) e tamanhos de fonte
         """
-        # Extrai dados - compatível com Sistema v07.2 (ean) e API (codigo_barras)
-        codigo = self._escape_zpl(str(data.get('codigo', '')))
-        descricao = self._escape_zpl(str(data.get('descricao', '')))
-        descricao2 = self._escape_zpl(str(data.get('descricao2', '')))
-        ref = self._escape_zpl(str(data.get('ref', codigo)))
-        pedido = self._escape_zpl(str(data.get('pedido', '')))
-        # IMPORTANTE: Usar codigo_barras ou ean (EAN-13). NUNCA usar codigo (ex: 1420) no código de barras!
-        codigo_barras = str(data.get('codigo_barras') or data.get('ean') or '').strip()
-        lote = self._escape_zpl(str(data.get('lote', '')))
-        validade = self._escape_zpl(str(data.get('validade', '')))
-        
         # Dimensões: rolo 2 colunas 50x25mm
         try:
             cfg = get_config()
@@ -88,6 +80,65 @@ class ZPLGenerator:
         f_ref = max(14, int(14 * scale))
         f_barcode = max(28, int(36 * scale))
         f_lote = max(12, int(12 * scale))
+        col_width_mm = 22  # largura por coluna do grid
+        barcode_area_height = int(9 * dots_per_mm)  # ~9mm reservado
+        bottom_margin = int(1 * dots_per_mm)
+        return {
+            'dots_per_mm': dots_per_mm,
+            'label_height': label_height,
+            'margin_left': margin_left,
+            'margin_top': margin_top,
+            'total_width': total_width,
+            'content_margin': content_margin,
+            'f_desc': f_desc,
+            'f_desc2': f_desc2,
+            'f_ref': f_ref,
+            'f_barcode': f_barcode,
+            'f_lote': f_lote,
+            'x_left': content_margin,
+            'x_right': content_margin + int(col_width_mm * dots_per_mm),
+            'y_barcode': label_height - barcode_area_height - bottom_margin,
+        }
+    
+    def generate_product_label(self, data: Dict) -> str:
+        """Gera comando ZPL para etiqueta de produto.
+        
+        Args:
+            data: Dicionário com dados do produto:
+                - codigo: Código do produto (usado como REF se ref não fornecido)
+                - descricao: Descrição principal (ex: JG DENTE ENDO 21 AO 27 RADIO)
+                - descricao2: Descrição secundária (ex: PACOS)
+                - ref: Referência do produto
+                - pedido: Número do pedido
+                - codigo_barras ou ean: EAN-13 (13 dígitos, ex: 7890000005098) - OBRIGATÓRIO para código de barras
+                - lote: Número do lote (opcional)
+                - validade: Data de validade (opcional)
+        
+        Returns:
+            String com comando ZPL completo
+        """
+        # Extrai dados - compatível com Sistema v07.2 (ean) e API (codigo_barras)
+        codigo = self._escape_zpl(str(data.get('codigo', '')))
+        descricao = self._escape_zpl(str(data.get('descricao', '')))
+        descricao2 = self._escape_zpl(str(data.get('descricao2', '')))
+        ref = self._escape_zpl(str(data.get('ref', codigo)))
+        pedido = self._escape_zpl(str(data.get('pedido', '')))
+        # IMPORTANTE: Usar codigo_barras ou ean (EAN-13). NUNCA usar codigo (ex: 1420) no código de barras!
+        codigo_barras = str(data.get('codigo_barras') or data.get('ean') or '').strip()
+        lote = self._escape_zpl(str(data.get('lote', '')))
+        validade = self._escape_zpl(str(data.get('validade', '')))
+        
+        layout = self._product_layout()
+        dots_per_mm = layout['dots_per_mm']
+        label_height = layout['label_height']
+        margin_left = layout['margin_left']
+        margin_top = layout['margin_top']
+        total_width = layout['total_width']
+        content_margin = layout['content_margin']
+        f_desc = layout['f_desc']
+        f_ref = layout['f_ref']
+        f_barcode = layout['f_barcode']
+        f_lote = layout['f_lote']
         
         # ^LH = desloca origem (x=margin_left evita vão, y=margin_top evita topo)
         # ^PW = largura total, ^LL = altura
@@ -97,9 +148,8 @@ class ZPLGenerator:
         # Descrição e código de barras ocupam as 2 colunas | REF/Ped | Lote/Val nas colunas
         y_pos = content_margin
         line_spacing = 1.15
-        col_width_mm = 22  # largura por coluna do grid
-        x_left = content_margin
-        x_right = content_margin + int(col_width_mm * dots_per_mm)
+        x_left = layout['x_left']
+        x_right = layout['x_right']
 
         # 1. DESCRIÇÃO (ocupa as 2 colunas - mais chars por linha)
         desc_completa = f"{descricao} {descricao2}".strip() if (descricao or descricao2) else ""
@@ -130,9 +180,7 @@ class ZPLGenerator:
             zpl += f"^FO{x_right},{y_grid}^A0N,{f_lote},{f_lote}^FD{'  '.join(partes)}^FS\n"
 
         # 3. CÓDIGO DE BARRAS (sempre fixo na parte de baixo - independente do conteúdo acima)
-        barcode_area_height = int(9 * dots_per_mm)  # ~9mm reservado
-        bottom_margin = int(1 * dots_per_mm)
-        y_barcode = label_height - barcode_area_height - bottom_margin
+        y_barcode = layout['y_barcode']
         if codigo_barras:
             if len(codigo_barras) == 13 and codigo_barras.isdigit():
                 zpl += f"^FO{x_left},{y_barcode}^BY2^BEN,{f_barcode},Y,N^FD{codigo_barras}^FS\n"
@@ -143,6 +191,173 @@ class ZPLGenerator:
         
         return zpl.strip()
     
+    def render_product_batch(
+        self,
+        rows: Union[Mapping[str, Sequence], Iterable[Dict]],
+        chunk_size: int = 1000
+    ) -> Iterator[bytes]:
+        """Gera etiquetas de produto em lote, em blocos de bytes ZPL.
+        
+        Produz o mesmo ZPL de ``generate_product_label`` para cada linha,
+        mas calcula a geometria e os prefixos dos campos (``^FO...^FD``) uma
+        única vez, e escapa e quebra cada coluna em bloco (valores repetidos,
+        comuns em importações, são processados uma vez por bloco).
+        
+        Args:
+            rows: Colunas ({campo: valores}, todas do mesmo tamanho) ou
+                iterável de dicionários no formato de ``generate_product_label``
+                (consumido aos poucos)
+            chunk_size: Etiquetas por bloco gerado
+        
+        Returns:
+            Gerador de blocos UTF-8 com ``chunk_size`` etiquetas (^XA...^XZ),
+            uma por linha de entrada e na mesma ordem
+        """
+        for labels in self.render_product_labels(rows, chunk_size):
+            labels.append('')
+            yield '\n'.join(labels).encode('utf-8')
+    
+    def render_product_labels(
+        self,
+        rows: Union[Mapping[str, Sequence], Iterable[Dict]],
+        chunk_size: int = 1000
+    ) -> Iterator[List[str]]:
+        """Como ``render_product_batch``, mas com o ZPL de cada etiqueta separado.
+        
+        Returns:
+            Gerador de listas com o ZPL de até ``chunk_size`` etiquetas
+        """
+        layout = self._product_layout()
+        x_left = layout['x_left']
+        x_right = layout['x_right']
+        cm = layout['content_margin']
+        f_desc, f_ref, f_lote, f_barcode = (
+            layout['f_desc'], layout['f_ref'], layout['f_lote'], layout['f_barcode']
+        )
+        desc_step = int(f_desc * 1.15)
+        desc_gap = int(2 * layout['dots_per_mm'])
+        
+        header = (
+            f"^XA\n^CI28\n^PQ1\n^LH{layout['margin_left']},{layout['margin_top']}"
+            f"^PW{layout['total_width']}^LL{layout['label_height']}\n"
+        )
+        desc_prefixes = [
+            f"^FO{x_left},{cm + n * desc_step}^A0N,{f_desc},{f_desc}^FD" for n in range(2)
+        ]
+        # Linha da grade conforme o número de linhas da descrição (0, 1 ou 2)
+        grid_y = [cm] + [cm + n * desc_step + desc_gap for n in (1, 2)]
+        ref_prefixes = [f"^FO{x_left},{y}^A0N,{f_ref},{f_ref}^FD" for y in grid_y]
+        lote_prefixes = [f"^FO{x_right},{y}^A0N,{f_lote},{f_lote}^FD" for y in grid_y]
+        ean_prefix = f"^FO{x_left},{layout['y_barcode']}^BY2^BEN,{f_barcode},Y,N^FD"
+        code128_prefix = f"^FO{x_left},{layout['y_barcode']}^BY2^BCN,{f_barcode},Y,N,N^FD"
+        
+        for count, columns in self._column_chunks(rows, chunk_size):
+            text = {
+                field: self._escape_column(columns.get(field), count)
+                for field in _PRODUCT_TEXT_FIELDS
+            }
+            codigos = text['codigo']
+            # ref ausente usa o código (já escapado), como em generate_product_label
+            ref_raw = columns.get('ref') or [_MISSING] * count
+            refs = self._escape_column(
+                [codigos[i] if v is _MISSING else v for i, v in enumerate(ref_raw)], count
+            )
+            barcodes = self._barcode_column(columns, count)
+            
+            wrapped: Dict[str, List[str]] = {}
+            labels = []
+            for i in range(count):
+                parts = [header]
+                
+                descricao, descricao2 = text['descricao'][i], text['descricao2'][i]
+                desc_completa = f"{descricao} {descricao2}".strip() if (descricao or descricao2) else ""
+                lines = 0
+                if desc_completa:
+                    linhas = wrapped.get(desc_completa)
+                    if linhas is None:
+                        linhas = wrapped[desc_completa] = self._wrap_text(desc_completa, 32)[:2]
+                    for linha in linhas:
+                        parts += (desc_prefixes[lines], linha, "^FS\n")
+                        lines += 1
+                
+                ref, pedido = refs[i], text['pedido'][i]
+                if ref or pedido:
+                    partes = []
+                    if ref:
+                        partes.append(f"REF:{ref[:8]}")
+                    if pedido:
+                        partes.append(f"Ped:{pedido[:8]}")
+                    parts += (ref_prefixes[lines], '  '.join(partes), "^FS\n")
+                lote, validade = text['lote'][i], text['validade'][i]
+                if lote or validade:
+                    partes = []
+                    if lote:
+                        partes.append(f"Lote:{lote[:6]}")
+                    if validade:
+                        partes.append(f"Val:{validade[:8]}")
+                    parts += (lote_prefixes[lines], '  '.join(partes), "^FS\n")
+                
+                codigo_barras = barcodes[i]
+                if codigo_barras:
+                    ean = len(codigo_barras) == 13 and codigo_barras.isdigit()
+                    parts += (ean_prefix if ean else code128_prefix, codigo_barras, "^FS\n")
+                
+                parts.append("^XZ")
+                labels.append(''.join(parts))
+            
+            yield labels
+    
+    @staticmethod
+    def _column_chunks(rows: Union[Mapping[str, Sequence], Iterable[Dict]],
+                       chunk_size: int) -> Iterator[Tuple[int, Dict[str, list]]]:
+        """Divide a entrada em blocos de colunas: (linhas no bloco, {campo: valores})."""
+        if isinstance(rows, Mapping):
+            total = max((len(values) for values in rows.values()), default=0)
+            for start in range(0, total, chunk_size):
+                yield min(chunk_size, total - start), {
+                    field: list(values[start:start + chunk_size])
+                    for field, values in rows.items()
+                }
+            return
+        
+        fields = _PRODUCT_TEXT_FIELDS + ('ref', 'codigo_barras', 'ean')
+        iterator = iter(rows)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield len(chunk), {
+                field: [row.get(field, _MISSING) for row in chunk] for field in fields
+            }
+    
+    def _escape_column(self, values: Optional[list], count: int) -> List[str]:
+        """Converte e escapa uma coluna de texto (ausente = vazio)."""
+        if values is None:
+            return [''] * count
+        escaped: Dict[str, str] = {}
+        result = []
+        for value in values:
+            value = '' if value is _MISSING else str(value)
+            text = escaped.get(value)
+            if text is None:
+                text = escaped[value] = self._escape_zpl(value)
+            result.append(text)
+        return result
+    
+    @staticmethod
+    def _barcode_column(columns: Dict[str, list], count: int) -> List[str]:
+        """Coluna do código de barras: codigo_barras ou, na falta, ean."""
+        codigos = columns.get('codigo_barras') or [None] * count
+        eans = columns.get('ean') or [None] * count
+        result = []
+        for codigo_barras, ean in zip(codigos, eans):
+            if codigo_barras is _MISSING:
+                codigo_barras = None
+            if ean is _MISSING:
+                ean = None
+            result.append(str(codigo_barras or ean or '').strip())
+        return result
+    
     def generate_calibration_label(self, dual_column: bool = True) -> str:
         """Gera etiqueta de calibração com marcações para validar tamanho real.
         Baseado no Sistema de Etiquetas v07.2. Apenas bordas e números - sem ticks
@@ -286,6 +501,54 @@ class ZPLGenerator:
             }
         return self.generate_dual_column_label(data, data)
     
+    def render_payload(self, payload: Dict) -> str:
+        """Gera o ZPL de uma requisição no formato do payload da fila.
+        
+        Args:
+            payload: Dicionário com label_type, data, zpl_template,
+                duas_colunas e data_col2 (mesmos campos de PrintRequest)
+        
+        Returns:
+            String com comando ZPL
+        """
+        label_type = payload.get('label_type', 'produto')
+        data = payload.get('data', {})
+        
+        with stage_timer('render'):
+            if label_type == 'produto':
+                if payload.get('duas_colunas'):
+                    data_col2 = payload.get('data_col2') or data
+                    return self.generate_dual_column_label(data, data_col2)
+                return self.generate_product_label(data)
+            
+            # Usa template customizado se fornecido
+            return self.generate_custom_label(data, payload.get('zpl_template'))
+    
+    def with_quantity(self, zpl: str, copies: int) -> str:
+        """Ajusta o ZPL para sair ``copies`` vezes em um único job.
+        
+        Um formato simples recebe ``^PQ`` (multiplicando a quantidade que já
+        tiver). Vários formatos ou serialização (``^SN``/``^SF``) mudariam
+        o resultado com ``^PQ``; nesses casos o ZPL é repetido.
+        
+        Args:
+            zpl: Comando ZPL válido (^XA ... ^XZ)
+            copies: Número de vezes que a etiqueta deve sair
+        
+        Returns:
+            String com comando ZPL
+        """
+        if copies <= 1:
+            return zpl
+        zpl = zpl.strip()
+        if len(_FORMAT_START.findall(zpl)) != 1 or _SERIALIZATION.search(zpl):
+            return '\n'.join([zpl] * copies)
+        
+        match = _QUANTITY.search(zpl)
+        if match:
+            return f"{zpl[:match.start()]}^PQ{int(match.group(1)) * copies}{zpl[match.end():]}"
+        return f"{zpl[:-3]}^PQ{copies}\n^XZ"
+    
     def generate_custom_label(self, data: Dict, template: Optional[str] = None) -> str:
         """Gera comando ZPL customizado.
         
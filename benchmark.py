@@ -0,0 +1,288 @@
+"""Benchmarks de desempenho da fila e da geração de etiquetas."""
+import click
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api.queue import PrintQueue, new_queue_id
+
+
+# Esquema anterior (id UUID4 como PRIMARY KEY + índice em created_at)
+_LEGACY_SCHEMA = """
+    CREATE TABLE print_queue (
+        id TEXT PRIMARY KEY,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        attempts INTEGER DEFAULT 0,
+        error_message TEXT,
+        printer_name TEXT
+    );
+    CREATE INDEX idx_status ON print_queue(status);
+    CREATE INDEX idx_created_at ON print_queue(created_at);
+"""
+
+SAMPLE_PAYLOAD = {
+    "label_type": "produto",
+    "data": {
+        "codigo": "1420",
+        "descricao": "JG DENTE ENDO 21 AO 27 RADIO",
+        "descricao2": "PACOS",
+        "ref": "1420",
+        "pedido": "10511",
+        "codigo_barras": "7890000005098",
+        "lote": "10111150126",
+        "validade": "31/12/2025"
+    },
+    "zpl_template": None,
+    "duas_colunas": False,
+    "data_col2": None
+}
+
+
+def _insert_rows(db_path: Path, rows: int, batch: int, id_factory) -> float:
+    """Insere linhas em lotes e retorna o tempo gasto em segundos."""
+    conn = sqlite3.connect(str(db_path))
+    payload = json.dumps(SAMPLE_PAYLOAD, ensure_ascii=False)
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        conn.executemany("""
+            INSERT INTO print_queue (id, status, payload, printer_name)
+            VALUES (?, 'pending', ?, NULL)
+        """, [(id_factory(), payload) for _ in range(n)])
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+@click.group()
+def cli():
+    """Benchmarks da API de Impressão de Etiquetas."""
+    pass
+
+
+@cli.command()
+@click.option('--rows', '-n', default=1_000_000, type=int,
+              help='Número de linhas a inserir (padrão: 1.000.000)')
+@click.option('--batch', '-b', default=1000, type=int,
+              help='Linhas por transação (padrão: 1000)')
+def insert(rows, batch):
+    """Compara vazão de inserção: UUID4 aleatório x ID ordenado pelo tempo."""
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = Path(tmp) / "legacy.db"
+        conn = sqlite3.connect(str(legacy_db))
+        conn.executescript(_LEGACY_SCHEMA)
+        conn.close()
+
+        current_db = Path(tmp) / "current.db"
+        PrintQueue(str(current_db))
+
+        cenarios = [
+            ("uuid4 (esquema antigo)", legacy_db, lambda: str(uuid.uuid4())),
+            ("seq + ULID (esquema atual)", current_db, new_queue_id),
+        ]
+        click.echo(f"Inserindo {rows:,} linhas em lotes de {batch}\n")
+        for nome, db_path, id_factory in cenarios:
+            elapsed = _insert_rows(db_path, rows, batch, id_factory)
+            size_mb = db_path.stat().st_size / (1024 * 1024)
+            click.echo(
+                f"{nome:<28} {elapsed:8.2f}s  "
+                f"{rows / elapsed:12,.0f} linhas/s  {size_mb:8.1f} MB"
+            )
+
+
+@cli.command()
+@click.option('--rows', '-n', default=100_000, type=int,
+              help='Linhas no banco de teste (padrão: 100.000)')
+@click.option('--limit', '-l', default=10_000, type=int,
+              help='Itens por listagem (padrão: 10.000)')
+def listing(rows, limit):
+    """Compara tempo e memória da listagem com e sem decodificar payloads."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "listing.db"
+        queue = PrintQueue(str(db_path))
+        _insert_rows(db_path, rows, 5000, new_queue_id)
+
+        click.echo(f"Listando {limit:,} de {rows:,} itens\n")
+        for nome, include_payload in (("com payload", True), ("sem payload", False)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            items = queue.get_all(None, limit, include_payload=include_payload)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            click.echo(
+                f"{nome:<14} {len(items):8,} itens  {elapsed * 1000:9.1f} ms  "
+                f"pico {peak / (1024 * 1024):8.1f} MB"
+            )
+
+
+@cli.command()
+@click.option('--labels', '-n', default=2000, type=int,
+              help='Número de etiquetas (padrão: 2000)')
+@click.option('--batch-size', '-b', default=100, type=int,
+              help='Etiquetas por chamada a /print/batch (padrão: 100)')
+def batch(labels, batch_size):
+    """Compara vazão de POST /print (uma a uma) x POST /print/batch.
+
+    O spooler é substituído por um contador de bytes: nenhuma etiqueta é
+    impressa de verdade. A enumeração de impressoras continua real.
+    """
+    import os
+    from fastapi.testclient import TestClient
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            import api.main as api_main
+            spooled = {'jobs': 0, 'bytes': 0}
+
+            def fake_print(zpl, printer_name=None):
+                spooled['jobs'] += 1
+                spooled['bytes'] += len(zpl)
+                return True
+
+            api_main.printer_manager.print_zpl = fake_print
+            client = TestClient(api_main.app)
+            request = {"label_type": "produto", "data": SAMPLE_PAYLOAD["data"]}
+
+            start = time.perf_counter()
+            for _ in range(labels):
+                client.post("/print", json=request)
+            single = time.perf_counter() - start
+            single_jobs = spooled['jobs']
+
+            spooled['jobs'] = 0
+            start = time.perf_counter()
+            for offset in range(0, labels, batch_size):
+                n = min(batch_size, labels - offset)
+                client.post("/print/batch", json={"items": [request] * n})
+            batched = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+    click.echo(f"{labels:,} etiquetas\n")
+    click.echo(f"{'/print':<22} {single:8.2f}s  {labels / single:10,.0f} etiquetas/s  {single_jobs:6} jobs")
+    click.echo(f"{'/print/batch (' + str(batch_size) + ')':<22} {batched:8.2f}s  {labels / batched:10,.0f} etiquetas/s  {spooled['jobs']:6} jobs")
+
+
+def _sample_rows(labels: int, products: int = 2000):
+    """Linhas de importação: catálogo repetido, pedido e lote variando."""
+    data = SAMPLE_PAYLOAD["data"]
+    return [
+        {
+            "codigo": str(1000 + i % products),
+            "descricao": f"{data['descricao']} {i % products}",
+            "descricao2": data["descricao2"],
+            "pedido": str(10000 + i // 50),
+            "codigo_barras": data["codigo_barras"],
+            "lote": str(10111150000 + i % 97),
+            "validade": data["validade"],
+        }
+        for i in range(labels)
+    ]
+
+
+@cli.command()
+@click.option('--labels', '-n', default=100_000, type=int,
+              help='Número de etiquetas (padrão: 100.000)')
+@click.option('--chunk-size', '-c', default=1000, type=int,
+              help='Etiquetas por bloco do render em lote (padrão: 1000)')
+def render(labels, chunk_size):
+    """Compara generate_product_label (uma a uma) x render_product_batch."""
+    from api.zpl_generator import ZPLGenerator
+
+    generator = ZPLGenerator()
+    rows = _sample_rows(labels)
+    columns = {field: [row[field] for row in rows] for field in rows[0]}
+
+    start = time.perf_counter()
+    expected = "".join(generator.generate_product_label(row) + "\n" for row in rows).encode('utf-8')
+    single = time.perf_counter() - start
+
+    resultados = [("generate_product_label", single, len(expected))]
+    for nome, source in (("batch (linhas)", rows), ("batch (colunas)", columns)):
+        start = time.perf_counter()
+        total = 0
+        for chunk in generator.render_product_batch(source, chunk_size):
+            total += len(chunk)
+        resultados.append((nome, time.perf_counter() - start, total))
+
+    same = b"".join(generator.render_product_batch(rows, chunk_size)) == expected
+    click.echo(f"{labels:,} etiquetas (ZPL idêntico: {'sim' if same else 'NÃO'})\n")
+    for nome, elapsed, size in resultados:
+        click.echo(
+            f"{nome:<24} {elapsed:8.2f}s  {labels / elapsed:10,.0f} etiquetas/s  "
+            f"{size / (1024 * 1024):7.1f} MB  {single / elapsed:5.1f}x"
+        )
+
+
+@cli.command('render-pool')
+@click.option('--labels', '-n', default=100_000, type=int,
+              help='Número de etiquetas (padrão: 100.000)')
+@click.option('--workers', '-w', default="1,2,4,8",
+              help='Números de processos testados (padrão: 1,2,4,8)')
+@click.option('--chunk-size', '-c', default=1000, type=int,
+              help='Linhas por bloco enviado a um processo (padrão: 1000)')
+def render_pool(labels, workers, chunk_size):
+    """Mede a escala do RenderPool com o número de processos.
+
+    Usa a conversão das importações (validação e geração do ZPL de cada
+    bloco de linhas), o trabalho que o pool faz na API.
+    """
+    import os
+    from functools import partial
+    from api.imports import _prepare_records
+    from api.render_pool import RenderPool
+
+    settings = {
+        "mapping": {}, "label_type": "produto", "printer_name": None,
+        "priority": 5, "client_id": None,
+    }
+    prepare = partial(_prepare_records, settings)
+    rows = list(enumerate(_sample_rows(labels), start=2))
+    chunks = [rows[start:start + chunk_size] for start in range(0, labels, chunk_size)]
+
+    def convert(pool):
+        return [
+            item['zpl']
+            for items, _ in pool.map_ordered(prepare, chunks)
+            for item in items
+        ]
+
+    start = time.perf_counter()
+    expected = convert(RenderPool(0))
+    baseline = time.perf_counter() - start
+
+    click.echo(f"{labels:,} etiquetas, {os.cpu_count()} núcleos\n")
+    click.echo(f"{'no processo':<16} {baseline:8.2f}s  {labels / baseline:10,.0f} etiquetas/s")
+    for count in [int(w) for w in workers.split(",") if w.strip()]:
+        pool = RenderPool(count, min_labels=0)
+        try:
+            # Inicia os processos antes de medir (spawn + import da API)
+            list(pool.map_ordered(prepare, [rows[:1]] * count))
+            start = time.perf_counter()
+            output = convert(pool)
+            elapsed = time.perf_counter() - start
+        finally:
+            pool.close()
+        click.echo(
+            f"{str(count) + ' processo(s)':<16} {elapsed:8.2f}s  {labels / elapsed:10,.0f} etiquetas/s  "
+            f"{baseline / elapsed:5.1f}x  ZPL idêntico: {'sim' if output == expected else 'NÃO'}"
+        )
+
+
+if __name__ == '__main__':
+    cli()
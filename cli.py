@@ -4,6 +4,7 @@ import requests
 import json
 import sys
 import os
+import time
 from typing import Optional
 from pathlib import Path
 
@@ -425,8 +426,10 @@ def queue(ctx, status_filter, limit):
 
 
 @cli.command()
+@click.option('--wait/--no-wait', default=True,
+              help='Acompanha o esvaziamento até terminar (padrão: sim)')
 @click.pass_context
-def process_queue(ctx):
+def process_queue(ctx, wait):
     """Força processamento imediato da fila."""
     click.echo("[PROCESSANDO] Processando fila...\n")
     
@@ -438,9 +441,20 @@ def process_queue(ctx):
         response.raise_for_status()
         
         data = response.json()
-        processed = data.get('processed', 0)
-        
-        click.echo(f"[OK] {processed} requisicao(oes) processada(s).")
+        click.echo(f"[OK] Esvaziamento {data['id']} disparado ({data['total']} requisicao(oes)).")
+        
+        while wait and data['status'] == 'running':
+            time.sleep(1)
+            response = requests.get(f"{url}/{data['id']}", headers=headers, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+            click.echo(
+                f"   Processadas: {data['processed']}  Falhas: {data['failed']}  "
+                f"Restantes: {data['remaining']}"
+            )
+        
+        if data['status'] == 'completed':
+            click.echo(f"[OK] {data['processed']} requisicao(oes) processada(s), {data['failed']} falha(s).")
         
     except requests.exceptions.ConnectionError:
         click.echo("[ERRO] Nao foi possivel conectar a API.")
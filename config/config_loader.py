@@ -63,6 +63,46 @@ class Config:
         api_key = self.get_api_key()
         return bool(api_key and api_key.strip())
     
+    def get_admin_key(self) -> str:
+        """Retorna a chave dos endpoints /admin ou string vazia (desabilitados)."""
+        return self.get('api.admin_key', '') or ''
+    
+    def is_accept_only(self) -> bool:
+        """Verifica se /print apenas enfileira (202) sem imprimir na hora."""
+        return bool(self.get('api.accept_only', False))
+    
+    def get_idempotency_ttl_seconds(self) -> int:
+        """Retorna por quanto tempo (s) uma Idempotency-Key é lembrada."""
+        return self.get('api.idempotency_ttl_seconds', 86400)
+    
+    def get_max_batch_size(self) -> int:
+        """Retorna o número máximo de etiquetas em POST /print/batch."""
+        return self.get('api.max_batch_size', 1000)
+    
+    def get_import_chunk_size(self) -> int:
+        """Retorna quantas linhas de uma importação são enfileiradas por transação."""
+        return self.get('api.import_chunk_size', 500)
+    
+    def get_render_workers(self) -> int:
+        """Retorna quantos processos geram ZPL em paralelo (0 = nenhum)."""
+        return self.get('api.render_workers', 0)
+    
+    def get_render_min_labels(self) -> int:
+        """Retorna o tamanho mínimo do lote para gerar ZPL em paralelo."""
+        return self.get('api.render_min_labels', 5000)
+    
+    def get_rate_limits(self) -> Dict[str, Dict[str, float]]:
+        """Retorna os limites de taxa por cliente ({} = sem limite)."""
+        return self.get('api.rate_limits', {}) or {}
+    
+    def get_status_cache_seconds(self) -> float:
+        """Retorna o intervalo de atualização do cache de /status e /printers."""
+        return self.get('api.status_cache_seconds', 5)
+    
+    def get_workers(self) -> int:
+        """Retorna o número de processos (workers) do uvicorn."""
+        return max(1, int(self.get('api.workers', 1)))
+    
     def get_host(self) -> str:
         """Retorna o host da API."""
         return self.get('api.host', '0.0.0.0')
@@ -125,6 +165,72 @@ class Config:
         """Retorna o máximo de tentativas na fila."""
         return self.get('queue.max_retries', 3)
     
+    def get_priority_aging_seconds(self) -> int:
+        """Retorna o tempo de espera (s) para um item pendente subir uma prioridade."""
+        return self.get('queue.priority_aging_seconds', 300)
+    
+    def get_dispatcher_lease_seconds(self) -> float:
+        """Retorna a validade do lease do despachante da fila (failover)."""
+        return self.get('queue.dispatcher_lease_seconds', 15)
+    
+    def get_shutdown_grace_seconds(self) -> float:
+        """Retorna o prazo para o item em andamento terminar no encerramento."""
+        return self.get('queue.shutdown_grace_seconds', 10)
+    
+    def get_batch_min_seconds(self) -> float:
+        """Retorna o tempo mínimo de impressão coberto por um lote do processador."""
+        return self.get('queue.batch_min_seconds', 2)
+    
+    def get_batch_max_seconds(self) -> float:
+        """Retorna o tempo máximo de impressão coberto por um lote do processador."""
+        return self.get('queue.batch_max_seconds', 30)
+    
+    def get_batch_max_items(self) -> int:
+        """Retorna o máximo de itens em um lote do processador."""
+        return self.get('queue.batch_max_items', 500)
+    
+    def is_merge_identical_enabled(self) -> bool:
+        """Verifica se itens idênticos seguidos viram um único job (^PQ)."""
+        return bool(self.get('queue.merge_identical', True))
+    
+    def is_pack_two_up_enabled(self) -> bool:
+        """Verifica se etiquetas de uma coluna são juntadas duas a duas (2-up)."""
+        return bool(self.get('queue.pack_two_up', False))
+    
+    def get_pack_wait_seconds(self) -> float:
+        """Retorna quanto um item de uma coluna espera por um par no 2-up."""
+        return self.get('queue.pack_wait_seconds', 5)
+    
+    def get_shed_drain_seconds(self) -> Dict[str, float]:
+        """Retorna o tempo máximo de esvaziamento da fila por prioridade ({} = sem limite)."""
+        return self.get('queue.shed_drain_seconds', {}) or {}
+    
+    def get_assumed_labels_per_second(self) -> float:
+        """Retorna a vazão física das impressoras sem valor próprio (etiquetas/s)."""
+        return self.get('queue.assumed_labels_per_second', 2)
+    
+    def get_printer_labels_per_second(self) -> Dict[str, float]:
+        """Retorna a vazão física (etiquetas/s) de cada impressora configurada."""
+        return self.get('queue.printer_labels_per_second', {}) or {}
+    
+    def get_client_weights(self) -> Dict[str, float]:
+        """Retorna o peso de cada cliente no escalonamento justo da fila."""
+        return self.get('queue.client_weights', {}) or {}
+    
+    def is_server_timing_enabled(self) -> bool:
+        """Verifica se /print deve responder com o header Server-Timing."""
+        return bool(self.get('api.server_timing', False))
+    
+    def get_slow_request_ms(self) -> int:
+        """Retorna o limite (ms) para registrar requisições lentas (0 = desativado)."""
+        return self.get('logging.slow_request_ms', 0) or 0
+    
+    def get_slow_log_file(self) -> str:
+        """Retorna o caminho do log de requisições lentas."""
+        log_path = Path(self.get('logging.slow_file', 'logs/slow_requests.log'))
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        return str(log_path)
+    
     def get_log_level(self) -> str:
         """Retorna o nível de log."""
         return self.get('logging.level', 'INFO')
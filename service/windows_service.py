@@ -3,6 +3,7 @@ import sys
 import os
 import time
 import logging
+import multiprocessing
 from pathlib import Path
 
 # Adiciona o diretório raiz ao path
@@ -48,9 +49,10 @@ class LabelPrintingService(win32serviceutil.ServiceFramework):
         # Sinaliza para parar
         self.stop_event.set()
         
-        # Aguarda thread terminar
+        # Aguarda thread terminar (conexões abertas e o item em andamento
+        # têm, cada um, até queue.shutdown_grace_seconds)
         if self.server_thread:
-            self.server_thread.join(timeout=5)
+            self.server_thread.join(timeout=2 * self.config.get_shutdown_grace_seconds() + 5)
         
         servicemanager.LogInfoMsg("Serviço parado")
     
@@ -109,7 +111,8 @@ class LabelPrintingService(win32serviceutil.ServiceFramework):
                 host=config.get_host(),
                 port=config.get_port(),
                 log_level=config.get_log_level().lower(),
-                access_log=True
+                access_log=True,
+                timeout_graceful_shutdown=config.get_shutdown_grace_seconds()
             )
             
             self.server = uvicorn.Server(config_uvicorn)
@@ -123,7 +126,10 @@ class LabelPrintingService(win32serviceutil.ServiceFramework):
 def main():
     """Função principal para instalar/desinstalar/rodar o serviço."""
     if len(sys.argv) == 1:
-        # Se rodado sem argumentos, tenta rodar como serviço
+        # Se rodado sem argumentos, tenta rodar como serviço. Os processos
+        # do RenderPool (api.render_workers) precisam do python.exe: o
+        # pythonservice.exe não sabe iniciar processos filhos
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'python.exe'))
         servicemanager.Initialize()
         servicemanager.PrepareToHostSingle(LabelPrintingService)
         servicemanager.StartServiceCtrlDispatcher()
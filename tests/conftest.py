@@ -0,0 +1,35 @@
+"""Configuração comum dos testes.
+
+Os módulos do Windows (pywin32) são substituídos por módulos vazios para que
+a API possa ser importada em qualquer sistema; os testes que imprimem
+substituem os métodos do ``PrinterManager``.
+"""
+import os
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+for _module in ('win32print', 'win32api'):
+    sys.modules.setdefault(_module, types.ModuleType(_module))
+
+
+@pytest.fixture(scope='session')
+def api(tmp_path_factory):
+    """Módulo ``api.main`` importado em um diretório temporário (banco e logs).
+
+    O lifespan não é executado: o processador da fila não roda nos testes.
+    """
+    workdir = tmp_path_factory.mktemp('api')
+    (workdir / 'logs').mkdir()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import api.main as main
+        yield main
+    finally:
+        os.chdir(cwd)
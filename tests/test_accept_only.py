@@ -0,0 +1,36 @@
+"""Modo accept-only: o ZPL gerado na API vai para a fila."""
+import pytest
+from fastapi.testclient import TestClient
+
+LABEL = {"label_type": "produto", "data": {"codigo": "1420", "descricao": "Parafuso"}}
+
+
+@pytest.fixture
+def client(api, monkeypatch):
+    monkeypatch.setattr(api.config, 'is_accept_only', lambda: True)
+    monkeypatch.setattr(api.queue_processor, 'wake', lambda: None)
+    return TestClient(api.app)
+
+
+def test_print_stores_rendered_zpl(api, client):
+    response = client.post('/print', json=LABEL)
+    assert response.status_code == 202
+    item = api.print_queue.get_by_id(response.json()['queue_id'])
+    assert item['zpl'] == api.zpl_generator.render_payload(item['payload'])
+
+
+def test_print_with_key_stores_rendered_zpl(api, client):
+    response = client.post('/print', json=LABEL, headers={"Idempotency-Key": "aceita-1"})
+    assert response.status_code == 202
+    assert api.print_queue.get_by_id(response.json()['queue_id'])['zpl'].startswith('^XA')
+
+
+@pytest.mark.parametrize('headers', [{}, {"Idempotency-Key": "aceita-lote"}])
+def test_batch_stores_rendered_zpl(api, client, headers):
+    second = {**LABEL, "data": {"codigo": "1421", "descricao": "Porca"}}
+    response = client.post('/print/batch', json={"items": [LABEL, second]}, headers=headers)
+    assert response.status_code == 202
+    items = [api.print_queue.get_by_id(result['queue_id']) for result in response.json()['items']]
+    assert [item['status'] for item in items] == ['pending', 'pending']
+    for item in items:
+        assert item['zpl'] == api.zpl_generator.render_payload(item['payload'])
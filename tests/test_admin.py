@@ -0,0 +1,46 @@
+"""Endpoints administrativos (/admin/*) e o perfil por amostragem."""
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from api.profiler import SamplingProfiler
+
+
+def _busy(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_skips_idle_threads():
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=stop.wait, name='ociosa', daemon=True),
+        threading.Thread(target=_busy, args=(stop,), name='ocupada', daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    try:
+        profiler = SamplingProfiler()
+        cpu, _ = profiler.sample(0.2, 0.01)
+        wall, _ = profiler.sample(0.2, 0.01, include_idle=True)
+    finally:
+        stop.set()
+    cpu_threads = {stack[0] for stack in cpu}
+    wall_threads = {stack[0] for stack in wall}
+    assert 'ocupada' in cpu_threads and 'ociosa' not in cpu_threads
+    assert {'ocupada', 'ociosa'} <= wall_threads
+
+
+def test_admin_key(api, monkeypatch):
+    client = TestClient(api.app)
+    url = '/admin/profile?seconds=0.05&interval_ms=10'
+    monkeypatch.setattr(api.config, 'get_admin_key', lambda: '')
+    assert client.get(url, headers={"X-Admin-Key": "x"}).status_code == 404
+
+    monkeypatch.setattr(api.config, 'get_admin_key', lambda: 'segredo')
+    assert client.get(url).status_code == 403
+    assert client.get(url, headers={"X-Admin-Key": "segred"}).status_code == 403
+    assert client.get(url, headers={"X-Admin-Key": "ségredo".encode("latin-1")}).status_code == 403
+    assert client.get(url, headers={"X-Admin-Key": "segredo"}).status_code == 200
@@ -0,0 +1,70 @@
+"""Estimativa de esvaziamento da fila e recusa de trabalho (load shedding)."""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.admission import DrainEstimator, LoadShedder
+from api.queue import PrintQueue, QueueStatus
+
+
+def test_estimate_uses_physical_rate_without_samples():
+    estimator = DrainEstimator(default_labels_per_second=2, printer_labels_per_second={"Zebra": 4})
+    assert estimator.seconds_per_label("Zebra") == pytest.approx(0.25)
+    assert estimator.seconds_per_label("Outra") == pytest.approx(0.5)
+    assert estimator.drain_seconds({"Zebra": 8, "Outra": 2}) == pytest.approx(3.0)
+
+
+def test_estimate_is_bounded_by_physical_print_time():
+    estimator = DrainEstimator(default_labels_per_second=2)
+    # Envio ao spooler rápido: o custo é o tempo físico de impressão
+    estimator.record(None, seconds=0.01, labels=4)
+    assert estimator.seconds_per_label(None) == pytest.approx(0.5)
+    # Geração lenta: o custo é o tempo medido
+    estimator.record(None, seconds=4.0, labels=4)
+    assert estimator.seconds_per_label(None) == pytest.approx((2.0 + 4.0) / 8)
+
+
+def test_merged_and_packed_jobs_cost_less_per_item():
+    estimator = DrainEstimator(default_labels_per_second=2)
+    # 2-up: 4 itens em 2 avanços de etiqueta
+    estimator.record(None, seconds=0.01, labels=4, feeds=2)
+    assert estimator.seconds_per_label(None) == pytest.approx(0.25)
+
+
+def test_default_printer_shares_physical_rate():
+    estimator = DrainEstimator(default_labels_per_second=1, printer_labels_per_second={"Zebra": 5},
+                               default_printer="Zebra")
+    assert estimator.seconds_per_label(None) == pytest.approx(0.2)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return PrintQueue(str(tmp_path / 'queue.db'))
+
+
+def test_shedder_rejects_by_priority_threshold(queue):
+    queue.add_many([{"payload": {"data": {}}}] * 20)
+    shedder = LoadShedder(queue, DrainEstimator(default_labels_per_second=2),
+                          {"default": 5, "0": 0}, refresh_seconds=0)
+    # 20 itens a 0,5 s = 10 s para esvaziar
+    assert shedder.check(5) == pytest.approx(5.0)
+    assert shedder.check(0) == 0
+
+
+def test_shedder_accepts_when_queue_drains(queue):
+    ids = queue.add_many([{"payload": {"data": {}}}] * 20)
+    shedder = LoadShedder(queue, DrainEstimator(default_labels_per_second=2),
+                          {"default": 5}, refresh_seconds=0)
+    assert shedder.check(5) > 0
+    queue.update_status_many(ids[:12], QueueStatus.COMPLETED)
+    assert shedder.check(5) == 0
+
+
+def test_print_rejected_when_overloaded(api, monkeypatch):
+    shedder = LoadShedder(api.print_queue, DrainEstimator(), {"default": 5})
+    monkeypatch.setattr(shedder, 'drain_seconds', lambda: 12.4)
+    monkeypatch.setattr(api, 'load_shedder', shedder)
+    response = TestClient(api.app).post(
+        '/print', json={"label_type": "produto", "data": {"codigo": "1"}}
+    )
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == "8"
@@ -0,0 +1,38 @@
+"""Troca do processo despachante com vários workers."""
+from api.queue import PrintQueue, QueueStatus
+
+
+def _processing(queue, claimed_by=None):
+    queue_id = queue.add({"data": {}})
+    queue.update_status(queue_id, QueueStatus.PROCESSING, claimed_by=claimed_by)
+    return queue_id
+
+
+def test_reclaim_only_rows_of_previous_dispatcher(tmp_path):
+    queue = PrintQueue(str(tmp_path / 'queue.db'))
+    inline = _processing(queue)
+    dead = _processing(queue, claimed_by='despachante-a')
+    own = _processing(queue, claimed_by='despachante-b')
+    inline_idempotent, _ = queue.add_idempotent(
+        'chave', 86400, {"data": {}}, status=QueueStatus.PROCESSING
+    )
+
+    # lease negativo: todas as linhas já contam como presas
+    assert queue.reclaim_processing(-1, 'despachante-b') == 1
+    assert queue.get_by_id(dead)['status'] == 'pending'
+    for queue_id in (inline, own, inline_idempotent['id']):
+        assert queue.get_by_id(queue_id)['status'] == 'processing'
+
+
+def test_claim_cleared_when_row_leaves_processing(tmp_path):
+    queue = PrintQueue(str(tmp_path / 'queue.db'))
+    queue_id = _processing(queue, claimed_by='despachante-a')
+    queue.update_status(queue_id, QueueStatus.PENDING)
+    queue.update_status(queue_id, QueueStatus.PROCESSING)
+    assert queue.reclaim_processing(-1, 'despachante-b') == 0
+
+
+def test_recent_rows_not_reclaimed(tmp_path):
+    queue = PrintQueue(str(tmp_path / 'queue.db'))
+    _processing(queue, claimed_by='despachante-a')
+    assert queue.reclaim_processing(60, 'despachante-b') == 0
@@ -0,0 +1,38 @@
+"""Esvaziamentos (POST /queue/process) consultados por qualquer worker."""
+from api.drain import DrainManager
+from api.queue import PrintQueue, QueueStatus
+
+
+def test_progress_visible_from_another_worker(tmp_path):
+    db_path = str(tmp_path / 'queue.db')
+    queue = PrintQueue(db_path)
+    ids = queue.add_many([{"payload": {"data": {}}}] * 3)
+    job = DrainManager(queue).start()
+
+    # Outro processo: outra instância da fila e do gerenciador no mesmo banco
+    other = DrainManager(PrintQueue(db_path))
+    assert other.progress(other.get(job.id))['remaining'] == 3
+
+    queue.update_status_many(ids[:2], QueueStatus.COMPLETED)
+    queue.update_status(ids[2], QueueStatus.FAILED)
+    progress = other.progress(other.get(job.id))
+    assert progress['status'] == 'completed'
+    assert (progress['processed'], progress['failed']) == (2, 1)
+    assert DrainManager(queue).get(job.id).status == 'completed'
+
+
+def test_items_added_later_do_not_count(tmp_path):
+    queue = PrintQueue(str(tmp_path / 'queue.db'))
+    first = queue.add({"data": {}})
+    manager = DrainManager(queue)
+    job = manager.start()
+    queue.add({"data": {}})
+    queue.update_status(first, QueueStatus.COMPLETED)
+    assert manager.progress(manager.get(job.id))['status'] == 'completed'
+
+
+def test_old_jobs_pruned(tmp_path):
+    manager = DrainManager(PrintQueue(str(tmp_path / 'queue.db')), max_jobs=2)
+    jobs = [manager.start() for _ in range(4)]
+    assert manager.get(jobs[0].id) is None and manager.get(jobs[1].id) is None
+    assert manager.get(jobs[3].id) is not None
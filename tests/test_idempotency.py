@@ -0,0 +1,103 @@
+"""Idempotency-Key em /print e /print/batch."""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.queue import PrintQueue, QueueStatus, valid_idempotency_key
+
+TTL = 86400
+
+LABEL = {"label_type": "produto", "data": {"codigo": "1420", "descricao": "Parafuso"}}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return PrintQueue(str(tmp_path / 'queue.db'))
+
+
+def test_replay_returns_original(queue):
+    item, created = queue.add_idempotent('chave', TTL, LABEL)
+    again, created_again = queue.add_idempotent('chave', TTL, LABEL)
+    assert created and not created_again
+    assert again['id'] == item['id']
+    assert queue.get_by_idempotency_key('chave', TTL)['id'] == item['id']
+
+
+def test_batch_replay_keeps_order(queue):
+    items = [{"payload": {"data": {"codigo": str(i)}}} for i in range(12)]
+    first, created = queue.add_batch_idempotent('lote', TTL, items)
+    again, created_again = queue.add_batch_idempotent('lote', TTL, items)
+    assert created and not created_again
+    assert [item['id'] for item in again] == [item['id'] for item in first]
+    assert [item['payload']['data']['codigo'] for item in first] == [str(i) for i in range(12)]
+
+
+def test_batch_keys_do_not_collide_with_print_keys(queue):
+    batch, _ = queue.add_batch_idempotent('b1', TTL, [{"payload": LABEL}])
+    assert queue.get_by_idempotency_key('b1#0', TTL) is None
+    item, created = queue.add_idempotent('b1#0', TTL, LABEL)
+    assert created and item['id'] != batch[0]['id']
+
+
+def test_batch_keys_with_separator_like_suffix(queue):
+    queue.add_batch_idempotent('a#x', TTL, [{"payload": LABEL}] * 2)
+    queue.add_batch_idempotent('a', TTL, [{"payload": LABEL}])
+    assert len(queue.get_batch_by_idempotency_key('a', TTL)) == 1
+    assert len(queue.get_batch_by_idempotency_key('a#x', TTL)) == 2
+
+
+def test_control_characters_rejected():
+    assert valid_idempotency_key('pedido-42#1')
+    assert not valid_idempotency_key('b1\x1f0')
+    assert not valid_idempotency_key('')
+
+
+@pytest.fixture
+def printed(api, monkeypatch):
+    printed = []
+    monkeypatch.setattr(api.printer_manager, 'get_printer_name', lambda name=None, printers=None: 'Zebra')
+    monkeypatch.setattr(api.printer_manager, 'list_printers', lambda: ['Zebra'])
+    monkeypatch.setattr(api.printer_manager, 'is_printer_available', lambda name=None: True)
+    monkeypatch.setattr(api.printer_manager, 'print_zpl', lambda zpl, name=None: printed.append(zpl) or True)
+    return printed
+
+
+def test_print_replayed_without_printing_again(api, printed):
+    client = TestClient(api.app)
+    first = client.post('/print', json=LABEL, headers={"Idempotency-Key": "pedido-7"})
+    again = client.post('/print', json=LABEL, headers={"Idempotency-Key": "pedido-7"})
+    assert first.status_code == again.status_code == 200
+    assert 'Idempotency-Replayed' not in first.headers
+    assert again.headers['Idempotency-Replayed'] == 'true'
+    assert again.json()['queue_id'] == first.json()['queue_id']
+    assert len(printed) == 1
+
+
+def test_batch_replayed_without_printing_again(api, printed):
+    client = TestClient(api.app)
+    body = {"items": [LABEL, {**LABEL, "data": {"codigo": "2"}}]}
+    first = client.post('/print/batch', json=body, headers={"Idempotency-Key": "lote-7"})
+    again = client.post('/print/batch', json=body, headers={"Idempotency-Key": "lote-7"})
+    assert again.headers['Idempotency-Replayed'] == 'true'
+    assert [i['queue_id'] for i in again.json()['items']] == [i['queue_id'] for i in first.json()['items']]
+    assert len(printed) == 1
+
+
+def test_invalid_key_rejected_by_api(api, printed):
+    response = TestClient(api.app).post('/print', json=LABEL, headers={"Idempotency-Key": "b1\x1f0"})
+    assert response.status_code == 400
+    assert not printed
+
+
+def test_print_key_is_not_replayed_from_batch(api, printed):
+    client = TestClient(api.app)
+
+    response = client.post('/print/batch', json={"items": [LABEL]}, headers={"Idempotency-Key": "b1"})
+    assert response.status_code == 200
+    batch_id = response.json()['items'][0]['queue_id']
+
+    response = client.post('/print', json=LABEL, headers={"Idempotency-Key": "b1#0"})
+    assert response.status_code == 200
+    assert 'Idempotency-Replayed' not in response.headers
+    assert response.json()['queue_id'] != batch_id
+    assert len(printed) == 2
+    assert api.print_queue.get_by_id(response.json()['queue_id'])['status'] == QueueStatus.COMPLETED.value
@@ -0,0 +1,57 @@
+"""Progresso das importações consultado por qualquer worker."""
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from api.imports import ImportJob, ImportManager
+from api.queue import PrintQueue
+
+
+def _wait(manager, job_id):
+    for _ in range(200):
+        job = manager.get(job_id)
+        if job.status != "running":
+            return job
+        time.sleep(0.01)
+    raise AssertionError("importação não terminou")
+
+
+def test_progress_visible_from_another_worker(tmp_path):
+    db_path = str(tmp_path / 'queue.db')
+    upload = tmp_path / 'lote.ndjson'
+    rows = [{"nome_produto": f"Produto {i}", "codigo_barras": "7891234567895"} for i in range(5)]
+    upload.write_text("\n".join(json.dumps(r) for r in rows) + "\n{invalido\n", encoding='utf-8')
+
+    manager = ImportManager(PrintQueue(db_path), chunk_size=2)
+    job = manager.start(ImportJob(upload, "ndjson"))
+    _wait(manager, job.id)
+
+    # Outro processo: outra instância da fila e do gerenciador no mesmo banco
+    other = ImportManager(PrintQueue(db_path)).get(job.id).to_dict()
+    assert other["status"] == "completed"
+    assert (other["rows"], other["queued"], other["failed"]) == (6, 5, 1)
+    assert other["progress"] == 1.0
+    assert other["errors"][0]["row"] == 6
+    assert len(PrintQueue(db_path).get_pending(limit=10)) == 5
+
+
+def test_unknown_job(tmp_path):
+    assert ImportManager(PrintQueue(str(tmp_path / 'queue.db'))).get("x") is None
+
+
+def test_upload_through_api(api):
+    client = TestClient(api.app)
+    body = "\n".join(json.dumps({"nome_produto": f"Produto {i}"}) for i in range(3))
+
+    response = client.post('/print/import', content=body.encode('utf-8'),
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 202
+    job_id = response.json()['id']
+
+    for _ in range(200):
+        progress = client.get(f'/print/import/{job_id}').json()
+        if progress['status'] != 'running':
+            break
+        time.sleep(0.01)
+    assert (progress['status'], progress['queued']) == ('completed', 3)
@@ -0,0 +1,137 @@
+"""Verifica (EXPLAIN QUERY PLAN) que toda consulta da fila usa índice.
+
+Cada entrada de ``QUERIES`` chama um método de ``PrintQueue`` sobre um banco
+com histórico; as consultas executadas são capturadas e o plano de cada uma
+não pode ter scan completo da tabela nem ordenação em B-tree temporária.
+Consultas novas na fila devem ganhar uma entrada aqui.
+"""
+import json
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+# Adiciona o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.queue import PrintQueue, QueueStatus, new_queue_id
+
+# Linhas de histórico no banco de teste
+HISTORY_ROWS = 50_000
+
+
+class _TracingQueue(PrintQueue):
+    """PrintQueue que registra as consultas executadas."""
+
+    def __init__(self, db_path: str):
+        self.statements = []
+        super().__init__(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = super()._connect()
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, sql: str):
+        verb = sql.lstrip()[:6].upper()
+        if verb in ('SELECT', 'UPDATE') and 'sqlite_master' not in sql:
+            self.statements.append(' '.join(sql.split()))
+
+
+def _step_without_index(detail: str, sql: str) -> bool:
+    """Indica se um passo do plano não usa índice (scan completo ou ordenação)."""
+    if 'TEMP B-TREE' in detail:
+        return True
+    # SCAN sem índice só é aceitável na listagem sem filtro, que percorre a
+    # chave primária (seq) em ordem e para no LIMIT
+    return detail.startswith('SCAN') and 'INDEX' not in detail and 'WHERE' in sql.upper()
+
+
+@pytest.fixture(scope='module')
+def queue(tmp_path_factory):
+    """Fila com histórico: 10% pendente, um terço na impressora Zebra."""
+    db_path = tmp_path_factory.mktemp('plans') / 'plans.db'
+    queue = _TracingQueue(str(db_path))
+    payload = json.dumps({"label_type": "produto", "data": {"codigo": "1420"}})
+    conn = sqlite3.connect(str(db_path))
+    conn.executemany(
+        "INSERT INTO print_queue (id, status, payload) VALUES (?, 'pending', ?)",
+        ((new_queue_id(), payload) for _ in range(HISTORY_ROWS))
+    )
+    conn.execute("UPDATE print_queue SET status = 'completed' WHERE seq % 10 != 0")
+    conn.execute("UPDATE print_queue SET printer_name = 'Zebra' WHERE seq % 3 = 0")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return queue
+
+
+def _page_after(queue: PrintQueue) -> str:
+    return queue.get_all(None, 100)[-1]['id']
+
+
+def _first_seq_since(queue: PrintQueue, moment: datetime) -> int:
+    conn = queue._connect()
+    try:
+        return queue._first_seq_since(conn.cursor(), moment)
+    finally:
+        conn.close()
+
+
+QUERIES = {
+    "get_pending": lambda q: q.get_pending(10),
+    "get_pending_printer": lambda q: q.get_pending(10, printer_name='Zebra'),
+    "get_pending_by_client": lambda q: q.get_pending_by_client(10),
+    "get_by_id": lambda q: q.get_by_id(new_queue_id()),
+    "get_all": lambda q: q.get_all(None, 100),
+    "get_all_status": lambda q: q.get_all(QueueStatus.FAILED, 100),
+    "get_all_after": lambda q: q.get_all(None, 100, after=_page_after(q)),
+    "get_all_printer": lambda q: q.get_all(None, 100, printer_name='Zebra'),
+    "get_all_filters": lambda q: q.get_all(
+        QueueStatus.PENDING, 100, printer_name='Zebra',
+        created_from=datetime(2000, 1, 1), created_to=datetime(2100, 1, 1)
+    ),
+    "get_all_created_from": lambda q: q.get_all(None, 100, created_from=datetime(2000, 1, 1)),
+    "first_seq_since": lambda q: _first_seq_since(q, datetime.now(timezone.utc)),
+    "get_stats": lambda q: q.get_stats(),
+    "get_lane_stats": lambda q: q.get_lane_stats(),
+    "get_client_stats": lambda q: q.get_client_stats(),
+    "get_printer_stats": lambda q: q.get_printer_stats(),
+    "get_active_range": lambda q: q.get_active_range(),
+    "get_range_progress": lambda q: q.get_range_progress(
+        1, HISTORY_ROWS, '2000-01-01 00:00:00.000'
+    ),
+    "promote_starved": lambda q: q.promote_starved(300),
+    "reclaim_processing": lambda q: q.reclaim_processing(15, new_queue_id()),
+    "get_dispatcher_signals": lambda q: q.get_dispatcher_signals(),
+    "get_background_job": lambda q: q.get_background_job('drain', new_queue_id()),
+    "get_by_idempotency_key": lambda q: q.get_by_idempotency_key('chave', 86400),
+    "purge_idempotency_keys": lambda q: q.purge_idempotency_keys(86400),
+    "add_idempotent": lambda q: q.add_idempotent('chave', 86400, {"data": {}}),
+    "add_batch_idempotent": lambda q: q.add_batch_idempotent(
+        'lote', 86400, [{"payload": {"data": {}}}, {"payload": {"data": {}}}]
+    ),
+    "get_batch_by_idempotency_key": lambda q: q.get_batch_by_idempotency_key('lote', 86400),
+    "mark_completed": lambda q: q.mark_completed(_page_after(q)),
+    "update_status_many": lambda q: q.update_status_many(
+        [item['id'] for item in q.get_pending(5)], QueueStatus.PROCESSING
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_query_uses_index(queue, name):
+    queue.statements.clear()
+    QUERIES[name](queue)
+    assert queue.statements, f"{name} não executou nenhuma consulta"
+
+    conn = sqlite3.connect(str(queue.db_path))
+    try:
+        for sql in queue.statements:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            bad = [detail for detail in plan if _step_without_index(detail, sql)]
+            assert not bad, f"{sql}\n  " + "\n  ".join(plan)
+    finally:
+        conn.close()
@@ -0,0 +1,103 @@
+"""Montagem dos jobs do processador: itens idênticos (^PQ) e pares 2-up."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.queue import PrintQueue
+from api.queue_processor import QueueProcessor
+
+
+def _item(n, data=None, printer=None, label_type="produto", age_seconds=3600, **payload):
+    created = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    return {
+        "id": f"item-{n}",
+        "printer_name": printer,
+        "created_at": created.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+        "payload": {"label_type": label_type, "data": data or {"codigo": str(n)},
+                    "duas_colunas": False, **payload},
+    }
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = QueueProcessor(PrintQueue(str(tmp_path / 'queue.db')), None)
+    processor.merge_identical = True
+    processor.pack_two_up = False
+    processor.pack_wait_seconds = 2
+    return processor
+
+
+def _plan(processor, items):
+    return [([item['id'] for item in group], payload, copies)
+            for group, payload, copies in processor._plan_jobs(items)]
+
+
+def test_identical_items_become_copies(processor):
+    same = {"codigo": "1"}
+    items = [_item(1, same), _item(2, same), _item(3, same), _item(4)]
+    plan = _plan(processor, items)
+    assert [(ids, copies) for ids, _, copies in plan] == [
+        (["item-1", "item-2", "item-3"], 3), (["item-4"], 1)
+    ]
+
+
+def test_identical_items_grouped_per_printer(processor):
+    same = {"codigo": "1"}
+    items = [_item(1, same, "A"), _item(2, same, "B"), _item(3, same, "A")]
+    assert [ids for ids, _, _ in _plan(processor, items)] == [["item-1", "item-3"], ["item-2"]]
+
+
+def test_merge_disabled(processor):
+    processor.merge_identical = False
+    same = {"codigo": "1"}
+    assert len(_plan(processor, [_item(1, same), _item(2, same)])) == 2
+
+
+def test_two_up_pairs_consecutive_labels(processor):
+    processor.pack_two_up = True
+    plan = _plan(processor, [_item(n) for n in range(1, 5)])
+    assert [(ids, copies) for ids, _, copies in plan] == [
+        (["item-1", "item-2"], 1), (["item-3", "item-4"], 1)
+    ]
+    payload = plan[0][1]
+    assert payload["duas_colunas"] is True
+    assert (payload["data"], payload["data_col2"]) == ({"codigo": "1"}, {"codigo": "2"})
+
+
+def test_two_up_identical_group_halves_copies(processor):
+    processor.pack_two_up = True
+    same = {"codigo": "1"}
+    plan = _plan(processor, [_item(n, same) for n in range(5)])
+    # 5 iguais: 2 cópias da etiqueta dupla e a sobra (antiga) sai sozinha
+    assert [(len(ids), copies) for ids, _, copies in plan] == [(4, 2), (1, 1)]
+    assert plan[0][1]["data_col2"] == same
+    assert plan[1][1]["duas_colunas"] is False
+
+
+def test_two_up_keeps_printers_apart(processor):
+    processor.pack_two_up = True
+    items = [_item(1, printer="A"), _item(2, printer="B"), _item(3, printer="A"), _item(4, printer="B")]
+    assert [ids for ids, _, _ in _plan(processor, items)] == [
+        ["item-1", "item-3"], ["item-2", "item-4"]
+    ]
+
+
+def test_two_up_unpackable_label_ends_wait(processor):
+    processor.pack_two_up = True
+    items = [_item(1), _item(2, label_type="custom"), _item(3)]
+    plan = _plan(processor, items)
+    assert [ids for ids, _, _ in plan][:2] == [["item-1"], ["item-2"]]
+
+
+def test_recent_single_waits_for_partner(processor):
+    processor.pack_two_up = True
+    plan = _plan(processor, [_item(1), _item(2), _item(3, age_seconds=0)])
+    assert [ids for ids, _, _ in plan] == [["item-1", "item-2"]]
+    assert processor._hold_until is not None
+
+
+def test_old_single_printed_alone(processor):
+    processor.pack_two_up = True
+    plan = _plan(processor, [_item(1, age_seconds=10)])
+    assert [ids for ids, _, _ in plan] == [["item-1"]]
+    assert processor._hold_until is None
@@ -0,0 +1,76 @@
+"""Limite de taxa por cliente (token bucket) e o header Retry-After."""
+import pytest
+from fastapi.testclient import TestClient
+
+from api import rate_limit
+from api.rate_limit import RateLimiter, TokenBucket, retry_after_header
+
+LABEL = {"label_type": "produto", "data": {"codigo": "1420", "descricao": "Parafuso"}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_refills_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert bucket.wait_time(4, clock.now) == 0
+    bucket.take(4)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(0.5)
+    clock.now += 1
+    assert bucket.wait_time(2, clock.now) == 0
+    clock.now += 60
+    bucket.wait_time(0, clock.now)
+    assert bucket.tokens == 4
+
+
+def test_reserve_goes_negative_and_delays_next(clock):
+    bucket = TokenBucket(rate=10, capacity=10)
+    assert bucket.reserve(30, clock.now) == pytest.approx(2.0)
+    assert bucket.wait_time(1, clock.now) == pytest.approx(2.1)
+
+
+def test_acquire_counts_requests_and_labels(clock):
+    limiter = RateLimiter({"default": {"requests_per_second": 10, "labels_per_second": 5}})
+    assert limiter.acquire(None, labels=5) == 0
+    # Sem saldo de etiquetas: recusada sem consumir a ficha de requisição
+    assert limiter.acquire(None, labels=1) == pytest.approx(0.2)
+    clock.now += 0.2
+    assert limiter.acquire(None, labels=1) == 0
+
+
+def test_unlisted_clients_share_default_bucket(clock):
+    limiter = RateLimiter({"default": {"requests_per_second": 1}, "erp": {"requests_per_second": 1}})
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("b") > 0
+    assert limiter.acquire("erp") == 0
+
+
+@pytest.mark.parametrize('seconds, header', [(0.01, "1"), (1.0, "1"), (1.2, "2"), (29.5, "30")])
+def test_retry_after_rounds_up(seconds, header):
+    assert retry_after_header(seconds) == header
+
+
+def test_print_rejected_with_retry_after(api, monkeypatch, clock):
+    monkeypatch.setattr(api, 'rate_limiter', RateLimiter({"default": {"requests_per_second": 0.5}}))
+    monkeypatch.setattr(api.config, 'is_accept_only', lambda: True)
+    monkeypatch.setattr(api.queue_processor, 'wake', lambda: None)
+    client = TestClient(api.app)
+
+    assert client.post('/print', json=LABEL).status_code == 202
+    response = client.post('/print', json=LABEL)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == "2"
+    clock.now += 2
+    assert client.post('/print', json=LABEL).status_code == 202
@@ -0,0 +1,87 @@
+"""Escalonamento justo da fila entre clientes (FairScheduler)."""
+from api.scheduler import DEFAULT_CLIENT, ClientStats, FairScheduler
+
+
+def _items(client_id, count, priority=5):
+    return [
+        {"id": f"{client_id}-{i:03d}", "client_id": client_id, "priority": priority,
+         "created_at": f"2026-01-01 00:00:{i:02d}.000"}
+        for i in range(count)
+    ]
+
+
+def test_unlisted_clients_share_default_slice():
+    scheduler = FairScheduler({"erp": 1})
+    heads = {"erp": _items("erp", 10)}
+    heads.update({f"x{n}": _items(f"x{n}", 10) for n in range(5)})
+    selected = scheduler.select(heads, 10)
+    # erp e "default" (os 5 clientes não listados juntos) dividem meio a meio
+    assert sum(item['client_id'] == 'erp' for item in selected) == 5
+    assert set(scheduler._pass) == {"erp", DEFAULT_CLIENT}
+
+
+def test_default_bucket_keeps_fifo_across_clients():
+    scheduler = FairScheduler()
+    heads = {"a": _items("a", 3)[::2], "b": _items("b", 3)[1:2]}
+    order = [item['id'] for item in scheduler.select(heads, 3)]
+    assert order == ["a-000", "b-001", "a-002"]
+
+
+def test_idle_clients_dropped():
+    scheduler = FairScheduler({"erp": 1, "loja": 1})
+    scheduler.select({"erp": _items("erp", 2), "loja": _items("loja", 2)}, 4)
+    scheduler.select({"erp": _items("erp", 2)}, 2)
+    assert set(scheduler._pass) == {"erp"}
+
+
+def test_rate_limited_clients_have_own_slice():
+    scheduler = FairScheduler({}, clients={"loja": {}})
+    assert scheduler.client_key("loja") == "loja"
+    assert scheduler.client_key("qualquer") == DEFAULT_CLIENT
+    assert scheduler.client_key(None) == DEFAULT_CLIENT
+
+
+def test_client_stats_bounded_by_client_key():
+    scheduler = FairScheduler({"erp": 1})
+    stats = ClientStats()
+    for n in range(50):
+        stats.record(scheduler.client_key(f"id-{n}"), None, True)
+    stats.record(scheduler.client_key("erp"), None, False)
+    snapshot = stats.snapshot()
+    assert set(snapshot) == {DEFAULT_CLIENT, "erp"}
+    assert snapshot[DEFAULT_CLIENT]['completed'] == 50
+
+
+def test_weights_split_throughput():
+    scheduler = FairScheduler({"erp": 3, "loja": 1})
+    heads = {"erp": _items("erp", 40), "loja": _items("loja", 40)}
+    selected = scheduler.select(heads, 40)
+    assert sum(item['client_id'] == 'erp' for item in selected) == 30
+    # Cada cliente na própria ordem FIFO
+    erp = [item['id'] for item in selected if item['client_id'] == 'erp']
+    assert erp == sorted(erp)
+
+
+def test_equal_weights_interleave():
+    scheduler = FairScheduler({"erp": 1, "loja": 1})
+    heads = {"erp": _items("erp", 3), "loja": _items("loja", 3)}
+    clients = [item['client_id'] for item in scheduler.select(heads, 6)]
+    assert clients == ["erp", "loja"] * 3
+
+
+def test_priority_before_fairness():
+    scheduler = FairScheduler({"erp": 1, "loja": 1})
+    heads = {"erp": _items("erp", 3, priority=5), "loja": _items("loja", 2, priority=0)}
+    clients = [item['client_id'] for item in scheduler.select(heads, 5)]
+    assert clients == ["loja", "loja", "erp", "erp", "erp"]
+
+
+def test_returning_client_gets_no_idle_credit():
+    scheduler = FairScheduler({"erp": 1, "loja": 1})
+    for _ in range(5):
+        scheduler.select({"erp": _items("erp", 4)}, 4)
+    clients = [
+        item['client_id']
+        for item in scheduler.select({"erp": _items("erp", 4), "loja": _items("loja", 4)}, 4)
+    ]
+    assert clients.count("erp") == 2
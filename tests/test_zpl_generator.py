@@ -0,0 +1,59 @@
+"""Geração de ZPL: cópias (^PQ) e o render em colunas das etiquetas de produto."""
+import pytest
+
+from api.zpl_generator import ZPLGenerator
+
+PRODUCTS = [
+    {"codigo": "1420", "descricao": "JG DENTE ENDO 21 AO 27 RADIO", "descricao2": "PACOS",
+     "codigo_barras": "7890000005098", "lote": "L1", "validade": "12/27", "pedido": "88"},
+    {"codigo": "77", "descricao": "Parafuso ^inox~ 3/8", "ref": "P-77"},
+    {"codigo": "9", "descricao": "Sem EAN", "codigo_barras": "ABC123"},
+    {"codigo": "10", "descricao": "D" * 80, "ean": "7891234567895", "lote": "X"},
+    {},
+]
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return ZPLGenerator()
+
+
+def test_columnar_render_matches_single_label(generator):
+    labels = [zpl for chunk in generator.render_product_labels(PRODUCTS, 2) for zpl in chunk]
+    assert labels == [generator.generate_product_label(data) for data in PRODUCTS]
+
+
+def test_columnar_render_accepts_columns(generator):
+    columns = {"codigo": ["1", "2"], "descricao": ["A", "B"], "codigo_barras": ["7890000005098", None]}
+    rows = [{"codigo": "1", "descricao": "A", "codigo_barras": "7890000005098"},
+            {"codigo": "2", "descricao": "B"}]
+    assert next(generator.render_product_labels(columns)) == [
+        generator.generate_product_label(row) for row in rows
+    ]
+
+
+def test_batch_render_is_concatenation(generator):
+    batch = b"".join(generator.render_product_batch(PRODUCTS, 2))
+    labels = [generator.generate_product_label(data) for data in PRODUCTS]
+    assert batch == "".join(f"{zpl}\n" for zpl in labels).encode('utf-8')
+
+
+def test_with_quantity_sets_pq(generator):
+    zpl = "^XA\n^FO10,10^FDA^FS\n^XZ"
+    assert generator.with_quantity(zpl, 3) == "^XA\n^FO10,10^FDA^FS\n^PQ3\n^XZ"
+    assert generator.with_quantity(zpl, 1) == zpl
+
+
+def test_with_quantity_multiplies_existing_pq(generator):
+    zpl = generator.generate_product_label(PRODUCTS[0])
+    merged = generator.with_quantity(zpl, 4)
+    assert merged == zpl.replace("^PQ1", "^PQ4")
+    assert generator.with_quantity("^XA^PQ2^FDA^FS^XZ", 3) == "^XA^PQ6^FDA^FS^XZ"
+
+
+@pytest.mark.parametrize('zpl', [
+    "^XA^FDA^FS^XZ\n^XA^FDB^FS^XZ",
+    "^XA^FD001^SN001,1,Y^FS^XZ",
+])
+def test_with_quantity_repeats_when_pq_would_change_output(generator, zpl):
+    assert generator.with_quantity(zpl, 2) == f"{zpl}\n{zpl}"